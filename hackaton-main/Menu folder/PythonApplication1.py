@@ -1,32 +1,36 @@
+import startup  # First, so the startup breakdown covers every import
 import asyncio
+import importlib
 import platform
+import time
 import pygame
-import base64
-from io import BytesIO
-import harta  # Exploration mode
-import lupta  # Fighting mode
 import os
-
-# Debug: Verify module imports
-print("combined_game.py: Starting application")
-try:
-    print("combined_game.py: Imported harta module from:", harta.__file__)
-    print("combined_game.py: Imported lupta module from:", lupta.__file__)
-except AttributeError as e:
-    print(f"combined_game.py: Import error: {e}")
-    exit(1)
-
-# Initialize Pygame
-pygame.init()
-pygame.mixer.init()
+import debuglog
+startup.mark("import pygame")
+import scenes
+import brightness
+import textcache
+import savegame
+import fonts
+import audio
+import assetpack
+from player import Player  # In their own module so headless tools need not import this one
+startup.mark("import game modules")
+
+log = debuglog.get_logger("combined_game.py")
+log.info("Starting application")
+
+# Initialize only what the first menu frame needs; audio and the play modes are
+# started by preload() once that frame is on screen
+pygame.display.init()
+pygame.font.init()
 
 # Screen dimensions and constants
 WIDTH = 800
 HEIGHT = 600
-MAP_WIDTH, MAP_HEIGHT = 1600, 1200  # Map size for exploration/fighting
-PLAYER_SIZE = 150
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
+screen = scenes.open_window((WIDTH, HEIGHT))  # Scaled to the window and fullscreen by SDL
 pygame.display.set_caption("Starting Screen")
+startup.mark("open window")
 
 # Colors
 WHITE = (255, 255, 255)
@@ -35,79 +39,40 @@ HIGHLIGHT_COLOR = (255, 255, 255, 50)
 BLACK = (0, 0, 0)
 GRAY = (150, 150, 150)
 
-# Load background music
-if platform.system() == "Emscripten":
-    # For Pyodide: Use base64-encoded audio (placeholder)
-    base64_string_music = (
-        "YOUR_BASE64_ENCODED_MUSIC_FILE_HERE"  # Replace with actual base64 string
-    )
-    try:
-        audio_data = base64.b64decode(base64_string_music)
-        pygame.mixer.music.load(BytesIO(audio_data))
-        pygame.mixer.music.play(-1)  # Play music on loop
-        pygame.mixer.music.set_volume(0.4)  # Initial volume set to 40%
-    except Exception as e:
-        print(f"combined_game.py: Failed to load base64 music: {e}")
-        # Continue without music
-else:
-    # For Visual Studio: Load music from file
-    music_file = "menu.mp3"  # Your music file path
-    if os.path.exists(music_file):
-        try:
-            pygame.mixer.music.load(music_file)
-            pygame.mixer.music.play(-1)  # Play music on loop
-            pygame.mixer.music.set_volume(0.4)  # Initial volume set to 40%
-        except pygame.error as e:
-            print(f"combined_game.py: Failed to load music file '{music_file}': {e}")
-            # Continue without music
-    else:
-        print(f"combined_game.py: Music file '{music_file}' not found in '{os.getcwd()}'. Continuing without music.")
-
-# Fonts
-font = pygame.font.SysFont("arial", 36)
-small_font = pygame.font.SysFont("arial", 24)  # Smaller font for slider labels
 
-# Load start screen image
-if platform.system() == "Emscripten":
-    # For Pyodide: Use base64-encoded image
-    base64_string_start = (
-        "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAACklEQVR4nGMAAQAABQABDQottAAAAABJRU5ErkJggg=="
-    )  # Placeholder (1x1 black pixel)
-    img_data_start = base64.b64decode(base64_string_start)
-    start_image = pygame.image.load(BytesIO(img_data_start))
-else:
-    # For Visual Studio: Load image from file
+def load_screen_image(name, missing_text):
+    """Load a full-screen background from the asset pack, scaled and converted for fast blits."""
+    pack = assetpack.get()
     try:
-        start_image = pygame.image.load("main.png")  # Your starting screen image
+        if pack is not None and name in pack:
+            image = pack.load_image(name)
+        else:
+            image = pygame.image.load(f"{name}.png")
     except pygame.error:
         # Fallback if image not found
-        start_image = pygame.Surface((WIDTH, HEIGHT))
-        start_image.fill((100, 100, 100))  # Gray background
-        text = font.render("Image not found.", True, WHITE)
-        start_image.blit(text, (WIDTH // 4, HEIGHT // 2))
+        image = pygame.Surface((WIDTH, HEIGHT))
+        image.fill((100, 100, 100))  # Gray background
+        text = fonts.get("arial", 36).render(missing_text, True, WHITE)
+        image.blit(text, (WIDTH // 4, HEIGHT // 2))
+    if image.get_size() != (WIDTH, HEIGHT):
+        image = pygame.transform.scale(image, (WIDTH, HEIGHT))
+    return image.convert()
 
-# Load settings screen background image
-if platform.system() == "Emscripten":
-    # For Pyodide: Use base64-encoded image
-    base64_string_settings = (
-        "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAACklEQVR4nGMAAQAABQABDQottAAAAABJRU5ErkJggg=="
-    )  # Placeholder (1x1 black pixel)
-    img_data_settings = base64.b64decode(base64_string_settings)
-    settings_image = pygame.image.load(BytesIO(img_data_settings))
-else:
-    # For Visual Studio: Load image from file
-    try:
-        settings_image = pygame.image.load("settings.png")  # Your settings background image
-    except pygame.error:
-        # Fallback if image not found
-        settings_image = pygame.Surface((WIDTH, HEIGHT))
-        settings_image.fill((100, 100, 100))  # Gray background
-        text = font.render("Settings image not found.", True, WHITE)
-        settings_image.blit(text, (WIDTH // 4, HEIGHT // 2))
 
-# Scale images to fit screen
-start_image = pygame.transform.scale(start_image, (WIDTH, HEIGHT))
-settings_image = pygame.transform.scale(settings_image, (WIDTH, HEIGHT))
+# Load start screen image (needed for the first frame)
+start_image = load_screen_image("main", "Image not found.")
+startup.mark("load start screen image")
+
+# Settings screen background, loaded by preload() or on first visit
+_settings_image = None
+
+
+def settings_image():
+    global _settings_image
+    if _settings_image is None:
+        _settings_image = load_screen_image("settings", "Settings image not found.")
+    return _settings_image
+
 
 # Button hitboxes for starting screen
 BUTTON_WIDTH = 368
@@ -151,132 +116,14 @@ volume_slider_x = 367
 volume_slider_y = 309
 volume_slider_rect = pygame.Rect(volume_slider_x, volume_slider_y, SLIDER_WIDTH, SLIDER_HEIGHT)
 volume_handle_rect = pygame.Rect(volume_slider_x + int((40 / 100) * (SLIDER_WIDTH - SLIDER_HANDLE_WIDTH)), volume_slider_y - (SLIDER_HANDLE_HEIGHT - SLIDER_HEIGHT) // 2, SLIDER_HANDLE_WIDTH, SLIDER_HANDLE_HEIGHT)
-volume_value = 40  # Initial value set to 40 to match pygame.mixer.music.set_volume(0.4)
+volume_value = 40  # Initial value set to 40 to match audio.MUSIC_VOLUME
 
-# Unified Player class
-class Player:
-    def __init__(self):
-        self.rect = pygame.Rect(MAP_WIDTH // 2, MAP_HEIGHT // 2, PLAYER_SIZE, PLAYER_SIZE)
-        self.speed = 5
-        self.health = 100
-        self.max_health = 100
-        self.attack_cooldown = 0
-        self.is_blocking = False
-        self.is_attacking = False  # Added to support harta.py rendering
-        # Animation state
-        self.direction = "right"  # Default facing direction
-        self.is_moving = False
-        self.frame = 0
-        self.frame_count = 1  # Single frame since we have one image
-        self.animation_speed = 0.2  # Not used with single frame
-        self.frames = []
-        self.load_sprites()
-
-    def load_sprites(self):
-        """Load and split the sprite sheet into frames"""
-        try:
-            if platform.system() == "Emscripten":
-                # Pyodide environment: Image loading not supported without Base64
-                raise Exception("Pyodide environment requires Base64-encoded image. Please embed the image as Base64.")
-            else:
-                # Local environment: Load the image file
-                sprite_image = pygame.image.load("diagonalstanga.png")  # Load the new image file
-                
-                # Scale the image to match PLAYER_SIZE (50x50)
-                sprite_image = pygame.transform.scale(sprite_image, (PLAYER_SIZE, PLAYER_SIZE))
-                
-                # Since we have a single frame, create right and left versions
-                frame_right = sprite_image
-                frame_left = pygame.transform.flip(sprite_image, True, False)
-                self.frames = [(frame_right, frame_left)]
-        except Exception as e:
-            print(f"combined_game.py: Error loading player sprite: {str(e)}")
-            # Fallback: Create a red square as a placeholder
-            dummy_surface = pygame.Surface((PLAYER_SIZE, PLAYER_SIZE))
-            dummy_surface.fill((255, 0, 0))  # Red square as fallback
-            self.frames = [(dummy_surface, dummy_surface)]
-
-    def update_animation(self):
-        """No animation since we have a single frame"""
-        self.frame = 0  # Always use the first (and only) frame
-
-    def handle_movement(self, keys_pressed):
-        moved = False
-        key_status = []
-        dx, dy = 0, 0  # Movement vector
-        # Apply speed penalty when blocking
-        current_speed = 2 if self.is_blocking else self.speed
-
-        if keys_pressed[pygame.K_w]:
-            print("combined_game.py: W pressed: Moving up")
-            dy -= current_speed
-            key_status.append("W")
-        if keys_pressed[pygame.K_s]:
-            print("combined_game.py: S pressed: Moving down")
-            dy += current_speed
-            key_status.append("S")
-        if keys_pressed[pygame.K_a]:
-            print("combined_game.py: A pressed: Moving left")
-            dx -= current_speed
-            key_status.append("A")
-            self.direction = "left"
-        if keys_pressed[pygame.K_d]:
-            print("combined_game.py: D pressed: Moving right")
-            dx += current_speed
-            key_status.append("D")
-            self.direction = "right"
-
-        # Normalize movement vector to ensure consistent speed
-        if dx != 0 or dy != 0:
-            import math
-            length = math.sqrt(dx**2 + dy**2)
-            if length > 0:
-                dx = dx * current_speed / length
-                dy = dy * current_speed / length
-                self.rect.x += dx
-                self.rect.y += dy
-                moved = True
-                self.is_moving = True
-        else:
-            self.is_moving = False
-
-        # Keep player within map boundaries
-        self.rect.x = max(0, min(self.rect.x, MAP_WIDTH - PLAYER_SIZE))
-        self.rect.y = max(0, min(self.rect.y, MAP_HEIGHT - PLAYER_SIZE))
-
-        return moved, key_status
-
-    def attack(self, enemy, mouse_buttons):
-        self.is_attacking = False  # Reset attack state
-        if mouse_buttons[0] and self.attack_cooldown <= 0:  # Left click
-            import math
-            dx = enemy.rect.centerx - self.rect.centerx
-            dy = enemy.rect.centery - self.rect.centery
-            distance = math.sqrt(dx**2 + dy**2)
-            if distance <= 100:  # Attack range
-                print("combined_game.py: Player attacks!")
-                enemy.take_damage(10)  # Deal 10 damage
-                self.attack_cooldown = 60  # 1-second cooldown at 60 FPS
-                self.is_attacking = True  # Set attacking state
-                return True
-        return False
-
-    def block(self, mouse_buttons):
-        self.is_blocking = mouse_buttons[2]  # Right click
-        if self.is_blocking:
-            print("combined_game.py: Player blocking!")
-        return self.is_blocking
-
-    def update(self):
-        if self.attack_cooldown > 0:
-            self.attack_cooldown -= 1
-        self.update_animation()
+# Brightness pass; GAME_BRIGHTNESS selects "overlay", "multiply" or "gamma"
+brightness_pass = brightness.Brightness(os.environ.get("GAME_BRIGHTNESS", "overlay"))
 
 # Game variables
-running = True
 clock = pygame.time.Clock()
 FPS = 60
-game_state = "start"  # Start with the starting screen
 dragging_brightness = False
 dragging_sfx = False
 dragging_volume = False
@@ -303,76 +150,150 @@ def draw_tick(surface, rect):
     pygame.draw.line(surface, RED, tick_mid, tick_end, 5)
 
 def apply_brightness(surface, brightness_value):
-    """Apply a brightness effect by overlaying a semi-transparent black surface."""
-    brightness_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    alpha = int(255 - (brightness_value * 2.55))
-    brightness_surface.fill((0, 0, 0, alpha))
-    surface.blit(brightness_surface, (0, 0))
+    """Apply the brightness pass (skipped at 100%, overlay cached between frames)."""
+    brightness_pass.apply(surface, brightness_value)
+
+def current_settings():
+    """Settings stored with a save."""
+    return {"brightness": brightness_value, "sfx": sfx_value, "volume": volume_value, "fullscreen": is_fullscreen}
+
+def apply_settings(settings):
+    """Restore saved slider values and fullscreen state."""
+    global brightness_value, sfx_value, volume_value, is_fullscreen
+    brightness_value = settings["brightness"]
+    sfx_value = settings["sfx"]
+    volume_value = settings["volume"]
+    brightness_handle_rect.x = brightness_slider_rect.x + int(brightness_value / 100 * (SLIDER_WIDTH1 - SLIDER_HANDLE_WIDTH))
+    sfx_handle_rect.x = sfx_slider_rect.x + int(sfx_value / 100 * (SLIDER_WIDTH - SLIDER_HANDLE_WIDTH))
+    volume_handle_rect.x = volume_slider_rect.x + int(volume_value / 100 * (SLIDER_WIDTH - SLIDER_HANDLE_WIDTH))
+    audio.set_music_volume(volume_value / 100)
+    audio.set_sfx_volume(sfx_value / 100)
+    if settings["fullscreen"] != is_fullscreen:
+        is_fullscreen = settings["fullscreen"]
+        try:
+            pygame.display.toggle_fullscreen()
+        except pygame.error as e:
+            log.warning("Failed to toggle fullscreen: %s", e)
+
+EXPOSE_EVENTS = (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED)
+
+
+class StartScene(scenes.Scene):
+    """Starting screen with NEW GAME, CONTINUE, SETTINGS and EXIT."""
+    animating = False  # Only hover and clicks change it
 
-def update_loop():
-    global running, game_state, brightness_value, sfx_value, volume_value, dragging_brightness, dragging_sfx, dragging_volume, is_fullscreen, player
+    def __init__(self):
+        self.dirty = scenes.DirtyTracker()
+        self.hovered = (False, False, False, False)
+
+    def enter(self, manager):
+        super().enter(manager)
+        pygame.display.set_caption("Starting Screen")
+        self.dirty.invalidate()
+        self.saved = savegame.peek()  # Header only; the enemies are read when CONTINUE is clicked
 
-    # Get mouse position
-    mouse_pos = pygame.mouse.get_pos()
-    mouse_pressed = pygame.mouse.get_pressed()[0]  # Left mouse button
+    def invalidate(self):
+        self.dirty.invalidate()
 
-    if game_state == "start":
-        # Starting screen
+    def frame(self, screen, events):
+        mouse_pos = pygame.mouse.get_pos()
         new_game_hovered = new_game_rect.collidepoint(mouse_pos)
         continue_hovered = continue_rect.collidepoint(mouse_pos)
         settings_hovered = settings_rect.collidepoint(mouse_pos)
         exit_hovered = exit_rect.collidepoint(mouse_pos)
+        self.hovered = (new_game_hovered, continue_hovered, settings_hovered, exit_hovered)
 
         # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+        next_scene = None
+        for event in events:
+            if event.type in EXPOSE_EVENTS:
+                self.dirty.invalidate()
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if new_game_hovered:
-                    print("combined_game.py: New Game Started! (Fighting Mode)")
-                    game_state = "fighting"
-                    pygame.display.set_caption("Fighting Mode")
+                    log.info("New Game Started! (Fighting Mode)")
+                    next_scene = "fighting"
                 if continue_hovered:
-                    print("combined_game.py: Continue Game! (Exploration Mode)")
-                    game_state = "exploring"
-                    pygame.display.set_caption("Exploration Mode")
+                    next_scene = self.continue_game()
                 if settings_hovered:
-                    game_state = "settings"
+                    next_scene = "settings"
                 if exit_hovered:
-                    running = False
-
-        # Draw starting screen
+                    self.manager.stop()
+
+        # Only buttons whose hover state changed are redrawn and pushed to the display
+        self.dirty.track("new_game", new_game_rect, new_game_hovered)
+        self.dirty.track("continue", continue_rect, continue_hovered)
+        self.dirty.track("settings", settings_rect, settings_hovered)
+        self.dirty.track("exit", exit_rect, exit_hovered)
+        self.dirty_rects = scenes.draw_dirty(screen, self.dirty.take(), self.draw)
+        return next_scene
+
+    def continue_game(self):
+        """Restore the last save, or keep the in-memory player if there is none."""
+        snapshot = savegame.load() if self.saved is not None else None
+        if snapshot is None:
+            log.info("Continue Game! (Exploration Mode)")
+            return "exploring"
+        log.info("Continue Game! (%s, saved %s)", snapshot.mode,
+                 time.strftime("%Y-%m-%d %H:%M", time.localtime(snapshot.meta["saved_at"])))
+        snapshot.apply_player(player)
+        apply_settings(snapshot.settings)
+        self.manager.scenes[snapshot.mode].restore = snapshot
+        return snapshot.mode
+
+    def draw(self, screen):
+        new_game_hovered, continue_hovered, settings_hovered, exit_hovered = self.hovered
         screen.blit(start_image, (0, 0))
         draw_button(screen, new_game_rect, new_game_hovered)
         draw_button(screen, continue_rect, continue_hovered)
         draw_button(screen, settings_rect, settings_hovered)
         draw_button(screen, exit_rect, exit_hovered)
 
-    elif game_state == "settings":
-        # Settings screen
+
+class SettingsScene(scenes.Scene):
+    """Settings screen with fullscreen toggle and brightness/SFX/volume sliders."""
+
+    def __init__(self):
+        self.dirty = scenes.DirtyTracker()
+        self.hovered = (False, False, False)
+
+    def enter(self, manager):
+        super().enter(manager)
+        self.dirty.invalidate()
+
+    def invalidate(self):
+        self.dirty.invalidate()
+
+    def frame(self, screen, events):
+        global brightness_value, sfx_value, volume_value, dragging_brightness, dragging_sfx, dragging_volume, is_fullscreen
+
+        mouse_pos = pygame.mouse.get_pos()
+        mouse_pressed = pygame.mouse.get_pressed()[0]  # Left mouse button
         back_hovered = back_button_rect.collidepoint(mouse_pos)
         fullscreen_hovered = fullscreen_rect.collidepoint(mouse_pos)
         controls_hovered = controls_rect.collidepoint(mouse_pos)
         brightness_handle_hovered = brightness_handle_rect.collidepoint(mouse_pos)
         sfx_handle_hovered = sfx_handle_rect.collidepoint(mouse_pos)
         volume_handle_hovered = volume_handle_rect.collidepoint(mouse_pos)
+        self.hovered = (back_hovered, fullscreen_hovered, controls_hovered)
 
         # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+        next_scene = None
+        for event in events:
+            if event.type in EXPOSE_EVENTS:
+                self.dirty.invalidate()
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if back_hovered:
-                    game_state = "start"
+                    next_scene = "start"
                 if fullscreen_hovered:
                     is_fullscreen = not is_fullscreen
                     try:
                         pygame.display.toggle_fullscreen()
                     except pygame.error as e:
-                        print(f"combined_game.py: Failed to toggle fullscreen: {e}")
-                    print("combined_game.py: Toggled Fullscreen! State:", is_fullscreen)
+                        log.warning("Failed to toggle fullscreen: %s", e)
+                    log.info("Toggled Fullscreen! State: %s", is_fullscreen)
+                    self.dirty.invalidate()
                 if controls_hovered:
-                    print("combined_game.py: Opened Controls!")
+                    log.info("Opened Controls!")
                 if brightness_handle_hovered:
                     dragging_brightness = True
                 if sfx_handle_hovered:
@@ -387,28 +308,44 @@ def update_loop():
         # Update sliders if dragging
         if dragging_brightness and mouse_pressed:
             new_x = max(brightness_slider_rect.x, min(mouse_pos[0] - SLIDER_HANDLE_WIDTH // 2, brightness_slider_rect.x + SLIDER_WIDTH1 - SLIDER_HANDLE_WIDTH))
+            if new_x != brightness_handle_rect.x:
+                self.dirty.invalidate()  # Brightness affects the whole screen
             brightness_handle_rect.x = new_x
             brightness_value = ((new_x - brightness_slider_rect.x) / (SLIDER_WIDTH1 - SLIDER_HANDLE_WIDTH)) * 100
-            print(f"combined_game.py: Brightness: {int(brightness_value)}")
+            log.throttle("brightness", 0.1, "Brightness: %d", int(brightness_value))
         if dragging_sfx and mouse_pressed:
             new_x = max(sfx_slider_rect.x, min(mouse_pos[0] - SLIDER_HANDLE_WIDTH // 2, sfx_slider_rect.x + SLIDER_WIDTH - SLIDER_HANDLE_WIDTH))
             sfx_handle_rect.x = new_x
             sfx_value = ((new_x - sfx_slider_rect.x) / (SLIDER_WIDTH - SLIDER_HANDLE_WIDTH)) * 100
-            print(f"combined_game.py: SFX: {int(sfx_value)}")
+            log.throttle("sfx", 0.1, "SFX: %d", int(sfx_value))
+            audio.set_sfx_volume(sfx_value / 100)
         if dragging_volume and mouse_pressed:
             new_x = max(volume_slider_rect.x, min(mouse_pos[0] - SLIDER_HANDLE_WIDTH // 2, volume_slider_rect.x + SLIDER_WIDTH - SLIDER_HANDLE_WIDTH))
             volume_handle_rect.x = new_x
             volume_value = ((new_x - volume_slider_rect.x) / (SLIDER_WIDTH - SLIDER_HANDLE_WIDTH)) * 100
-            print(f"combined_game.py: Volume: {int(volume_value)}")
-            pygame.mixer.music.set_volume(volume_value / 100)
-
-        # Draw settings screen
-        screen.blit(settings_image, (0, 0))
+            log.throttle("volume", 0.1, "Volume: %d", int(volume_value))
+            audio.set_music_volume(volume_value / 100)
+
+        # Only widgets that changed are redrawn and pushed to the display
+        self.dirty.track("back", back_button_rect, back_hovered)
+        self.dirty.track("fullscreen", fullscreen_rect, (fullscreen_hovered, is_fullscreen))
+        self.dirty.track("controls", controls_rect, controls_hovered)
+        self.dirty.track("brightness_handle", brightness_handle_rect, brightness_handle_rect.x)
+        self.dirty.track("sfx_handle", sfx_handle_rect, sfx_handle_rect.x)
+        self.dirty.track("volume_handle", volume_handle_rect, volume_handle_rect.x)
+        self.dirty_rects = scenes.draw_dirty(screen, self.dirty.take(), self.draw)
+        # A dragged slider follows the mouse every frame; otherwise only events change the screen
+        self.animating = dragging_brightness or dragging_sfx or dragging_volume
+        return next_scene
+
+    def draw(self, screen):
+        back_hovered, fullscreen_hovered, controls_hovered = self.hovered
+        screen.blit(settings_image(), (0, 0))
         draw_slider(screen, brightness_slider_rect, brightness_handle_rect, brightness_value, "Brightness")
         draw_slider(screen, sfx_slider_rect, sfx_handle_rect, sfx_value, "SFX")
         draw_slider(screen, volume_slider_rect, volume_handle_rect, volume_value, "Volume")
         pygame.draw.rect(screen, BLACK, back_button_rect)
-        back_text = font.render("Back", True, RED)
+        back_text = textcache.render(fonts.get("arial", 36), "Back", True, RED)
         back_text_rect = back_text.get_rect(center=back_button_rect.center)
         screen.blit(back_text, back_text_rect)
         draw_button(screen, back_button_rect, back_hovered)
@@ -417,61 +354,121 @@ def update_loop():
             draw_tick(screen, fullscreen_rect)
         draw_button(screen, controls_rect, controls_hovered)
 
-    elif game_state == "exploring":
-        print("combined_game.py: Entering exploration mode")
-        try:
-            result = harta.play_game(screen, clock, player)
-            if result == "switch_to_fighting":
-                print("combined_game.py: Switching to fighting mode")
-                game_state = "fighting"
-                pygame.display.set_caption("Fighting Mode")
-            elif result == "return_to_menu":
-                print("combined_game.py: Player died, returning to menu")
-                player = Player()  # Reset player
-                game_state = "start"
-                pygame.display.set_caption("Starting Screen")
-            elif not result or not running:
-                print("combined_game.py: Exiting exploration mode")
-                game_state = "start"
-                pygame.display.set_caption("Starting Screen")
-        except Exception as e:
-            print(f"combined_game.py: Error in exploration mode: {str(e)}")
-            running = False
 
-    elif game_state == "fighting":
-        print("combined_game.py: Entering fighting mode")
+AUTOSAVE_INTERVAL = 30  # Seconds between autosaves while playing
+RECORD_DIR = os.environ.get("GAME_RECORD")  # Record every play session's input here (see replay.py)
+
+
+class PlayScene(scenes.Scene):
+    """Exploration or fighting mode, stepped one frame at a time by the scene manager."""
+
+    def __init__(self, mode_name, caption):
+        self.mode_name = mode_name  # "harta" or "lupta", imported on first use
+        self.caption = caption
+        self.session = None
+        self.restore = None  # Snapshot to load into the next session (CONTINUE)
+        self.next_autosave = 0.0
+
+    @property
+    def mode(self):
+        return importlib.import_module(self.mode_name)  # Cached by Python after the first call
+
+    def enter(self, manager):
+        super().enter(manager)
+        log.info("Entering %s", self.caption)
+        pygame.display.set_caption(self.caption)
+        self.session = self.mode.new_session(player)
+        if self.restore is not None:
+            self.restore.apply_enemies(self.session.sim.enemies)
+            self.session.sim.tick = self.restore.meta["tick"]
+            self.restore = None
+        if RECORD_DIR:
+            import replay
+            self.record_path = replay.start_recording(RECORD_DIR, manager.current_name, self.session)
+        self.next_autosave = time.perf_counter() + AUTOSAVE_INTERVAL
+
+    def exit(self):
+        # Save when leaving the mode alive; a dead player keeps the last save
+        if self.session is not None and self.session.sim.player.health > 0:
+            self.save(background=self.manager.running)
+        if self.session is not None and self.session.recorder is not None:
+            self.session.recorder.save(self.record_path, self.session.sim)
+        self.session = None
+
+    def save(self, background=True):
+        """Snapshot now and write it on a background task (blocking only when quitting)."""
+        snapshot = savegame.capture(self.manager.current_name, self.session.sim, current_settings())
+        if background:
+            self.manager.spawn(savegame.save_async(snapshot), "autosave")
+        else:
+            try:
+                savegame.write(snapshot)
+            except OSError as e:
+                log.error("Failed to save: %s", e)
+
+    def frame(self, screen, events):
+        global player
         try:
-            result = lupta.play_game(screen, clock, player)
-            if result == "switch_to_exploring":
-                print("combined_game.py: Switching to exploration mode")
-                game_state = "exploring"
-                pygame.display.set_caption("Exploration Mode")
-            elif result == "return_to_menu":
-                print("combined_game.py: Player died, returning to menu")
-                player = Player()  # Reset player
-                game_state = "start"
-                pygame.display.set_caption("Starting Screen")
-            elif not result or not running:
-                print("combined_game.py: Exiting fighting mode")
-                game_state = "start"
-                pygame.display.set_caption("Starting Screen")
+            result = self.session.frame(screen, events)
         except Exception as e:
-            print(f"combined_game.py: Error in fighting mode: {str(e)}")
-            running = False
+            log.error("Error in %s: %s", self.caption, e)
+            self.manager.stop()
+            return None
+        if result is None:
+            if time.perf_counter() >= self.next_autosave:
+                self.next_autosave += AUTOSAVE_INTERVAL
+                self.save()
+            return None
+        if result == "switch_to_fighting":
+            return "fighting"
+        if result == "switch_to_exploring":
+            return "exploring"
+        if result == "return_to_menu":
+            log.info("Player died, returning to menu")
+            player = Player()  # Reset player
+            return "start"
+        log.info("Exiting %s", self.caption)
+        return "start"
+
+
+def load_sound_effects():
+    audio.load_sfx()
+    audio.set_sfx_volume(sfx_value / 100)
+
+
+async def preload():
+    """Load what the first menu frame did not need, one step per frame, while the menu runs."""
+    steps = (
+        ("start audio and music", audio.play_music),
+        ("load sound effects", load_sound_effects),
+        ("load settings image", settings_image),
+        ("import harta", lambda: importlib.import_module("harta")),
+        ("import lupta", lambda: importlib.import_module("lupta")),
+        ("load player sprites", lambda: player.frames),
+        ("open HUD fonts", lambda: importlib.import_module("engine").hud_fonts()),
+    )
+    await asyncio.sleep(0)  # Let the first frame go out first
+    startup.mark("(idle until first frame shown)")
+    for label, step in steps:
+        step()
+        startup.mark(label)
+        await asyncio.sleep(0)
+    startup.report("deferred loading after the first frame")
 
-    # Apply brightness overlay
-    apply_brightness(screen, brightness_value)
-    pygame.display.flip()
 
 async def main():
-    global running
-    while running:
-        update_loop()
-        clock.tick(FPS)
-        await asyncio.sleep(1.0 / FPS)
+    manager = scenes.SceneManager(screen, clock, FPS)
+    manager.add("start", StartScene())
+    manager.add("settings", SettingsScene())
+    manager.add("exploring", PlayScene("harta", "Exploration Mode"))
+    manager.add("fighting", PlayScene("lupta", "Fighting Mode"))
+    # Apply brightness overlay
+    manager.overlays.append(lambda surface: apply_brightness(surface, brightness_value))
+    manager.spawn(preload(), "preload")
+    await manager.run("start")
 
 if platform.system() == "Emscripten":
     asyncio.ensure_future(main())
 else:
     if __name__ == "__main__":
-        asyncio.run(main())
\ No newline at end of file
+        asyncio.run(main())
@@ -0,0 +1,82 @@
+import json
+import mmap
+import os
+import platform
+from io import BytesIO
+import pygame
+import build_assets
+import debuglog
+
+log = debuglog.get_logger("assetpack.py")
+
+
+class AssetPack:
+    """Read-only view of an asset pack written by build_assets.build_pack().
+
+    On desktop the file is memory-mapped, so opening it costs one open() and only
+    the pages of the assets actually decoded are ever read. In the browser it is read
+    into memory in one go. Either way every asset is a memoryview slice of the same
+    buffer; nothing is copied until a decoder needs a file object.
+    """
+
+    def __init__(self, path=build_assets.PACK_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            if platform.system() == "Emscripten":
+                self._map = None
+                self.buffer = memoryview(f.read())
+            else:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.buffer = memoryview(self._map)
+        header = build_assets.PACK_HEADER
+        magic, version, index_size = header.unpack_from(self.buffer)
+        if magic != build_assets.PACK_MAGIC or version != build_assets.PACK_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {build_assets.PACK_VERSION} asset pack")
+        index = json.loads(bytes(self.buffer[header.size:header.size + index_size]))
+        self.entries = index["entries"]
+        log.debug("Opened %s: %d assets", path, len(self.entries))
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def view(self, name):
+        """The raw bytes of an asset, as a memoryview into the pack."""
+        entry = self.entries[name]
+        return self.buffer[entry["offset"]:entry["offset"] + entry["size"]]
+
+    def open(self, name):
+        """A file object over an asset, for decoders that want one (images, music)."""
+        return BytesIO(self.view(name))
+
+    def load_image(self, name):
+        return pygame.image.load(self.open(name), f"{name}.{self.entries[name]['format']}")
+
+    def load_json(self, name):
+        return json.loads(bytes(self.view(name)))
+
+    def close(self):
+        self.buffer.release()
+        if self._map is not None:
+            self._map.close()
+
+
+# Dev flag: rebuild a stale pack before opening it, as python build_assets.py would
+BUILD_ON_START = os.environ.get("GAME_BUILD_ASSETS", "") not in ("", "0")
+_UNAVAILABLE = object()  # get() already failed; the loose files are used for the rest of the process
+
+_pack = None
+
+
+def get():
+    """The shared asset pack, opened on first use; None if there is none."""
+    global _pack
+    if _pack is None:
+        try:
+            if BUILD_ON_START and platform.system() != "Emscripten":
+                build_assets.build()
+            _pack = AssetPack()
+        except (OSError, ValueError) as e:
+            log.warning("Asset pack unavailable (run python build_assets.py): %s", e)
+            _pack = _UNAVAILABLE
+    return None if _pack is _UNAVAILABLE else _pack
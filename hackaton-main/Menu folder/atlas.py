@@ -0,0 +1,35 @@
+import pygame
+import assetpack
+import debuglog
+
+log = debuglog.get_logger("atlas.py")
+
+_atlas = None
+_frames = {}
+
+
+def load():
+    """Load the atlas once from the asset pack written by build_assets.py."""
+    global _atlas
+    if _atlas is not None:
+        return _atlas
+    pack = assetpack.get()
+    if pack is None:
+        raise FileNotFoundError("no asset pack to load the atlas from")
+    manifest = pack.load_json("atlas.json")
+    image = pack.load_image("atlas.png")
+    if pygame.display.get_surface() is not None:
+        image = image.convert_alpha()
+    _atlas = (image, manifest["frames"])
+    return _atlas
+
+
+def frames(name):
+    """(facing right, facing left) surfaces for an atlas frame; no scaling or flipping at runtime."""
+    pair = _frames.get(name)
+    if pair is None:
+        image, manifest_frames = load()
+        entry = manifest_frames[name]
+        pair = (image.subsurface(entry["rect"]), image.subsurface(entry["flipped"]))
+        _frames[name] = pair
+    return pair
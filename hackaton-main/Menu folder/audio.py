@@ -0,0 +1,190 @@
+import os
+import time
+import numpy as np
+import pygame
+import assetpack
+import debuglog
+
+log = debuglog.get_logger("audio.py")
+
+MUSIC_NAME = "menu_music"  # Asset pack entry
+MUSIC_FILE = "menu.mp3"  # Loose file used when the pack has no music
+MUSIC_VOLUME = 0.4  # Initial music volume (the settings slider starts at 40)
+SFX_CHANNELS = 8  # Fixed pool of mixer channels shared by every sound effect
+# Sound effect -> (most voices playing it at once, priority: a full pool steals from lower or equal)
+SFX = {
+    "hurt": (2, 3),  # Enemy hit the player
+    "block": (2, 2),  # Enemy attack blocked
+    "hit": (3, 1),  # Player attack landed
+    "dodge": (1, 0),
+}
+
+
+def init():
+    """Open the audio device on first use; returns False when there is none.
+
+    Opening the device can take a noticeable time, so it is not done at startup.
+    """
+    if pygame.mixer.get_init():
+        return True
+    try:
+        pygame.mixer.init()
+    except pygame.error as e:
+        log.warning("Audio unavailable: %s", e)
+        return False
+    return True
+
+
+def set_music_volume(volume):
+    """Set the music volume (0.0 to 1.0) if audio is running."""
+    if pygame.mixer.get_init():
+        pygame.mixer.music.set_volume(volume)
+
+
+def play_music(volume=MUSIC_VOLUME):
+    """Start the menu music on loop, continuing without it if it cannot be loaded."""
+    if not init():
+        return
+    pack = assetpack.get()
+    if pack is not None and MUSIC_NAME in pack:
+        source, name = pack.open(MUSIC_NAME), f"{MUSIC_NAME} in {pack.path}"
+    elif os.path.exists(MUSIC_FILE):
+        source, name = MUSIC_FILE, MUSIC_FILE
+    else:
+        log.info("Music file '%s' not found in '%s'. Continuing without music.", MUSIC_FILE, os.getcwd())
+        return
+    try:
+        pygame.mixer.music.load(source)
+        pygame.mixer.music.play(-1)  # Play music on loop
+        pygame.mixer.music.set_volume(volume)
+    except pygame.error as e:
+        log.warning("Failed to load music '%s': %s", name, e)
+        # Continue without music
+
+
+# Sound effects. The whole bank is decoded by load_sfx() before play starts, so
+# combat never loads a sound. play_sfx() only counts a request; flush_sfx(), once
+# per frame, starts at most one voice per effect however many were requested.
+
+_bank = {}  # Effect name -> pygame.mixer.Sound
+_channels = []
+_voices = []  # Per channel: (name, priority, start time) of the last effect started on it
+_requests = {}  # Effect name -> requests since the last flush
+_sfx_volume = 0.0
+
+
+def _envelope(t, attack, decay):
+    return np.minimum(t / attack, 1.0) * np.exp(-t / decay)
+
+
+def synthesize(name, frequency):
+    """Built-in waveform for an effect as floats in -1..1 (used when the pack has no recording)."""
+    rng = np.random.default_rng(len(name))
+    if name == "hit":
+        t = np.arange(int(0.09 * frequency)) / frequency
+        wave = 0.6 * rng.uniform(-1, 1, len(t)) * _envelope(t, 0.002, 0.015)
+        wave += 0.8 * np.sin(2 * np.pi * 90 * t) * _envelope(t, 0.003, 0.04)
+    elif name == "hurt":
+        t = np.arange(int(0.16 * frequency)) / frequency
+        pitch = 2 * np.pi * np.cumsum(np.linspace(320, 140, len(t))) / frequency
+        wave = 0.5 * np.sign(np.sin(pitch)) * _envelope(t, 0.005, 0.06)
+    elif name == "block":
+        t = np.arange(int(0.22 * frequency)) / frequency
+        wave = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((1230, 1870, 2630)))
+        wave = 0.5 * wave * _envelope(t, 0.001, 0.05)
+    elif name == "dodge":
+        t = np.arange(int(0.18 * frequency)) / frequency
+        noise = np.convolve(rng.uniform(-1, 1, len(t)), np.ones(12) / 12, mode="same")  # Soft, low-passed
+        wave = 1.5 * noise * np.sin(np.pi * t / t[-1])
+    else:
+        raise KeyError(name)
+    return np.clip(wave, -1.0, 1.0)
+
+
+def _make_sound(wave):
+    """Float samples -> a Sound in the mixer's own format, so playing it never converts."""
+    frequency, size, channels = pygame.mixer.get_init()
+    bits = abs(size)
+    if size < 0:
+        samples = (wave * (2 ** (bits - 1) - 1)).astype(np.int16 if bits == 16 else np.int8 if bits == 8 else np.int32)
+    else:
+        samples = ((wave + 1) * (2 ** (bits - 1) - 1)).astype(np.uint16 if bits == 16 else np.uint8)
+    if channels > 1:
+        samples = np.repeat(samples[:, None], channels, axis=1)
+    return pygame.sndarray.make_sound(np.ascontiguousarray(samples))
+
+
+def load_sfx():
+    """Decode every sound effect and set up the channel pool; safe to call more than once."""
+    if _bank or not init():
+        return
+    pack = assetpack.get()
+    frequency = pygame.mixer.get_init()[0]
+    for name in SFX:
+        entry = f"sfx_{name}"
+        try:
+            if pack is not None and entry in pack:
+                _bank[name] = pygame.mixer.Sound(file=pack.open(entry))
+            else:
+                _bank[name] = _make_sound(synthesize(name, frequency))
+        except (pygame.error, ValueError) as e:
+            log.warning("Failed to load sound effect '%s': %s", name, e)
+    pygame.mixer.set_num_channels(SFX_CHANNELS)
+    _channels[:] = [pygame.mixer.Channel(i) for i in range(SFX_CHANNELS)]
+    _voices[:] = [None] * SFX_CHANNELS
+    log.info("Loaded %d sound effects, %d channels", len(_bank), SFX_CHANNELS)
+
+
+def set_sfx_volume(volume):
+    """Set the effects volume (0.0 to 1.0), including effects already playing."""
+    global _sfx_volume
+    _sfx_volume = volume
+    for channel in _channels:
+        channel.set_volume(volume)
+
+
+def play_sfx(name):
+    """Request an effect this frame. Cheap enough to call from the simulation on every hit."""
+    _requests[name] = _requests.get(name, 0) + 1
+
+
+def _pick_channel(name, priority, limit):
+    """Channel to start an effect on: a free one, or the voice to steal; None drops the effect."""
+    free = oldest_same = oldest_lower = None
+    playing = 0
+    for i, channel in enumerate(_channels):
+        voice = _voices[i]
+        if voice is None or not channel.get_busy():
+            if free is None:
+                free = i
+        elif voice[0] == name:
+            playing += 1
+            if oldest_same is None or voice[2] < _voices[oldest_same][2]:
+                oldest_same = i
+        elif voice[1] <= priority and (oldest_lower is None or voice[2] < _voices[oldest_lower][2]):
+            oldest_lower = i
+    if playing >= limit:
+        return oldest_same  # At its own limit: restart its oldest voice
+    return free if free is not None else oldest_lower
+
+
+def flush_sfx():
+    """Start this frame's requested effects: at most one voice each, highest priority first."""
+    if not _requests:
+        return
+    requests = sorted(_requests, key=lambda name: -SFX.get(name, (0, 0))[1])
+    _requests.clear()
+    if not _bank or _sfx_volume <= 0:
+        return
+    now = time.perf_counter()
+    for name in requests:
+        sound = _bank.get(name)
+        if sound is None:
+            continue
+        limit, priority = SFX[name]
+        i = _pick_channel(name, priority, limit)
+        if i is None:
+            continue
+        _channels[i].play(sound)
+        _channels[i].set_volume(_sfx_volume)
+        _voices[i] = (name, priority, now)
@@ -0,0 +1,219 @@
+"""Run many headless exploration and fighting episodes across a process pool.
+
+Usage:
+    python batch.py [--episodes N] [--modes harta,lupta] [--policy chase|random|scripted]
+                    [--enemies N] [--max-ticks N] [--workers N] [--output results.bin]
+                    [--scaling]
+
+Every episode runs the same Simulation the play loops use, with rendering, sound
+and particles left out and the input coming from a policy. Workers send each
+episode's result back as one fixed-size RECORD as soon as it finishes; the
+records are appended to --output and summarised at the end. --scaling runs the
+batch with 1, 2, 4, ... workers up to --workers and reports the speed-up; the
+times include starting the workers, so give it enough episodes to amortise that.
+"""
+import argparse
+import multiprocessing
+import os
+import struct
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ["SDL_NO_SIGNAL_HANDLERS"] = "1"  # Leave SIGTERM alone so the pool can stop its workers
+# Workers must not print while importing: with stdout closed (batch.py | head) they
+# would die before starting and the pool would keep replacing them
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+
+import numpy as np
+import pygame
+import bench
+import debuglog
+import engine
+from player import Player
+
+MODES = ("harta", "lupta")
+POLICIES = ("chase", "random", "scripted")
+OUTCOMES = ("timeout", "died", "cleared", "left")  # left: the mode ended for another reason
+# episode, mode, outcome, ticks survived, damage dealt, damage taken, enemies killed, enemies
+RECORD = struct.Struct("<IBBIffII")
+CHUNK_SIZE = 8  # Episodes handed to a worker at a time
+
+_modes = None
+
+
+def _init_worker():
+    """Load the game modules once per worker process."""
+    global _modes
+    debuglog.configure("*=warning")
+    import harta
+    import lupta
+    _modes = {"harta": harta, "lupta": lupta}
+
+
+def chase_policy(sim, rng):
+    """Walk toward the nearest enemy, attack it in range, block when one is winding up, dodge now and then."""
+    player = sim.player
+    enemies = sim.enemies
+    px, py = player.rect.center
+    half = enemies.size / 2
+    n = enemies.count
+    while True:
+        alive = np.flatnonzero(enemies.alive[:n])
+        keys = set()
+        attack = block = False
+        key_downs = []
+        if len(alive):
+            dx = enemies.x[alive] + half - px
+            dy = enemies.y[alive] + half - py
+            nearest = int(np.argmin(dx * dx + dy * dy))
+            dx, dy = float(dx[nearest]), float(dy[nearest])
+            if abs(dx) > 40:
+                keys.add(pygame.K_d if dx > 0 else pygame.K_a)
+            if abs(dy) > 40:
+                keys.add(pygame.K_s if dy > 0 else pygame.K_w)
+            attack = dx * dx + dy * dy <= 100 * 100
+            block = not attack and enemies.any_attacking()
+            if rng.random() < 0.01:
+                key_downs.append(pygame.K_SPACE)
+        yield engine.TickInput(engine.KeyState(keys), (attack, False, block), key_downs)
+        px, py = player.rect.center
+
+
+def random_policy(sim, rng):
+    """Hold a random direction and buttons, changing every half second or so."""
+    directions = (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d)
+    while True:
+        keys = engine.KeyState(key for key in directions if rng.random() < 0.3)
+        mouse_buttons = (rng.random() < 0.5, False, rng.random() < 0.2)
+        for tick in range(int(rng.integers(15, 45))):
+            yield engine.TickInput(keys, mouse_buttons, [pygame.K_SPACE] if tick == 0 and rng.random() < 0.2 else [])
+
+
+def scripted_policy(sim, rng):
+    """bench.py's fixed input pattern; episodes differ only in where the extra enemies spawn."""
+    tick = 0
+    while True:
+        yield engine.TickInput(*bench.scripted_input(tick))
+        tick += 1
+
+
+POLICY_FUNCTIONS = {"chase": chase_policy, "random": random_policy, "scripted": scripted_policy}
+
+
+def run_episode(task):
+    """Run one episode in a worker; returns its RECORD bytes."""
+    episode, mode_name, policy, enemy_count, max_ticks, seed = task
+    player = Player()
+    sim = engine.Simulation(_modes[mode_name].RULES, player)
+    extra = enemy_count - sim.enemies.count
+    if extra > 0:
+        sim.spawn_horde(extra, seed)
+    enemies = sim.enemies
+    count = enemies.count
+    start_health = float(player.health)
+    rng = np.random.default_rng(seed)
+
+    outcome = "timeout"
+    ticks = 0
+    for tick_input in POLICY_FUNCTIONS[policy](sim, rng):
+        if ticks >= max_ticks:
+            break
+        result = sim.step(tick_input)
+        ticks += 1
+        if player.health <= 0:
+            outcome = "died"
+            break
+        if enemies.alive_count() == 0:
+            outcome = "cleared"
+            break
+        if result is not None:
+            outcome = "left"
+            break
+
+    dealt = float((enemies.max_health[:count] - enemies.health[:count]).sum())
+    taken = start_health - max(0.0, float(player.health))
+    killed = count - enemies.alive_count()
+    return RECORD.pack(episode, MODES.index(mode_name), OUTCOMES.index(outcome), ticks, dealt, taken, killed, count)
+
+
+def read_records(path):
+    """Yield (episode, mode, outcome, ticks, dealt, taken, killed, enemies) from a results file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    for values in RECORD.iter_unpack(data):
+        yield (values[0], MODES[values[1]], OUTCOMES[values[2]]) + values[3:]
+
+
+def tasks(args):
+    modes = args.modes.split(",")
+    for episode in range(args.episodes):
+        yield episode, modes[episode % len(modes)], args.policy, args.enemies, args.max_ticks, args.seed + episode
+
+
+def run_batch(args, workers, out=None):
+    """Run every episode on a pool of workers; returns (records, seconds)."""
+    records = []
+    start = time.perf_counter()
+    # Spawned rather than forked: the parent may already run debuglog's flush thread, and
+    # forking a threaded process can copy a lock in its held state
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers, initializer=_init_worker) as pool:
+        for record in pool.imap_unordered(run_episode, tasks(args), CHUNK_SIZE):
+            records.append(record)
+            if out is not None:
+                out.write(record)
+    return records, time.perf_counter() - start
+
+
+def summarise(records, seconds, workers):
+    rows = [RECORD.unpack(record) for record in records]
+    total_ticks = sum(row[3] for row in rows)
+    print(f"batch.py: {len(rows)} episodes on {workers} workers in {seconds:.2f} s: "
+          f"{len(rows) / seconds:.1f} episodes/s, {total_ticks / seconds:.0f} ticks/s")
+    for mode_index, mode in enumerate(MODES):
+        mode_rows = [row for row in rows if row[1] == mode_index]
+        if not mode_rows:
+            continue
+        outcomes = {name: sum(1 for row in mode_rows if row[2] == i) for i, name in enumerate(OUTCOMES)}
+        print(f"batch.py: {mode}: " + ", ".join(f"{name} {count}" for name, count in outcomes.items() if count)
+              + f" | mean ticks {np.mean([row[3] for row in mode_rows]):.0f}"
+              + f", dealt {np.mean([row[4] for row in mode_rows]):.0f}"
+              + f", taken {np.mean([row[5] for row in mode_rows]):.0f}"
+              + f", killed {np.mean([row[6] for row in mode_rows]):.1f}/{np.mean([row[7] for row in mode_rows]):.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=200)
+    parser.add_argument("--modes", default="harta,lupta")
+    parser.add_argument("--policy", choices=POLICIES, default="chase")
+    parser.add_argument("--enemies", type=int, default=0, help="total enemies; at least the mode's own spawns")
+    parser.add_argument("--max-ticks", type=int, default=60 * engine.TICK_RATE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", default="batch_results.bin")
+    parser.add_argument("--scaling", action="store_true", help="also run with fewer workers and report the speed-up")
+    args = parser.parse_args(argv)
+
+    if args.scaling:
+        counts = sorted({1 << i for i in range(args.workers.bit_length()) if 1 << i <= args.workers} | {args.workers})
+        base = None
+        for workers in counts:
+            records, seconds = run_batch(args, workers)
+            rate = len(records) / seconds
+            base = base or rate
+            print(f"batch.py: {workers:>3} workers {rate:8.1f} episodes/s  speed-up {rate / base:5.2f}x"
+                  f"  efficiency {rate / base / workers:.0%}")
+        return 0
+
+    with open(args.output, "wb") as out:
+        records, seconds = run_batch(args, args.workers, out)
+    summarise(records, seconds, args.workers)
+    print(f"batch.py: {len(records)} records ({RECORD.size} bytes each) written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
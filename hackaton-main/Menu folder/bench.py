@@ -0,0 +1,167 @@
+"""Headless benchmark for the exploration (harta) and fighting (lupta) loops.
+
+Usage:
+    python bench.py [--frames N] [--enemies 1,100,10000] [--modes harta,lupta]
+                    [--render-scale 1.0] [--output bench_results.json]
+                    [--baseline FILE] [--threshold 0.15]
+
+Runs under SDL's dummy video driver with scripted input, one simulation tick per
+frame and no frame cap. For every mode and enemy count it reports FPS, p50/p99
+frame time and the time spent in events, simulation, rendering and flip, and
+writes the results as JSON. With --baseline, scenarios whose p50 or p99 frame
+time grew by more than the threshold are flagged and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+import debuglog
+import engine
+import scenes
+from player import Player
+
+WARMUP_FRAMES = 60
+DIRECTIONS = (pygame.K_d, pygame.K_s, pygame.K_a, pygame.K_w)
+HEALTH = 10 ** 6  # Nobody dies during a benchmark run
+
+
+def scripted_input(frame):
+    """Deterministic input for a frame: (held keys, mouse buttons, KEYDOWN keys)."""
+    keys = engine.KeyState({DIRECTIONS[(frame // 60) % len(DIRECTIONS)]})
+    attacking = (frame // 30) % 2 == 0
+    blocking = frame % 240 >= 200
+    key_downs = [pygame.K_SPACE] if frame % 90 == 0 else []
+    return keys, (attacking, False, blocking), key_downs
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_scenario(screen, mode, player_class, enemy_count, frames, render_scale=1.0):
+    player = player_class()
+    player.health = player.max_health = HEALTH
+    session = mode.new_session(player)
+    session.render_scale = render_scale
+    sim = session.sim
+    extra = enemy_count - sim.enemies.count
+    if extra > 0:
+        sim.spawn_horde(extra)
+    count = sim.enemies.count
+    sim.enemies.health[:count] = HEALTH
+    sim.enemies.max_health[:count] = HEALTH
+
+    dt = session.timestep.dt
+    frame_times = []
+    phases = {"events": 0.0, "sim": 0.0, "render": 0.0, "flip": 0.0}
+    for frame in range(WARMUP_FRAMES + frames):
+        keys, mouse_buttons, key_downs = scripted_input(frame)
+        for key in key_downs:
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key))
+        start = time.perf_counter()
+        result = session.frame(screen, None, keys, mouse_buttons, elapsed=dt)
+        flip_start = time.perf_counter()
+        pygame.display.flip()
+        end = time.perf_counter()
+        if result is not None:
+            raise RuntimeError(f"{mode.__name__} ended early with {result!r} at frame {frame}")
+        if frame >= WARMUP_FRAMES:
+            frame_times.append(end - start)
+            for name in ("events", "sim", "render"):
+                phases[name] += session.timings[name]
+            phases["flip"] += end - flip_start
+
+    frame_times.sort()
+    total = sum(frame_times)
+    return {
+        "mode": mode.__name__,
+        "enemies": count,
+        "frames": frames,
+        "fps": round(frames / total, 1),
+        "frame_ms_p50": round(percentile(frame_times, 0.50) * 1e3, 3),
+        "frame_ms_p99": round(percentile(frame_times, 0.99) * 1e3, 3),
+        "phase_ms": {name: round(value / frames * 1e3, 3) for name, value in phases.items()},
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return descriptions of scenarios that got slower than the baseline."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        for metric in ("frame_ms_p50", "frame_ms_p99"):
+            if current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(f"{name} {metric}: {previous[metric]} -> {current[metric]} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--enemies", default="1,100,10000")
+    parser.add_argument("--modes", default="harta,lupta")
+    parser.add_argument("--render-scale", type=engine.parse_render_scale, default=1.0)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    debuglog.configure("*=warning")
+    pygame.init()
+    screen = scenes.open_window((engine.WIDTH, engine.HEIGHT), "uncapped")  # The same SCALED window as the game
+    import harta
+    import lupta
+    modes = {"harta": harta, "lupta": lupta}
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+            "render_scale": args.render_scale,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": {},
+    }
+    print(f"{'scenario':<16}{'fps':>9}{'p50 ms':>9}{'p99 ms':>9}{'events':>9}{'sim':>9}{'render':>9}{'flip':>9}")
+    for mode_name in args.modes.split(","):
+        for enemy_count in (int(n) for n in args.enemies.split(",")):
+            result = run_scenario(screen, modes[mode_name], Player, enemy_count, args.frames,
+                                  args.render_scale)
+            name = f"{mode_name}-{enemy_count}"
+            results["scenarios"][name] = result
+            phase = result["phase_ms"]
+            print(f"{name:<16}{result['fps']:>9}{result['frame_ms_p50']:>9}{result['frame_ms_p99']:>9}"
+                  f"{phase['events']:>9}{phase['sim']:>9}{phase['render']:>9}{phase['flip']:>9}")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=1)
+    print(f"bench.py: Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"bench.py: REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"bench.py: No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Benchmark the particle pool against one Python object per particle.
+
+Usage: python bench_particles.py [particle counts...]
+
+For each count, keeps that many particles alive on screen (re-emitting what
+expires) and times one frame's update and draw both ways: the ParticlePool's
+batched arrays with a single Surface.blits call, and a list of per-particle
+objects each updated and blitted on its own. Runs under SDL's dummy video driver.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import particles
+
+FRAMES = 60
+WIDTH, HEIGHT = 800, 600
+
+
+class ObjectParticle:
+    """The straightforward alternative: one object per particle."""
+
+    def __init__(self, x, y, vx, vy, life, sprite):
+        self.x, self.y, self.vx, self.vy = x, y, vx, vy
+        self.life = self.max_life = life
+        self.sprite = sprite  # Index of the first fade step, as in the pool
+
+    def draw(self, surface, sprites, width, height):
+        # Same culling and fade-sprite choice as ParticlePool.draw
+        x = self.x - particles.SPRITE_SIZE // 2
+        y = self.y - particles.SPRITE_SIZE // 2
+        if -particles.SPRITE_SIZE < x < width and -particles.SPRITE_SIZE < y < height:
+            fade = min(int((1 - self.life / self.max_life) * particles.FADE_STEPS), particles.FADE_STEPS - 1)
+            surface.blit(sprites[self.sprite + fade], (int(x), int(y)))
+
+    def update(self):
+        self.vy += 0.15
+        self.x += self.vx
+        self.y += self.vy
+        self.vx *= particles.DRAG
+        self.vy *= particles.DRAG
+        self.life -= 1
+
+
+def refill(pool, count):
+    while pool.count < count:
+        pool.emit("hit", WIDTH / 2, HEIGHT / 2, count - pool.count, spread=300)
+
+
+def run(screen, count):
+    pool = particles.ParticlePool(capacity=max(count, 1))
+    refill(pool, count)
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        pool.update(1)
+        refill(pool, count)
+    t_update = (time.perf_counter() - start) / FRAMES
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        pool.draw(screen, 0, 0)
+    t_draw = (time.perf_counter() - start) / FRAMES
+
+    # Same particles as objects
+    sprites = pool.sprites
+    objects = [ObjectParticle(float(pool.x[i]), float(pool.y[i]), float(pool.vx[i]), float(pool.vy[i]),
+                              float(pool.life[i]), int(pool.sprite[i])) for i in range(pool.count)]
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        for p in objects:
+            p.update()
+        live = [p for p in objects if p.life > 0]
+        for p in objects:
+            if p.life <= 0:
+                live.append(ObjectParticle(WIDTH / 2, HEIGHT / 2, p.vx, -p.vy, p.max_life, p.sprite))
+        objects = live
+    t_objects_update = (time.perf_counter() - start) / FRAMES
+    start = time.perf_counter()
+    width, height = screen.get_size()
+    for _ in range(FRAMES):
+        for p in objects:
+            p.draw(screen, sprites, width, height)
+    t_objects_draw = (time.perf_counter() - start) / FRAMES
+
+    total = t_update + t_draw
+    print(f"{count:>7} particles | pool update {t_update * 1e3:6.2f} ms + draw {t_draw * 1e3:6.2f} ms = {total * 1e3:6.2f} ms"
+          f" ({1 / total:6.0f} fps) | objects update {t_objects_update * 1e3:7.2f} ms + draw {t_objects_draw * 1e3:6.2f} ms")
+
+
+if __name__ == "__main__":
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 30000]
+    for count in counts:
+        run(screen, count)
@@ -0,0 +1,84 @@
+"""Benchmark the shared flow field against per-enemy A*.
+
+Usage: python bench_path.py [enemy counts...]
+
+Enemies are scattered over a map with 20% of its grid cells blocked. For each
+count it times what has to happen each time the player changes cell: one flow
+field rebuild plus a waypoint lookup for every enemy, against one A* search
+per enemy. It also checks that both give the same path costs. Large A* runs
+are timed on a sample of enemies and scaled up. Each count is run on the
+1600x1200 map and on a map 10x larger per side, where the flow field only
+covers FLOW_RADIUS cells around the player.
+"""
+import math
+import sys
+import time
+import numpy as np
+import horde
+import navigation
+import world
+
+OBSTACLES = 0.2
+ASTAR_SAMPLE = 200  # At most this many A* searches are timed per run
+
+
+def path_cost(path):
+    return sum(math.hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(path, path[1:]))
+
+
+def run(count, width, height, seed=0):
+    game_world = world.World(width, height)
+    player = (width // 2 + 50, height // 2 + 50)
+    game_world.scatter_obstacles(OBSTACLES, seed, keep_clear=[player])
+    goal = (player[0] // world.GRID_SPACING, player[1] // world.GRID_SPACING)
+
+    # Enemies only in open cells close enough to be inside the flow window
+    rng = np.random.default_rng(seed)
+    radius = navigation.FLOW_RADIUS * world.GRID_SPACING
+    store = horde.EnemyStore(game_world=game_world)
+    xs, ys = [], []
+    while len(xs) < count:
+        x = rng.uniform(max(0, player[0] - radius), min(width, player[0] + radius) - store.size)
+        y = rng.uniform(max(0, player[1] - radius), min(height, player[1] + radius) - store.size)
+        cell = (int((x + store.size / 2) // world.GRID_SPACING), int((y + store.size / 2) // world.GRID_SPACING))
+        if not game_world.is_blocked(*cell):
+            xs.append(x)
+            ys.append(y)
+    store.spawn_many(np.array(xs), np.array(ys))
+    cells = list(zip(store.cell_x[:count].tolist(), store.cell_y[:count].tolist()))
+
+    flow = navigation.FlowField(game_world)
+    start = time.perf_counter()
+    for _ in range(5):
+        flow.cell = None
+        flow.update(*player)
+    t_build = (time.perf_counter() - start) / 5
+    start = time.perf_counter()
+    for _ in range(20):
+        flow.targets(store.cell_x[:count], store.cell_y[:count], *player)
+    t_lookup = (time.perf_counter() - start) / 20
+
+    sample = cells[:ASTAR_SAMPLE]
+    start = time.perf_counter()
+    paths = [navigation.astar(game_world, cell, goal, navigation.FLOW_RADIUS) for cell in sample]
+    t_astar = (time.perf_counter() - start) / len(sample) * count
+
+    # Both searches are optimal, so every reachable enemy must see the same path cost
+    left, top = flow.origin
+    for cell, path in zip(sample, paths):
+        cost = flow.cost[cell[1] - top, cell[0] - left]
+        if path is None:
+            assert math.isinf(cost), f"A* found no path from {cell} but the flow field did"
+        else:
+            assert abs(path_cost(path) - cost) < 1e-6, f"path costs differ from {cell}"
+
+    flow_total = t_build + t_lookup
+    print(f"{width}x{height} {count:>6} enemies | flow field rebuild {t_build * 1e3:7.2f} ms + lookups {t_lookup * 1e3:6.3f} ms"
+          f" = {flow_total * 1e3:7.2f} ms | per-enemy A* {t_astar * 1e3:9.1f} ms | {t_astar / flow_total:7.1f}x")
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 10000]
+    for scale in (1, 10):
+        for count in counts:
+            run(count, world.MAP_WIDTH * scale, world.MAP_HEIGHT * scale)
@@ -0,0 +1,74 @@
+"""Benchmark the spatial hash against brute-force range checks.
+
+Usage: python bench_spatial.py [entity counts...]
+
+For each entity count, runs the same attack-range queries three ways (pure
+Python pairwise distances, EnemyStore's NumPy scan of every entity, and its
+spatial hash) plus one tick of movement with each, and checks all three agree.
+Each count is run on the current 1600x1200 map and on maps 10x and 15x larger per
+side: the hash's cost follows local density while a full scan follows total
+count. EnemyStore picks the hash from the world's size (horde.SPATIAL_HASH_MIN_CELLS).
+"""
+import math
+import sys
+import time
+import numpy as np
+import horde
+import world
+
+QUERIES = 200
+RADIUS = horde.ATTACK_RANGE
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def run(count, width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    game_world = world.World(width, height)
+    store = horde.EnemyStore(game_world=game_world, spatial_hash=True)
+    store.spawn_many(rng.uniform(0, width - store.size, count), rng.uniform(0, height - store.size, count))
+    scan_store = horde.EnemyStore(game_world=game_world, spatial_hash=False)
+    scan_store.spawn_many(store.x[:count], store.y[:count])
+    points = rng.uniform(0, [width, height], (QUERIES, 2)).tolist()
+    half = store.size / 2
+    centers = list(zip((store.x[:count] + half).tolist(), (store.y[:count] + half).tolist()))
+
+    def python_pairwise():
+        return [sorted(i for i, (x, y) in enumerate(centers) if math.sqrt((x - px) ** 2 + (y - py) ** 2) <= RADIUS)
+                for px, py in points]
+
+    def numpy_scan():
+        return [sorted(scan_store.near(px, py, RADIUS).tolist()) for px, py in points]
+
+    def spatial_hash():
+        return [sorted(store.near(px, py, RADIUS).tolist()) for px, py in points]
+
+    def scan_move():
+        scan_store.move_towards(width / 2, height / 2)
+
+    def hash_move():
+        store.move_towards(width / 2, height / 2)
+
+    repeat = 1 if count >= 10000 else 5
+    t_python, r_python = timed(python_pairwise, repeat)
+    t_numpy, r_numpy = timed(numpy_scan, repeat)
+    t_hash, r_hash = timed(spatial_hash, repeat)
+    t_scan_move, _ = timed(scan_move, 10)
+    t_hash_move, _ = timed(hash_move, 10)
+    assert r_python == r_numpy == r_hash, "spatial hash disagrees with brute force"
+    per_query = 1e6 / QUERIES
+    print(f"{width}x{height} {count:>7} entities | python {t_python * per_query:9.1f} us/query | numpy scan {t_numpy * per_query:7.1f} us/query"
+          f" | hash {t_hash * per_query:6.1f} us/query | move {t_scan_move * 1e3:6.2f} ms/tick, with rehash {t_hash_move * 1e3:6.2f}"
+          f" | default {'hash' if horde.wants_spatial_hash(game_world) else 'scan'}")
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000, 50000]
+    for scale in (1, 10, 15):
+        for count in counts:
+            run(count, world.MAP_WIDTH * scale, world.MAP_HEIGHT * scale)
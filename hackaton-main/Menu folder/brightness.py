@@ -0,0 +1,73 @@
+import pygame
+import debuglog
+
+log = debuglog.get_logger("brightness.py")
+
+# Methods for darkening the frame:
+#   "overlay"  - cached black surface blitted with per-surface alpha (default)
+#   "multiply" - colour transform with fill(BLEND_RGB_MULT), no extra surface at all
+#                (slower than "overlay" on SIMD builds of SDL; kept for comparison)
+#   "gamma"    - display gamma ramp (a hardware lookup table), no per-frame cost;
+#                falls back to "overlay" when the display does not support it
+METHODS = ("overlay", "multiply", "gamma")
+
+
+class Brightness:
+    """Screen brightness pass that does no work at full brightness and caches its overlay."""
+
+    def __init__(self, method="overlay"):
+        self.method = method if method in METHODS else "overlay"
+        self._overlay = None
+        self._overlay_key = None  # (size, alpha) the cached overlay was built for
+        self._gamma_value = None  # Value currently loaded into the display gamma ramp
+
+    def set_method(self, method):
+        if method not in METHODS:
+            log.warning("Unknown brightness method: %s", method)
+            return
+        if self.method == "gamma" and method != "gamma":
+            self._set_gamma(100)
+        self.method = method
+
+    def _get_overlay(self, size, alpha):
+        key = (size, alpha)
+        if self._overlay_key != key:
+            overlay = pygame.Surface(size)
+            if pygame.display.get_surface() is not None:
+                overlay = overlay.convert()
+            overlay.fill((0, 0, 0))
+            overlay.set_alpha(alpha)  # Per-surface alpha: cheaper to blit than SRCALPHA
+            self._overlay = overlay
+            self._overlay_key = key
+        return self._overlay
+
+    def _set_gamma(self, value):
+        """Load a scaled ramp into the display's gamma table; returns False if unsupported."""
+        if self._gamma_value == value:
+            return True
+        scale = value / 100
+        ramp = [min(65535, int(i * 257 * scale)) for i in range(256)]
+        try:
+            supported = pygame.display.set_gamma_ramp(ramp, ramp, ramp)
+        except pygame.error:
+            supported = False
+        if supported:
+            self._gamma_value = value
+        return supported
+
+    def apply(self, surface, value):
+        """Darken surface (within its clip) for a brightness value from 0 to 100."""
+        value = int(value)
+        if self.method == "gamma":
+            if self._set_gamma(value):
+                return
+            log.info("Display gamma not supported, using overlay")
+            self.method = "overlay"
+        if value >= 100:
+            return
+        alpha = int(255 - (value * 2.55))
+        if self.method == "multiply":
+            factor = 255 - alpha
+            surface.fill((factor, factor, factor), special_flags=pygame.BLEND_RGB_MULT)
+        else:
+            surface.blit(self._get_overlay(surface.get_size(), alpha), (0, 0))
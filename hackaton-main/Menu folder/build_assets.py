@@ -0,0 +1,263 @@
+"""Pack the character sprites into one pre-scaled, pre-flipped atlas, and every
+runtime asset into one indexed archive.
+
+Usage: python build_assets.py [--force]
+
+Writes build/atlas.png and build/atlas.json, then build/assets.pak holding the
+atlas, the menu backgrounds (pre-scaled to the screen) and the music. Each output
+is only rebuilt when one of its sources changes (size or modification time) or
+its settings change. The web build ships build/assets.pak instead of the loose files.
+The game only opens the pack: run this after changing an asset, or start the game
+with GAME_BUILD_ASSETS=1 to have it rebuild a stale pack first. No pygame
+subsystem is started; loading, scaling and saving images need none.
+
+Pack layout (little endian):
+    header  magic b"HKPK", version, index length
+    index   UTF-8 JSON: {"sources": ..., "entries": {name: {"offset", "size", "format"}}}
+    data    each entry's bytes, starting on a PACK_ALIGN boundary
+"""
+import json
+import os
+import struct
+import sys
+from io import BytesIO
+import pygame
+import debuglog
+
+log = debuglog.get_logger("build_assets.py")
+
+BUILD_DIR = "build"
+ATLAS_IMAGE = os.path.join(BUILD_DIR, "atlas.png")
+ATLAS_MANIFEST = os.path.join(BUILD_DIR, "atlas.json")
+ATLAS_VERSION = 1
+ATLAS_WIDTH = 1024
+PADDING = 1
+SOURCE_DIRS = (".", "..")  # Menu folder first, then hackaton-main
+SPRITE_SIZE = (150, 150)  # player.PLAYER_SIZE
+PACK_PATH = os.path.join(BUILD_DIR, "assets.pak")
+PACK_MAGIC = b"HKPK"
+PACK_VERSION = 1
+PACK_HEADER = struct.Struct("<4sHI")
+PACK_ALIGN = 16
+SCREEN_SIZE = (800, 600)  # PythonApplication1.WIDTH, HEIGHT
+
+# Full-screen backgrounds, stored opaque and pre-scaled to SCREEN_SIZE
+SCREENS = {
+    "main": "main.png",
+    "settings": "settings.png",
+}
+# Sounds are packed as they are; missing ones are skipped
+SOUNDS = {
+    "menu_music": "menu.mp3",
+    # Recorded effects replace audio.py's synthesized ones when present
+    "sfx_hit": "hit.wav",
+    "sfx_hurt": "hurt.wav",
+    "sfx_block": "block.wav",
+    "sfx_dodge": "dodge.wav",
+}
+
+# Atlas frame name -> source file. Every frame is also stored mirrored horizontally.
+SPRITES = {
+    "diagonalstanga": "diagonalstanga.png",
+    "diagonalsabiedreapta": "diagonalsabiedreapta.png",
+    "diagonalsabiestanga1": "diagonalsabiestanga1.png",
+    "player_sprite": "player_sprite.png",
+    "stacuspatele": "stacuspatele.png",
+    "stacuspatelefarabackground": "stacuspatelefarabackground.png",
+    "stacuspateleindreapta": "stacuspateleindreapta.png",
+    "stacuspatelesiatat": "stacuspatelesiatat.png",
+    "stangamerge": "stangamerge.png",
+    "stangasta": "stangasta.png",
+}
+
+
+def find_source(filename):
+    for directory in SOURCE_DIRS:
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def source_stamps(sources=SPRITES):
+    """Size and mtime of every source file, used to decide whether to rebuild."""
+    stamps = {}
+    for name, filename in sources.items():
+        path = find_source(filename)
+        if path is not None:
+            stat = os.stat(path)
+            stamps[name] = [os.path.normpath(path), stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+
+def settings():
+    return {"version": ATLAS_VERSION, "width": ATLAS_WIDTH, "padding": PADDING, "sprite_size": list(SPRITE_SIZE)}
+
+
+def is_stale():
+    """True if the atlas is missing or was built from different sources or settings."""
+    if not (os.path.exists(ATLAS_IMAGE) and os.path.exists(ATLAS_MANIFEST)):
+        return True
+    try:
+        with open(ATLAS_MANIFEST) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return True
+    return manifest.get("settings") != settings() or manifest.get("sources") != source_stamps()
+
+
+def pack(sizes):
+    """Shelf-pack (w, h) sizes into rows of ATLAS_WIDTH; returns positions and total height."""
+    positions = []
+    x = y = row_height = 0
+    for w, h in sizes:
+        if x + w > ATLAS_WIDTH:
+            x = 0
+            y += row_height + PADDING
+            row_height = 0
+        positions.append((x, y))
+        x += w + PADDING
+        row_height = max(row_height, h)
+    return positions, y + row_height
+
+
+def build(force=False):
+    """Build the atlas and the asset pack if needed; returns True if either was (re)built."""
+    atlas_built = build_atlas(force)
+    return build_pack(force or atlas_built) or atlas_built
+
+
+def build_atlas(force=False):
+    """Build the atlas if needed; returns True if it was (re)built."""
+    if not force and not is_stale():
+        return False
+
+    frames = []  # (frame name, flipped, surface)
+    stamps = source_stamps()
+    for name, filename in SPRITES.items():
+        if name not in stamps:
+            log.warning("Missing source %s, skipped", filename)
+            continue
+        image = pygame.image.load(stamps[name][0])
+        image = pygame.transform.smoothscale(image, SPRITE_SIZE)
+        frames.append((name, False, image))
+        frames.append((name, True, pygame.transform.flip(image, True, False)))
+
+    positions, height = pack([surface.get_size() for _, _, surface in frames])
+    atlas = pygame.Surface((ATLAS_WIDTH, max(1, height)), pygame.SRCALPHA)
+    manifest_frames = {}
+    for (name, flipped, surface), (x, y) in zip(frames, positions):
+        atlas.blit(surface, (x, y), special_flags=pygame.BLEND_RGBA_MAX)  # Copy pixels, alpha included
+        entry = manifest_frames.setdefault(name, {})
+        entry["flipped" if flipped else "rect"] = [x, y, surface.get_width(), surface.get_height()]
+
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    # Write to temporary names and rename so a half-written atlas is never loaded
+    pygame.image.save(atlas, ATLAS_IMAGE + ".tmp.png")
+    os.replace(ATLAS_IMAGE + ".tmp.png", ATLAS_IMAGE)
+    with open(ATLAS_MANIFEST + ".tmp", "w") as f:
+        json.dump({"settings": settings(), "sources": stamps, "frames": manifest_frames}, f, indent=1)
+    os.replace(ATLAS_MANIFEST + ".tmp", ATLAS_MANIFEST)
+    log.info("Packed %d frames into %s (%dx%d)", len(frames), ATLAS_IMAGE, ATLAS_WIDTH, height)
+    return True
+
+
+def pack_sources():
+    stamps = {"screens": source_stamps(SCREENS), "sounds": source_stamps(SOUNDS)}
+    stamps["settings"] = {"version": PACK_VERSION, "align": PACK_ALIGN, "screen_size": list(SCREEN_SIZE)}
+    return stamps
+
+
+def is_pack_stale():
+    try:
+        with open(PACK_PATH, "rb") as f:
+            magic, version, index_size = PACK_HEADER.unpack(f.read(PACK_HEADER.size))
+            index = json.loads(f.read(index_size))
+    except (OSError, ValueError, struct.error):
+        return True
+    return magic != PACK_MAGIC or version != PACK_VERSION or index.get("sources") != pack_sources()
+
+
+def encode_screen(path):
+    """Load a background, drop its alpha and scale it to the screen; returns PNG bytes."""
+    image = pygame.image.load(path)
+    if image.get_size() == SCREEN_SIZE and image.get_bitsize() == 24:
+        # Already what the game needs: keep the original, usually better compressed, file
+        with open(path, "rb") as f:
+            return f.read()
+    if image.get_size() != SCREEN_SIZE:
+        image = pygame.transform.scale(image, SCREEN_SIZE)
+    opaque = pygame.image.frombytes(pygame.image.tobytes(image, "RGB"), SCREEN_SIZE, "RGB")
+    out = BytesIO()
+    pygame.image.save(opaque, out, "screen.png")
+    return out.getvalue()
+
+
+def layout_pack(entries, sources):
+    """The encoded index for (name, format, bytes) entries, with every entry's offset filled in.
+
+    The index holds absolute offsets, which depend on its own length, so it is laid
+    out again until the start of the data stops moving. Offsets only grow from one
+    pass to the next, so this settles after a few passes.
+    """
+    index = {"sources": sources, "entries": {}}
+    data_start = 0
+    while True:
+        offset = data_start
+        for name, fmt, data in entries:
+            offset += -offset % PACK_ALIGN
+            index["entries"][name] = {"offset": offset, "size": len(data), "format": fmt}
+            offset += len(data)
+        index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+        needed = PACK_HEADER.size + len(index_bytes)
+        needed += -needed % PACK_ALIGN
+        if needed == data_start:
+            return index_bytes, index["entries"]
+        data_start = needed
+
+
+def write_pack(path, entries, sources):
+    """Write a pack of (name, format, bytes) entries to path; returns its size."""
+    index_bytes, offsets = layout_pack(entries, sources)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(index_bytes)))
+        f.write(index_bytes)
+        for name, fmt, data in entries:
+            f.write(bytes(offsets[name]["offset"] - f.tell()))
+            f.write(data)
+        return f.tell()
+
+
+def build_pack(force=False):
+    """Write every runtime asset into PACK_PATH if needed; returns True if it was (re)built."""
+    if not force and not is_pack_stale():
+        return False
+
+    entries = []  # (name, format, bytes)
+    with open(ATLAS_IMAGE, "rb") as f:
+        entries.append(("atlas.png", "png", f.read()))
+    with open(ATLAS_MANIFEST, "rb") as f:
+        entries.append(("atlas.json", "json", f.read()))
+    sources = pack_sources()
+    for name, filename in SCREENS.items():
+        if name in sources["screens"]:
+            entries.append((name, "png", encode_screen(sources["screens"][name][0])))
+        else:
+            log.warning("Missing screen %s, skipped", filename)
+    for name, filename in SOUNDS.items():
+        if name in sources["sounds"]:
+            with open(sources["sounds"][name][0], "rb") as f:
+                entries.append((name, os.path.splitext(filename)[1][1:], f.read()))
+        else:
+            log.info("Missing sound %s, skipped", filename)
+
+    size = write_pack(PACK_PATH + ".tmp", entries, sources)
+    os.replace(PACK_PATH + ".tmp", PACK_PATH)
+    log.info("Packed %d assets into %s (%d bytes)", len(entries), PACK_PATH, size)
+    return True
+
+
+if __name__ == "__main__":
+    if not build(force="--force" in sys.argv[1:]):
+        log.info("Atlas and asset pack are up to date")
@@ -0,0 +1,188 @@
+import atexit
+import os
+import platform
+import sys
+import threading
+import time
+from collections import deque
+
+# Levels (same numbers as the standard logging module)
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+LEVEL_NAMES = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": OFF}
+
+BUFFER_SIZE = 4096  # Records kept in memory before the oldest are dropped
+FLUSH_INTERVAL = 0.25  # Seconds between background flushes
+
+# Per-module levels, e.g. GAME_LOG="harta.py=debug,lupta.py=warning,*=info"
+_default_level = INFO
+_levels = {}
+_loggers = {}
+
+# Ring buffer of (name, level, msg, args); formatting happens on the flush side
+_buffer = deque(maxlen=BUFFER_SIZE)
+_dropped = 0
+_lock = threading.Lock()
+_wake = threading.Event()
+_flusher = None
+_threads_available = platform.system() != "Emscripten"
+
+
+class Logger:
+    """Leveled logger for one module. Disabled calls return before any formatting."""
+
+    def __init__(self, name, level):
+        self.name = name
+        self.level = level
+        self._counts = {}
+        self._last = {}
+
+    def is_enabled(self, level):
+        return level >= self.level
+
+    def debug(self, msg, *args):
+        if DEBUG >= self.level:
+            _emit(self.name, DEBUG, msg, args)
+
+    def info(self, msg, *args):
+        if INFO >= self.level:
+            _emit(self.name, INFO, msg, args)
+
+    def warning(self, msg, *args):
+        if WARNING >= self.level:
+            _emit(self.name, WARNING, msg, args)
+
+    def error(self, msg, *args):
+        if ERROR >= self.level:
+            _emit(self.name, ERROR, msg, args)
+
+    def every(self, key, n, msg, *args, level=DEBUG):
+        """Sampled logging: emit only one out of every n calls made with this key."""
+        if level < self.level:
+            return
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        if count % n == 0:
+            _emit(self.name, level, msg, args)
+
+    def throttle(self, key, interval, msg, *args, level=DEBUG):
+        """Rate-limited logging: emit at most once per interval seconds for this key."""
+        if level < self.level:
+            return
+        now = time.perf_counter()
+        if now - self._last.get(key, -interval) >= interval:
+            self._last[key] = now
+            _emit(self.name, level, msg, args)
+
+
+def _emit(name, level, msg, args):
+    global _dropped
+    if len(_buffer) == BUFFER_SIZE:
+        _dropped += 1
+    _buffer.append((name, level, msg, args))
+    if not _threads_available:
+        # No background thread under Emscripten: the browser console is asynchronous anyway
+        flush()
+    elif _flusher is None:
+        _start_flusher()
+    elif level >= WARNING:
+        _wake.set()
+
+
+def _format(name, msg, args):
+    if args:
+        try:
+            msg = msg % args
+        except (TypeError, ValueError):
+            msg = f"{msg} {args}"
+    return f"{name}: {msg}"
+
+
+def flush():
+    """Write every buffered record to stdout."""
+    global _dropped
+    with _lock:
+        lines = []
+        while _buffer:
+            try:
+                name, level, msg, args = _buffer.popleft()
+            except IndexError:
+                break
+            lines.append(_format(name, msg, args))
+        if _dropped:
+            lines.append(f"debuglog.py: {_dropped} log records dropped (buffer full)")
+            _dropped = 0
+        if lines:
+            try:
+                sys.stdout.write("\n".join(lines) + "\n")
+                sys.stdout.flush()
+            except (OSError, ValueError):
+                pass
+
+
+def _flush_loop():
+    while True:
+        _wake.wait(FLUSH_INTERVAL)
+        _wake.clear()
+        flush()
+
+
+def _start_flusher():
+    global _flusher
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="debuglog-flush", daemon=True)
+            _flusher.start()
+
+
+def _parse_level(value):
+    value = value.strip().lower()
+    if value.isdigit():
+        return int(value)
+    return LEVEL_NAMES.get(value, INFO)
+
+
+def configure(spec=None):
+    """Apply a level spec such as "harta.py=debug,*=warning" (defaults to $GAME_LOG)."""
+    global _default_level
+    if spec is None:
+        spec = os.environ.get("GAME_LOG", "")
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        if "=" in part:
+            name, value = part.split("=", 1)
+            name = name.strip()
+            if name in ("*", ""):
+                _default_level = _parse_level(value)
+            else:
+                _levels[name] = _parse_level(value)
+        else:
+            _default_level = _parse_level(part)
+    for name, logger in _loggers.items():
+        logger.level = _levels.get(name, _default_level)
+
+
+def set_level(name, level):
+    """Change the level of one module at runtime."""
+    if isinstance(level, str):
+        level = _parse_level(level)
+    _levels[name] = level
+    if name in _loggers:
+        _loggers[name].level = level
+
+
+def get_logger(name):
+    """Return the shared logger for a module name like "harta.py"."""
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = Logger(name, _levels.get(name, _default_level))
+        _loggers[name] = logger
+    return logger
+
+
+configure()
+atexit.register(flush)
@@ -0,0 +1,479 @@
+import hashlib
+import os
+import time
+import numpy as np
+import pygame
+import audio
+import debuglog
+import fonts
+import profiler
+import horde
+import inputs
+import navigation
+import particles
+import textcache
+import world
+from inputs import KeyState, TickInput  # Re-exported: replay.py and bench.py build input with these
+
+log = debuglog.get_logger("engine.py")
+
+# Constants shared by exploration (harta) and fighting (lupta) modes
+WIDTH, HEIGHT = 800, 600
+GRID_SPACING = world.GRID_SPACING
+TICK_RATE = 60  # Simulation ticks per second; per-tick speeds and cooldowns are tuned for 60
+MAX_STEPS_PER_FRAME = 5  # Drop simulation time instead of spiralling when frames get very slow
+HEALTH_BAR_WIDTH = 50
+HEALTH_BAR_HEIGHT = 10
+HEALTH_BAR_COLOR = (0, 255, 0)
+HEALTH_BAR_BG_COLOR = (255, 0, 0)
+ENEMY_COLOR = (0, 0, 255)
+DODGE_DURATION = 18
+DODGE_DISTANCE = 100
+DODGE_COOLDOWN = 60
+DODGE_VECTORS = {'up': (0, -1), 'down': (0, 1), 'left': (-1, 0), 'right': (1, 0)}
+# Fraction of the WIDTH x HEIGHT resolution the world is drawn at (GAME_RENDER_SCALE, e.g. "0.75" or "75%").
+# Steps of 5% keep world chunks (world.CHUNK_SIZE) a whole number of pixels wide.
+MIN_RENDER_SCALE = 0.5
+RENDER_SCALE_STEP = 0.05
+INSTRUCTIONS = "WASD to move, Left Click to attack, Right Click to block, Space to dodge, F to switch, ESC to menu"
+
+
+class Rules:
+    """Per-mode settings that plug into the shared simulation and renderer."""
+
+    def __init__(self, name, enemy_spawns, player_size, enemy_size, esc_result, switch_result,
+                 enemy_defeated_result=None, quit_result=False, health_bar_offset=20, label="Mode Active"):
+        self.name = name  # Log prefix, e.g. "harta.py"
+        self.enemy_spawns = enemy_spawns  # Starting (x, y) of each enemy
+        self.player_size = player_size  # Size used for map clamping and the camera
+        self.enemy_size = enemy_size  # Drawn size of the enemy
+        self.esc_result = esc_result
+        self.switch_result = switch_result
+        self.enemy_defeated_result = enemy_defeated_result  # None keeps the mode running
+        self.quit_result = quit_result
+        self.health_bar_offset = health_bar_offset
+        self.label = label
+
+
+class Simulation:
+    """Gameplay state and rules for one mode, stepped one fixed tick at a time."""
+
+    def __init__(self, rules, player, game_world=None, enemies=None):
+        self.rules = rules
+        self.log = debuglog.get_logger(rules.name)
+        self.world = game_world or world.get_world()  # Bounds, camera limits and background
+        self.player = player
+        player.world = self.world
+        if enemies is None:
+            enemies = horde.EnemyStore(game_world=self.world)
+            for x, y in rules.enemy_spawns:
+                enemies.spawn(*self.world.open_position(x, y, enemies.size))
+        self.enemies = enemies  # May be shared with other players' simulations (see netplay.py)
+        self.enemy = horde.Enemy(self.enemies, 0)  # First enemy, for single-enemy callers
+        self.flow = navigation.FlowField(self.world)  # Shared path to the player around obstacles
+        self.particles = None  # particles.ParticlePool for hit effects, when something draws them
+        self.tick = 0
+
+        # Dodge state
+        self.is_dodging = False
+        self.dodge_timer = 0
+        self.dodge_direction = None
+        self.last_direction = 'right'
+        self.is_invincible = False
+        self.dodge_cooldown = 0
+
+        # Last tick's results, shown by the HUD
+        self.key_status = []
+        self.attack_active = False
+        self.block_active = False
+
+    def handle_key(self, key):
+        """Apply one KEYDOWN; returns a mode result or None."""
+        if key == pygame.K_ESCAPE:
+            self.log.info("ESC pressed, leaving mode")
+            return self.rules.esc_result
+        if key == pygame.K_f:
+            self.log.info("F pressed, switching mode")
+            return self.rules.switch_result
+        if key == pygame.K_SPACE and not self.is_dodging and self.dodge_cooldown <= 0:
+            self.is_dodging = True
+            self.dodge_timer = DODGE_DURATION
+            self.dodge_direction = self.last_direction
+            self.is_invincible = True
+            audio.play_sfx("dodge")
+            self.log.debug("Dodging %s, invincible: %s", self.dodge_direction, self.is_invincible)
+        return None
+
+    def step(self, tick_input):
+        """Advance the simulation by one tick; returns a mode result or None to keep running."""
+        player = self.player
+        enemies = self.enemies
+        self.tick += 1
+        result = self.step_player(tick_input)
+        if result is not None:
+            return result
+
+        # Update all enemies in batch
+        start = profiler.begin()
+        center_x, center_y = player.rect.center
+        if self.world.obstacles:
+            self.flow.update(center_x, center_y)
+            enemies.move_towards(center_x, center_y, flow=self.flow)
+        else:
+            enemies.move_towards(center_x, center_y)  # Open ground: the straight line is the shortest path
+        profiler.end("enemy_ai", start)
+        start = profiler.begin()
+        self.take_hits(enemies.attack(center_x, center_y, self.can_be_hurt()))
+        enemies.update()
+        self.step_combat(tick_input)
+        profiler.end("combat", start)
+
+        # Check game over
+        if player.health <= 0:
+            self.log.info("Player defeated!")
+            return "return_to_menu"
+        if self.rules.enemy_defeated_result is not None and enemies.alive_count() == 0:
+            self.log.info("Enemy defeated")
+            return self.rules.enemy_defeated_result
+        return None
+
+    def step_player(self, tick_input):
+        """The player's part of a tick before the enemies act: keys, movement and dodging."""
+        player = self.player
+        keys_pressed = tick_input.keys
+        for key in tick_input.key_downs:
+            result = self.handle_key(key)
+            if result is not None:
+                return result
+
+        # Update player movement
+        start = profiler.begin()
+        moved, self.key_status = player.handle_movement(keys_pressed)
+        if moved:
+            self.log.every("moved", 30, "Player moved to: (%d, %d)", player.rect.x, player.rect.y)
+            if keys_pressed[pygame.K_w]:
+                self.last_direction = 'up'
+            elif keys_pressed[pygame.K_s]:
+                self.last_direction = 'down'
+            elif keys_pressed[pygame.K_a]:
+                self.last_direction = 'left'
+            elif keys_pressed[pygame.K_d]:
+                self.last_direction = 'right'
+
+        # Handle dodge movement
+        if self.is_dodging:
+            self.dodge_timer -= 1
+            if self.dodge_timer > 0:
+                # Dust trail at the player's feet, blown back against the dodge
+                dx, dy = DODGE_VECTORS[self.dodge_direction]
+                self.emit("dodge", player.rect.centerx, player.rect.bottom, 3, spread=10, direction=(-dx, -dy))
+                step = DODGE_DISTANCE / DODGE_DURATION
+                if self.dodge_direction == 'up':
+                    player.rect.y -= step
+                elif self.dodge_direction == 'down':
+                    player.rect.y += step
+                elif self.dodge_direction == 'left':
+                    player.rect.x -= step
+                elif self.dodge_direction == 'right':
+                    player.rect.x += step
+            else:
+                self.is_dodging = False
+                self.is_invincible = False
+                self.dodge_cooldown = DODGE_COOLDOWN
+                self.log.debug("Dodge ended, cooldown: %d", self.dodge_cooldown)
+
+        if self.dodge_cooldown > 0:
+            self.dodge_cooldown -= 1
+
+        # Keep player within map boundaries
+        self.world.clamp_rect(player.rect, self.rules.player_size)
+
+        profiler.end("movement", start)
+        return None
+
+    def can_be_hurt(self):
+        return not self.player.is_blocking and not self.is_invincible
+
+    def take_hits(self, damage):
+        """Apply the damage of the enemies' last attack() on this player, with its sound and block sparks."""
+        player = self.player
+        enemies = self.enemies
+        horde.attack_sound(enemies, damage, player)
+        if not damage and enemies.attacks and player.is_blocking:
+            self.emit("block", player.rect.centerx, player.rect.centery, 8 * min(enemies.attacks, 4), spread=20)
+        if damage:
+            player.health -= damage
+            self.log.debug("Enemies hit player for %d, player health: %d", damage, player.health)
+
+    def step_combat(self, tick_input):
+        """The player's attack and block after the enemies acted."""
+        player = self.player
+        self.attack_active = player.attack(self.enemies, tick_input.mouse_buttons)
+        if self.attack_active:
+            self.emit("hit", player.rect.centerx, player.rect.centery, 40, spread=40)
+        self.block_active = player.block(tick_input.mouse_buttons)
+        player.update()
+
+    def emit(self, kind, x, y, count, **options):
+        """Particle effect at a world position (see ParticlePool.emit); nothing when not rendered."""
+        if self.particles is not None:
+            self.particles.emit(kind, x, y, count, **options)
+
+    def spawn_horde(self, count, seed=0):
+        """Add count enemies at random positions (for horde scenarios and benchmarks)."""
+        x, y = self.world.scatter_points(count, self.enemies.size, np.random.default_rng(seed))
+        self.enemies.spawn_many(x, y)
+
+    def state_hash(self):
+        """Digest of the gameplay state, for comparing replays across runs and builds."""
+        player = self.player
+        enemies = self.enemies
+        n = enemies.count
+        digest = hashlib.sha1()
+        digest.update(repr((self.tick, player.rect.x, player.rect.y, player.health, player.attack_cooldown,
+                            player.direction, self.is_dodging, self.dodge_timer, self.dodge_cooldown,
+                            self.last_direction)).encode())
+        for values in (enemies.x, enemies.y, enemies.health, enemies.cooldown, enemies.alive):
+            digest.update(values[:n].tobytes())
+        return digest.hexdigest()
+
+    def camera(self):
+        """Top-left corner of the view, clamped to the map."""
+        half = self.rules.player_size // 2
+        return self.world.camera(self.player.rect.x + half, self.player.rect.y + half, WIDTH, HEIGHT)
+
+
+class FixedTimestep:
+    """Accumulator that turns variable frame times into a whole number of fixed ticks."""
+
+    def __init__(self, tick_rate=TICK_RATE, max_steps=MAX_STEPS_PER_FRAME):
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, elapsed):
+        """Add elapsed seconds and return how many ticks to run now."""
+        self.accumulator += elapsed
+        steps = int(self.accumulator / self.dt)
+        if steps > self.max_steps:
+            log.throttle("behind", 1.0, "Simulation behind, dropping %d ticks", steps - self.max_steps)
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.dt
+        return steps
+
+    @property
+    def alpha(self):
+        """Fraction of a tick left in the accumulator, for interpolated rendering."""
+        return self.accumulator / self.dt
+
+
+def run_headless(sim, inputs, max_ticks=None):
+    """Step a simulation with no renderer as fast as possible.
+
+    inputs is an iterable of TickInput; returns (result, ticks_run).
+    """
+    ticks = 0
+    for tick_input in inputs:
+        result = sim.step(tick_input)
+        ticks += 1
+        if result is not None:
+            return result, ticks
+        if max_ticks is not None and ticks >= max_ticks:
+            break
+    return None, ticks
+
+
+def draw(screen, sim, font, debug_font, scale=1.0, canvas=None):
+    """Draw the world, entities and HUD for the current simulation state.
+
+    With a render scale below 1 the world and entities are drawn to canvas, a
+    surface scale times the screen's size, which is then upscaled onto the screen
+    in one pass; health bars and text are drawn on top at full resolution.
+    """
+    rules = sim.rules
+    player = sim.player
+    enemies = sim.enemies
+    camera_x, camera_y = sim.camera()
+    bar_y = rules.health_bar_offset
+    scaled = scale != 1.0
+    target = canvas if scaled else screen
+
+    # Draw map (only the chunks under the camera, streamed in as it moves)
+    start = profiler.begin()
+    sim.world.draw(target, camera_x, camera_y, scale)
+    profiler.end("world", start)
+    start = profiler.begin()
+
+    # Highlight player's current grid cell
+    grid_x = (player.rect.x // GRID_SPACING) * GRID_SPACING
+    grid_y = (player.rect.y // GRID_SPACING) * GRID_SPACING
+    pygame.draw.rect(target, (255, 255, 0), scale_rect((grid_x - camera_x, grid_y - camera_y, GRID_SPACING, GRID_SPACING), scale),
+                     max(1, round(2 * scale)))
+
+    # Draw player sprite
+    frame_index = int(player.frame) % player.frame_count
+    frame = player.frames[frame_index][0 if player.direction == "right" else 1]
+    if scaled:
+        frame = scaled_frame(frame, scale)
+    target.blit(frame, scale_point(player.rect.x - camera_x, player.rect.y - camera_y, scale))
+
+    # Draw enemies on screen, with their health bars
+    visible = enemies.visible(camera_x, camera_y, WIDTH, HEIGHT)
+    for i in visible:
+        x = int(enemies.x[i]) - camera_x
+        y = int(enemies.y[i]) - camera_y
+        pygame.draw.rect(target, ENEMY_COLOR, scale_rect((x, y, rules.enemy_size, rules.enemy_size), scale))
+        if not scaled:
+            draw_health_bar(screen, font, enemies.health[i], int(enemies.max_health[i]), x, y, bar_y)
+
+    if sim.particles is not None:
+        sim.particles.draw(target, camera_x, camera_y, scale)
+
+    if scaled:
+        # The one upscale per frame; the window's SCALED renderer takes it from there
+        pygame.transform.scale(canvas, screen.get_size(), screen)
+        for i in visible:
+            draw_health_bar(screen, font, enemies.health[i], int(enemies.max_health[i]),
+                            int(enemies.x[i]) - camera_x, int(enemies.y[i]) - camera_y, bar_y)
+
+    # Draw player health bar
+    draw_health_bar(screen, font, player.health, player.max_health, player.rect.x - camera_x, player.rect.y - camera_y, bar_y)
+
+    profiler.end("entities", start)
+
+    # Draw instructions, debug, and coordinates
+    start = profiler.begin()
+    text = textcache.render(font, INSTRUCTIONS, True, (0, 0, 0))
+    screen.blit(text, (10, 10))
+    key_text = textcache.render(font, f"Keys: {', '.join(sim.key_status) if sim.key_status else 'None'}, Attack: {sim.attack_active}, Block: {sim.block_active}, Dodge: {sim.is_dodging}, CD: {sim.dodge_cooldown}, Enemy Attack: {enemies.any_attacking()}", True, (0, 0, 0))
+    screen.blit(key_text, (10, 40))
+    coord_text = textcache.render(font, f"Pos: ({player.rect.x}, {player.rect.y})", True, (0, 0, 0))
+    screen.blit(coord_text, (10, 70))
+    debug_text = textcache.render(debug_font, f"{rules.label}, Invincible: {sim.is_invincible}", True, (255, 0, 0))
+    screen.blit(debug_text, (10, HEIGHT - 30))
+    profiler.end("hud", start)
+
+
+def scale_point(x, y, scale):
+    return round(x * scale), round(y * scale)
+
+
+def scale_rect(rect, scale):
+    """View-space (x, y, w, h) -> canvas-space; edges are rounded so neighbours stay flush."""
+    x, y, w, h = rect
+    left, top = scale_point(x, y, scale)
+    right, bottom = scale_point(x + w, y + h, scale)
+    return left, top, right - left, bottom - top
+
+
+_scaled_frames = {}  # (frame surface, scale) -> smoothscaled copy
+
+
+def scaled_frame(frame, scale):
+    key = (frame, scale)
+    surface = _scaled_frames.get(key)
+    if surface is None:
+        surface = pygame.transform.smoothscale(frame, scale_point(frame.get_width(), frame.get_height(), scale))
+        _scaled_frames[key] = surface
+    return surface
+
+
+def parse_render_scale(value):
+    """"0.75" or "75%" -> 0.75, clamped to MIN_RENDER_SCALE..1 and snapped to RENDER_SCALE_STEP."""
+    value = value.strip()
+    scale = float(value[:-1]) / 100 if value.endswith("%") else float(value)
+    scale = max(MIN_RENDER_SCALE, min(1.0, scale))
+    return round(round(scale / RENDER_SCALE_STEP) * RENDER_SCALE_STEP, 2)
+
+
+RENDER_SCALE = parse_render_scale(os.environ.get("GAME_RENDER_SCALE", "1"))
+
+
+def draw_health_bar(screen, font, health, max_health, x, y, offset):
+    health_ratio = health / max_health
+    pygame.draw.rect(screen, HEALTH_BAR_BG_COLOR, (x, y - offset, HEALTH_BAR_WIDTH, HEALTH_BAR_HEIGHT))
+    pygame.draw.rect(screen, HEALTH_BAR_COLOR, (x, y - offset, HEALTH_BAR_WIDTH * health_ratio, HEALTH_BAR_HEIGHT))
+    health_text = textcache.render(font, f"{int(health)}/{max_health}", True, (0, 0, 0))
+    screen.blit(health_text, (x, y - offset - 20))
+
+
+def hud_fonts():
+    """HUD fonts, shared process-wide so cached text surfaces stay valid across mode entries."""
+    return fonts.get("arial", 24), fonts.get("arial", 20)
+
+
+class Session:
+    """One visit to a mode: polls input once per display frame and runs fixed ticks."""
+
+    def __init__(self, rules, player, tick_rate=TICK_RATE):
+        self.sim = Simulation(rules, player)
+        self.sim.particles = particles.ParticlePool()
+        self.timestep = FixedTimestep(tick_rate)
+        self.font, self.debug_font = hud_fonts()
+        self.input = inputs.InputState()
+        self._last_time = None
+        self.recorder = None  # replay.Recorder that sees every tick's input
+        self.render_scale = RENDER_SCALE
+        self._canvas = None  # Reduced-resolution surface the world is drawn to below full render scale
+        # Seconds spent in each phase of the last frame, for benchmarks and profiling
+        self.timings = {"events": 0.0, "sim": 0.0, "render": 0.0}
+
+    def canvas(self, screen):
+        """The reduced canvas for the render scale, or None at full scale."""
+        if self.render_scale == 1.0:
+            return None
+        size = scale_point(screen.get_width(), screen.get_height(), self.render_scale)
+        if self._canvas is None or self._canvas.get_size() != size:
+            self._canvas = pygame.Surface(size).convert(screen)
+        return self._canvas
+
+    def frame(self, screen, events=None, keys_pressed=None, mouse_buttons=None, elapsed=None):
+        """Run one display frame; returns a mode result or None to keep running.
+
+        keys_pressed, mouse_buttons and elapsed override the live keyboard, mouse and
+        wall clock, for scripted input and benchmarks.
+        """
+        sim = self.sim
+        log = sim.log
+        timings = self.timings
+        start = time.perf_counter()
+        try:
+            if events is None:
+                events = pygame.event.get()
+            if self.input.collect(events):
+                log.info("Quit event received")
+                return sim.rules.quit_result
+            # Held keys and buttons are sampled last, immediately before the ticks use them
+            self.input.latch(keys_pressed, mouse_buttons)
+        except Exception as e:
+            log.error("Event handling error: %s", e)
+            return sim.rules.quit_result
+
+        now = time.perf_counter()
+        timings["events"] = now - start
+        if elapsed is None:
+            elapsed = self.timestep.dt if self._last_time is None else now - self._last_time
+        self._last_time = now
+        steps = self.timestep.advance(elapsed)
+        for _ in range(steps):
+            tick_input = self.input.snapshot()
+            result = sim.step(tick_input)
+            if self.recorder is not None:
+                self.recorder.record(tick_input, sim)
+            if result is not None:
+                return result
+        sim.particles.update(steps)  # Particles emitted by these ticks move in one batch
+
+        render_start = time.perf_counter()
+        timings["sim"] = render_start - now
+        try:
+            draw(screen, sim, self.font, self.debug_font, self.render_scale, self.canvas(screen))
+            audio.flush_sfx()  # One voice per effect for all of this frame's ticks
+        except Exception as e:
+            log.error("Rendering error: %s", e)
+            return sim.rules.quit_result
+        timings["render"] = time.perf_counter() - render_start
+        return None
@@ -0,0 +1,55 @@
+import json
+import os
+import pygame
+import debuglog
+
+log = debuglog.get_logger("fonts.py")
+
+# Resolved font files survive restarts, so the system font scan (fontconfig on Linux)
+# is only paid the first time a font name is used on this machine
+CACHE_PATH = os.path.join("build", "fonts.json")
+
+_paths = None  # Font name -> file path of installed fonts
+_fonts = {}  # (name, size) -> pygame.font.Font
+
+
+def _load_paths():
+    global _paths
+    try:
+        with open(CACHE_PATH) as f:
+            _paths = {name: path for name, path in json.load(f).items() if os.path.exists(path)}
+    except (OSError, ValueError):
+        _paths = {}
+
+
+def _resolve(name):
+    if _paths is None:
+        _load_paths()
+    if name in _paths:
+        return _paths[name]
+    path = pygame.font.match_font(name)
+    log.debug("Resolved font %s to %s", name, path)
+    if path is None:
+        return None  # Not installed; looked up again next launch in case it is added
+    _paths[name] = path
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        with open(CACHE_PATH, "w") as f:
+            json.dump(_paths, f, indent=1)
+    except OSError as e:
+        log.debug("Could not cache font paths: %s", e)
+    return path
+
+
+def get(name, size):
+    """Shared Font for a system font name and size; each is resolved and opened once per process.
+
+    Same fallback as SysFont: pygame's default font when the name is not installed.
+    """
+    font = _fonts.get((name, size))
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.Font(_resolve(name), size)
+        _fonts[(name, size)] = font
+    return font
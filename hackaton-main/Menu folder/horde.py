@@ -0,0 +1,403 @@
+import numpy as np
+import pygame
+import audio
+import debuglog
+import spatial
+import world
+
+log = debuglog.get_logger("horde.py")
+
+# Enemy defaults (same values the single-object Enemy used)
+ENEMY_SIZE = 75
+ENEMY_POS = (300, 300)
+ENEMY_HEALTH = 100
+ENEMY_SPEED = 4
+ATTACK_RANGE = 100
+ATTACK_COOLDOWN = 60
+ATTACK_DAMAGE = 10
+# Grid cells a bounded world needs before range queries go through the spatial hash. On
+# smaller maps enemies are dense per cell, and a NumPy scan of every enemy is faster than
+# gathering the hash's buckets and rehashing the enemies that moved each tick.
+SPATIAL_HASH_MIN_CELLS = 40000
+
+
+class EnemyStore:
+    """Structure-of-arrays storage for any number of enemies.
+
+    Positions, health, cooldowns and flags live in contiguous NumPy arrays, and
+    movement, range checks, cooldowns and damage are applied to all enemies (or a
+    slice of them) in one vectorised operation. On large or unbounded worlds living
+    enemies are also kept in a spatial hash on the world grid so range queries only
+    look at nearby cells; elsewhere they scan every enemy. spatial_hash forces either.
+    """
+
+    def __init__(self, capacity=16, game_world=None, size=ENEMY_SIZE, spatial_hash=None):
+        self.count = 0
+        self.size = size
+        self.world = game_world or world.get_world()  # Enemies are kept inside its bounds
+        self.speed = ENEMY_SPEED
+        self.attack_range = ATTACK_RANGE
+        self.attack_damage = ATTACK_DAMAGE
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.health = np.zeros(capacity)
+        self.max_health = np.zeros(capacity)
+        self.cooldown = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.is_attacking = np.zeros(capacity, dtype=bool)
+        self.cell_x = np.zeros(capacity, dtype=np.int64)
+        self.cell_y = np.zeros(capacity, dtype=np.int64)
+        if spatial_hash is None:
+            spatial_hash = wants_spatial_hash(self.world)
+        self.grid = spatial.SpatialHash() if spatial_hash else None
+        self.attacks = 0  # Enemies that attacked in the last attack() call, hurting or not
+
+    def _grow(self, capacity):
+        for name in ("x", "y", "health", "max_health", "cooldown", "alive", "is_attacking", "cell_x", "cell_y"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def spawn(self, x, y, health=ENEMY_HEALTH):
+        """Add one enemy and return its index."""
+        if self.count == len(self.x):
+            self._grow(max(16, 2 * len(self.x)))
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.health[i] = health
+        self.max_health[i] = health
+        self.cooldown[i] = 0
+        self.alive[i] = True
+        self.is_attacking[i] = False
+        self.count += 1
+        self._reindex(slice(i, i + 1), force=True)
+        return i
+
+    def spawn_many(self, xs, ys, health=ENEMY_HEALTH):
+        """Add enemies at arrays of positions; returns the index of the first one."""
+        n = len(xs)
+        first = self.count
+        if first + n > len(self.x):
+            self._grow(max(16, first + n, 2 * len(self.x)))
+        end = first + n
+        self.x[first:end] = xs
+        self.y[first:end] = ys
+        self.health[first:end] = health
+        self.max_health[first:end] = health
+        self.cooldown[first:end] = 0
+        self.alive[first:end] = True
+        self.is_attacking[first:end] = False
+        self.count = end
+        self._reindex(slice(first, end), force=True)
+        return first
+
+    def _reindex(self, s, force=False):
+        """Update the grid cells of enemies in slice s and rehash those that changed cell."""
+        half = self.size / 2
+        new_x = ((self.x[s] + half) // world.GRID_SPACING).astype(np.int64)
+        new_y = ((self.y[s] + half) // world.GRID_SPACING).astype(np.int64)
+        grid = self.grid
+        if grid is None:
+            self.cell_x[s] = new_x
+            self.cell_y[s] = new_y
+            return
+        changed = self.alive[s]
+        if not force:
+            changed = changed & ((new_x != self.cell_x[s]) | (new_y != self.cell_y[s]))
+        self.cell_x[s] = new_x
+        self.cell_y[s] = new_y
+        start = s.start
+        for offset in np.flatnonzero(changed).tolist():
+            grid.move_cell(start + offset, (int(new_x[offset]), int(new_y[offset])))
+
+    def snapshot(self, fields):
+        """Copies of the per-enemy arrays named in fields, for saving."""
+        return {name: getattr(self, name)[:self.count].copy() for name in fields}
+
+    def restore(self, arrays):
+        """Replace every enemy with the ones in a snapshot() dict and rebuild the spatial hash."""
+        count = len(arrays["x"])
+        if count > len(self.x):
+            self._grow(count)
+        self.count = count
+        for name, values in arrays.items():
+            getattr(self, name)[:count] = values
+        self.is_attacking[:count] = False
+        if self.grid is not None:
+            self.grid = spatial.SpatialHash(self.grid.cell_size)
+        self._reindex(slice(0, count), force=True)
+
+    def relocate(self, i, x, y):
+        self.x[i] = x
+        self.y[i] = y
+        self._reindex(slice(i, i + 1))
+
+    def set_alive(self, i, alive):
+        self.alive[i] = alive
+        if alive:
+            self._reindex(slice(i, i + 1), force=True)
+        elif self.grid is not None:
+            self.grid.remove(i)
+
+    def _candidates(self, left, top, width, height):
+        """Indices of living enemies whose centre may lie in the rectangle."""
+        if self.grid is None:
+            return np.flatnonzero(self.alive[:self.count])
+        return self.grid.query_rect(left, top, width, height)
+
+    def near(self, cx, cy, radius):
+        """Indices of living enemies whose centre is within radius of (cx, cy)."""
+        if self.grid is None:
+            n = self.count
+            half = self.size / 2
+            dx = self.x[:n] + half - cx
+            dy = self.y[:n] + half - cy
+            return np.flatnonzero(self.alive[:n] & (dx * dx + dy * dy <= radius * radius))
+        candidates = self.grid.query_radius(cx, cy, radius)
+        if len(candidates) == 0:
+            return candidates
+        half = self.size / 2
+        dx = self.x[candidates] + half - cx
+        dy = self.y[candidates] + half - cy
+        return candidates[dx * dx + dy * dy <= radius * radius]
+
+    def in_rect(self, left, top, width, height):
+        """Indices of living enemies whose centre lies inside the rectangle."""
+        candidates = self._candidates(left, top, width, height)
+        if len(candidates) == 0:
+            return candidates
+        half = self.size / 2
+        x = self.x[candidates] + half
+        y = self.y[candidates] + half
+        return candidates[(x >= left) & (x < left + width) & (y >= top) & (y < top + height)]
+
+    def _slice(self, index):
+        return slice(0, self.count) if index is None else slice(index, index + 1)
+
+    def alive_count(self):
+        return int(np.count_nonzero(self.alive[:self.count]))
+
+    def any_attacking(self):
+        return bool(self.is_attacking[:self.count].any())
+
+    def move_towards(self, px, py, index=None, flow=None):
+        """Step every living enemy outside attack range toward the point (px, py).
+
+        With a navigation.FlowField, enemies walk to the next waypoint on the shared
+        path around obstacles instead of in a straight line.
+        """
+        s = self._slice(index)
+        half = self.size / 2
+        center_x = self.x[s] + half
+        center_y = self.y[s] + half
+        dx = px - center_x
+        dy = py - center_y
+        distance = np.hypot(dx, dy)
+        moving = self.alive[s] & (distance > self.attack_range)
+        if not moving.any():
+            return
+        if flow is not None:
+            target_x, target_y = flow.targets(self.cell_x[s], self.cell_y[s], px, py)
+            dx = target_x - center_x
+            dy = target_y - center_y
+            distance = np.hypot(dx, dy)
+            moving &= distance > 0
+        scale = np.divide(self.speed, distance, out=np.zeros_like(distance), where=moving)
+        x = self.x[s]
+        y = self.y[s]
+        x += dx * scale
+        y += dy * scale
+        self.world.clamp_arrays(x, y, self.size, moving)
+        self._reindex(s)
+
+    def attack(self, px, py, can_hurt, index=None, among=None):
+        """Ready enemies within range of (px, py) attack; returns the damage dealt.
+
+        among, a boolean array over all enemies, limits the attackers to those it
+        marks and keeps earlier is_attacking flags, so several players can each be
+        attacked by their own pursuers in one tick (clear is_attacking first).
+        """
+        if index is None:
+            # Whole horde: with the spatial hash only enemies in nearby grid cells are checked
+            if among is None:
+                self.is_attacking[:self.count] = False
+            attackers = self.near(px, py, self.attack_range)
+            attackers = attackers[self.cooldown[attackers] <= 0]
+            if among is not None:
+                attackers = attackers[among[attackers]]
+            self.attacks = len(attackers)
+            if len(attackers) == 0:
+                return 0
+            self.is_attacking[attackers] = True
+            self.cooldown[attackers] = ATTACK_COOLDOWN
+            if not can_hurt:
+                log.debug("Enemy attack blocked or player invincible")
+                return 0
+            return len(attackers) * self.attack_damage
+        s = self._slice(index)
+        half = self.size / 2
+        dx = px - (self.x[s] + half)
+        dy = py - (self.y[s] + half)
+        in_range = dx * dx + dy * dy <= self.attack_range * self.attack_range
+        attacking = self.alive[s] & (self.cooldown[s] <= 0) & in_range
+        self.is_attacking[s] = attacking
+        hits = int(np.count_nonzero(attacking))
+        self.attacks = hits
+        if hits == 0:
+            return 0
+        self.cooldown[s][attacking] = ATTACK_COOLDOWN
+        if not can_hurt:
+            log.debug("Enemy attack blocked or player invincible")
+            return 0
+        return hits * self.attack_damage
+
+    def update(self, index=None):
+        """Count down attack cooldowns."""
+        s = self._slice(index)
+        cooldown = self.cooldown[s]
+        np.subtract(cooldown, 1, out=cooldown, where=cooldown > 0)
+
+    def damage_in_radius(self, cx, cy, radius, damage, index=None):
+        """Damage every living enemy whose centre is within radius; returns how many were hit."""
+        if index is None:
+            hit = self.near(cx, cy, radius)
+            if len(hit):
+                self._apply_damage(hit, damage)
+            return len(hit)
+        s = self._slice(index)
+        half = self.size / 2
+        dx = self.x[s] + half - cx
+        dy = self.y[s] + half - cy
+        hit = self.alive[s] & (dx * dx + dy * dy <= radius * radius)
+        hit = np.flatnonzero(hit) + s.start
+        if len(hit):
+            self._apply_damage(hit, damage)
+        return len(hit)
+
+    def _apply_damage(self, indices, damage):
+        """Damage the enemies at an array of indices, removing any that die."""
+        self.health[indices] -= damage
+        died = indices[self.health[indices] <= 0]
+        if len(died):
+            self.health[died] = 0
+            self.alive[died] = False
+            if self.grid is not None:
+                for i in died.tolist():
+                    self.grid.remove(i)
+            log.info("%d enemies defeated!", len(died))
+
+    def visible(self, left, top, width, height):
+        """Indices of living enemies that overlap a view rectangle."""
+        size = self.size
+        candidates = self._candidates(left - size, top - size, width + 2 * size, height + 2 * size)
+        if len(candidates) == 0:
+            return candidates
+        x = self.x[candidates]
+        y = self.y[candidates]
+        candidates = candidates[(x + size > left) & (x < left + width) & (y + size > top) & (y < top + height)]
+        candidates.sort()  # Stable draw order
+        return candidates
+
+
+def wants_spatial_hash(game_world):
+    """True for worlds large enough, or unbounded, for the spatial hash to beat a full scan."""
+    if game_world.width is None or game_world.height is None:
+        return True
+    return (game_world.width // world.GRID_SPACING) * (game_world.height // world.GRID_SPACING) >= SPATIAL_HASH_MIN_CELLS
+
+
+def attack_sound(store, damage, player):
+    """Sound for the store's last attack() on the player: hurt, blocked, or none (dodged, missed)."""
+    if damage:
+        audio.play_sfx("hurt")
+    elif store.attacks and player.is_blocking:
+        audio.play_sfx("block")
+
+
+class Enemy:
+    """Thin view of one slot in an EnemyStore, keeping the single-enemy API."""
+
+    def __init__(self, store=None, index=None):
+        if store is None:
+            store = EnemyStore(capacity=1)
+            index = store.spawn(*ENEMY_POS)
+        self.store = store
+        self.index = index
+
+    @property
+    def rect(self):
+        store = self.store
+        return pygame.Rect(int(store.x[self.index]), int(store.y[self.index]), store.size, store.size)
+
+    def set_position(self, x, y):
+        self.store.relocate(self.index, x, y)
+
+    @property
+    def health(self):
+        return float(self.store.health[self.index])
+
+    @health.setter
+    def health(self, value):
+        self.store.health[self.index] = value
+
+    @property
+    def max_health(self):
+        return int(self.store.max_health[self.index])
+
+    @max_health.setter
+    def max_health(self, value):
+        self.store.max_health[self.index] = value
+
+    @property
+    def alive(self):
+        return bool(self.store.alive[self.index])
+
+    @alive.setter
+    def alive(self, value):
+        self.store.set_alive(self.index, bool(value))
+
+    @property
+    def attack_cooldown(self):
+        return int(self.store.cooldown[self.index])
+
+    @property
+    def is_attacking(self):
+        return bool(self.store.is_attacking[self.index])
+
+    @property
+    def speed(self):
+        return self.store.speed
+
+    @property
+    def attack_range(self):
+        return self.store.attack_range
+
+    @property
+    def attack_damage(self):
+        return self.store.attack_damage
+
+    def take_damage(self, damage):
+        if self.alive:
+            self.store._apply_damage(np.array([self.index]), damage)
+            log.debug("Enemy takes %d damage, health: %d", damage, self.health)
+
+    def damage_in_radius(self, cx, cy, radius, damage):
+        return self.store.damage_in_radius(cx, cy, radius, damage, self.index)
+
+    def move_towards_player(self, player):
+        self.store.move_towards(player.rect.centerx, player.rect.centery, self.index)
+
+    def attack_player(self, player, is_invincible):
+        damage = self.store.attack(player.rect.centerx, player.rect.centery,
+                                   not player.is_blocking and not is_invincible, self.index)
+        attack_sound(self.store, damage, player)
+        if damage:
+            player.health -= damage
+            log.debug("Enemy attacks player, player health: %d", player.health)
+            return True
+        return False
+
+    def update(self):
+        self.store.update(self.index)
@@ -0,0 +1,150 @@
+"""Per-frame input for the play modes, and an input latency probe.
+
+Run the game with --probe-latency to print the latency distribution on exit.
+"""
+import sys
+import time
+import pygame
+
+PROBE = "--probe-latency" in sys.argv
+HISTOGRAM_BUCKET_MS = 4
+HISTOGRAM_WIDTH = 40  # Characters in the longest histogram bar
+
+
+class KeyState:
+    """Indexable stand-in for pygame.key.get_pressed() when there is no window."""
+
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+class TickInput:
+    """Input consumed by one simulation tick."""
+    __slots__ = ("keys", "mouse_buttons", "key_downs")
+
+    def __init__(self, keys, mouse_buttons=(False, False, False), key_downs=()):
+        self.keys = keys
+        self.mouse_buttons = mouse_buttons
+        self.key_downs = key_downs
+
+
+class InputState:
+    """Input of one play session: events are collected once per frame, held keys and
+    mouse buttons are latched right before the simulation step, and each tick gets an
+    immutable TickInput snapshot of both.
+
+    KEYDOWNs that no tick has consumed yet (frames that run no tick) carry over to
+    the next frame's first tick.
+    """
+
+    def __init__(self):
+        self.key_downs = []
+        self.keys = KeyState()
+        self.mouse_buttons = (False, False, False)
+        self._held = None  # Held state at the last latch, to spot changes for the probe
+        self._changed_at = None  # When the oldest change no tick has consumed was first seen
+
+    def collect(self, events):
+        """Take this frame's KEYDOWNs; returns True if the window was asked to close."""
+        quit_requested = False
+        for event in events:
+            if event.type == pygame.QUIT:
+                quit_requested = True
+            elif event.type == pygame.KEYDOWN:
+                self.key_downs.append(event.key)
+                self._seen()
+        return quit_requested
+
+    def latch(self, keys=None, mouse_buttons=None):
+        """Sample the held keys and mouse buttons; call as late as possible before the step.
+
+        Pumping the event queue here picks up presses and releases that arrived since
+        the frame's events were read. keys and mouse_buttons override the live state
+        for scripted input.
+        """
+        if keys is None or mouse_buttons is None:
+            pygame.event.pump()
+        self.keys = pygame.key.get_pressed() if keys is None else keys
+        self.mouse_buttons = pygame.mouse.get_pressed() if mouse_buttons is None else mouse_buttons
+        if probe.enabled:
+            held = (self.keys.pressed if isinstance(self.keys, KeyState) else tuple(self.keys),
+                    tuple(self.mouse_buttons))
+            if self._held is not None and held != self._held:
+                self._seen()
+            self._held = held
+
+    def snapshot(self):
+        """TickInput for the next tick; it consumes the pending KEYDOWNs."""
+        tick_input = TickInput(self.keys, self.mouse_buttons, self.key_downs)
+        self.key_downs = []
+        if self._changed_at is not None:
+            probe.consumed(self._changed_at)
+            self._changed_at = None
+        return tick_input
+
+    def _seen(self):
+        if probe.enabled and self._changed_at is None:
+            self._changed_at = time.perf_counter()
+
+
+class LatencyProbe:
+    """Time from an input change to the flip of the first frame drawn after a tick used it.
+
+    pygame events carry no timestamp, so the clock starts when the game first sees
+    the change (reading the queue or latching held state). Time the event spent in
+    the OS queue before that, at most one frame, is not included.
+    """
+
+    def __init__(self, enabled=PROBE):
+        self.enabled = enabled
+        self.samples = []  # Seconds
+        self._pending = []  # First-seen times of changes a tick has used, waiting for a flip
+
+    def consumed(self, seen_at):
+        self._pending.append(seen_at)
+
+    def flipped(self):
+        """Call right after the display is flipped or updated."""
+        if self._pending:
+            now = time.perf_counter()
+            self.samples.extend(now - seen_at for seen_at in self._pending)
+            self._pending.clear()
+
+    def summary(self):
+        """Count, mean and percentiles in milliseconds, or None without samples."""
+        if not self.samples:
+            return None
+        values = sorted(self.samples)
+
+        def percentile(fraction):
+            return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))] * 1e3
+
+        return {"count": len(values), "mean": sum(values) / len(values) * 1e3, "p50": percentile(0.50),
+                "p90": percentile(0.90), "p99": percentile(0.99), "max": values[-1] * 1e3}
+
+    def report(self, title="input to flip"):
+        """Print the distribution (only with --probe-latency)."""
+        if not self.enabled:
+            return
+        summary = self.summary()
+        if summary is None:
+            print(f"inputs.py: {title}: no input seen")
+            return
+        print(f"inputs.py: {title} latency over {summary['count']} inputs: mean {summary['mean']:.1f} ms, "
+              f"p50 {summary['p50']:.1f}, p90 {summary['p90']:.1f}, p99 {summary['p99']:.1f}, max {summary['max']:.1f} ms")
+        buckets = {}
+        for seconds in self.samples:
+            bucket = int(seconds * 1e3 // HISTOGRAM_BUCKET_MS)
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+        largest = max(buckets.values())
+        for bucket in range(min(buckets), max(buckets) + 1):
+            count = buckets.get(bucket, 0)
+            low = bucket * HISTOGRAM_BUCKET_MS
+            bar = "#" * max(1 if count else 0, count * HISTOGRAM_WIDTH // largest)
+            print(f"  {low:>4}-{low + HISTOGRAM_BUCKET_MS:<4} ms {count:>6} {bar}")
+
+
+probe = LatencyProbe()
@@ -0,0 +1,165 @@
+import heapq
+import math
+import numpy as np
+import debuglog
+import world
+
+log = debuglog.get_logger("navigation.py")
+
+FLOW_RADIUS = 24  # Cells around the player covered by the field on large or unbounded maps
+# 8-connected moves: (dx, dy, cost)
+NEIGHBOURS = ((1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+              (1, 1, math.sqrt(2)), (1, -1, math.sqrt(2)), (-1, 1, math.sqrt(2)), (-1, -1, math.sqrt(2)))
+
+
+class FlowField:
+    """Shared path to the player over the world grid, for any number of enemies.
+
+    One Dijkstra pass from the player's cell gives every cell its cost to reach the
+    player and the neighbouring cell to step into next. It is only recomputed when the
+    player enters another cell; between recomputes every enemy looks up its next
+    waypoint with a single array index, however many enemies there are.
+    """
+
+    def __init__(self, game_world, radius=FLOW_RADIUS):
+        self.world = game_world
+        self.radius = radius
+        self.cell = None  # Player cell the field was built for
+        self.origin = (0, 0)  # Grid cell at index [0, 0]
+        self.cost = None  # [row, column] -> path cost to the player's cell, inf if unreachable
+        self.next_x = None  # [row, column] -> centre of the next cell on the way, in world pixels
+        self.next_y = None
+        self.rebuilds = 0
+
+    def _window(self, cell_x, cell_y):
+        """Grid rectangle covered by the field: the whole map if it is small, else around the player."""
+        columns = self.world.width // world.GRID_SPACING if self.world.width is not None else None
+        rows = self.world.height // world.GRID_SPACING if self.world.height is not None else None
+        size = 2 * self.radius + 1
+        if columns is not None and columns <= size:
+            left, width = 0, columns
+        else:
+            left, width = cell_x - self.radius, size
+        if rows is not None and rows <= size:
+            top, height = 0, rows
+        else:
+            top, height = cell_y - self.radius, size
+        return left, top, width, height
+
+    def update(self, px, py):
+        """Point the field at the player's centre; returns True if it had to be rebuilt."""
+        cell = (int(px // world.GRID_SPACING), int(py // world.GRID_SPACING))
+        if cell == self.cell:
+            return False
+        self.cell = cell
+        self._build(*cell)
+        return True
+
+    def _build(self, goal_x, goal_y):
+        left, top, width, height = self._window(goal_x, goal_y)
+        self.origin = (left, top)
+        is_blocked = self.world.is_blocked
+        # Flat Python lists (index row * width + column): much faster than NumPy scalars in this loop
+        blocked = [is_blocked(left + column, top + row) for row in range(height) for column in range(width)]
+        cost = [math.inf] * (width * height)
+        next_cell = [-1] * (width * height)
+        moves = [(dx, dy, step, dy * width + dx) for dx, dy, step in NEIGHBOURS]
+
+        column = goal_x - left
+        row = goal_y - top
+        if 0 <= row < height and 0 <= column < width:
+            start = row * width + column
+            cost[start] = 0.0
+            next_cell[start] = start
+            queue = [(0.0, start)]
+            while queue:
+                distance, index = heapq.heappop(queue)
+                if distance > cost[index]:
+                    continue
+                row, column = divmod(index, width)
+                for dx, dy, step, offset in moves:
+                    r = row + dy
+                    c = column + dx
+                    if not (0 <= r < height and 0 <= c < width):
+                        continue
+                    neighbour = index + offset
+                    if blocked[neighbour]:
+                        continue
+                    # No cutting corners past an obstacle on a diagonal move
+                    if dx and dy and (blocked[index + dx] or blocked[index + dy * width]):
+                        continue
+                    new = distance + step
+                    if new < cost[neighbour]:
+                        cost[neighbour] = new
+                        next_cell[neighbour] = index  # Step back toward the goal
+                        heapq.heappush(queue, (new, neighbour))
+
+        next_cell = np.array(next_cell).reshape(height, width)
+        half = world.GRID_SPACING / 2
+        self.cost = np.array(cost).reshape(height, width)
+        self.next_x = (left + next_cell % width) * world.GRID_SPACING + half
+        self.next_y = (top + next_cell // width) * world.GRID_SPACING + half
+        self.rebuilds += 1
+        log.debug("Flow field rebuilt for cell %s (%dx%d cells)", (goal_x, goal_y), width, height)
+
+    def targets(self, cell_x, cell_y, px, py):
+        """Waypoints for enemies in the given cells: the next cell's centre, or the player itself.
+
+        Enemies in the player's cell, outside the field or with no path head straight for (px, py).
+        """
+        target_x = np.full(len(cell_x), float(px))
+        target_y = np.full(len(cell_y), float(py))
+        if self.cost is None:
+            return target_x, target_y
+        left, top = self.origin
+        height, width = self.cost.shape
+        column = cell_x - left
+        row = cell_y - top
+        inside = (column >= 0) & (column < width) & (row >= 0) & (row < height)
+        index = np.flatnonzero(inside)
+        row = row[index]
+        column = column[index]
+        routed = (self.cost[row, column] > 0) & np.isfinite(self.cost[row, column])
+        index = index[routed]
+        target_x[index] = self.next_x[row[routed], column[routed]]
+        target_y[index] = self.next_y[row[routed], column[routed]]
+        return target_x, target_y
+
+
+def astar(game_world, start, goal, limit=None):
+    """Per-enemy A* over the same 8-connected grid, for comparison (see bench_path.py).
+
+    Returns the list of cells from start to goal, or None if there is no path.
+    """
+    is_blocked = game_world.is_blocked
+    open_heap = [(0.0, 0.0, start)]
+    came_from = {start: None}
+    best = {start: 0.0}
+    goal_x, goal_y = goal
+    while open_heap:
+        _, distance, cell = heapq.heappop(open_heap)
+        if cell == goal:
+            path = []
+            while cell is not None:
+                path.append(cell)
+                cell = came_from[cell]
+            return path[::-1]
+        if distance > best[cell]:
+            continue
+        x, y = cell
+        for dx, dy, step in NEIGHBOURS:
+            nxt = (x + dx, y + dy)
+            if is_blocked(*nxt) or (dx and dy and (is_blocked(x + dx, y) or is_blocked(x, y + dy))):
+                continue
+            if limit is not None and max(abs(nxt[0] - goal_x), abs(nxt[1] - goal_y)) > limit:
+                continue
+            new = distance + step
+            if new < best.get(nxt, math.inf):
+                best[nxt] = new
+                came_from[nxt] = cell
+                # Octile distance: exact on an empty 8-connected grid
+                ex = abs(goal_x - nxt[0])
+                ey = abs(goal_y - nxt[1])
+                heuristic = max(ex, ey) + (math.sqrt(2) - 1) * min(ex, ey)
+                heapq.heappush(open_heap, (new + heuristic, new, nxt))
+    return None
@@ -0,0 +1,743 @@
+"""Co-op over UDP: an authoritative server runs one shared simulation, clients send
+input and draw interpolated state snapshots.
+
+Usage:
+    python netplay.py [--clients 2] [--seconds 10] [--latency 50] [--jitter 10] [--loss 0.05]
+                      [--mode lupta] [--enemies 20]           # server and bot clients on 127.0.0.1
+    python netplay.py --server [--port 47800] [--mode harta]  # server only, until Ctrl+C
+    python netplay.py --connect 127.0.0.1:47800                # play in a window
+
+The server steps the simulation at engine.TICK_RATE and sends every client a
+snapshot each SNAPSHOT_INTERVAL ticks. A snapshot is the quantised state (one row
+of position, health and flags per player slot and per enemy) delta-encoded against
+the newest snapshot that client has acknowledged, or against nothing when none of
+its acks are still in the server's history. Clients send each tick's input with the
+unacknowledged ones before it, so a lost packet costs nothing as long as a later
+one arrives, and draw the state INTERPOLATION_TICKS behind the newest snapshot.
+
+--latency (one way, ms), --jitter (ms) and --loss (fraction) are applied to every
+datagram either side sends. The local run reports bandwidth per client and how
+much of each tick's time budget the server used.
+"""
+import argparse
+import asyncio
+import collections
+import os
+import random
+import struct
+import sys
+import time
+import numpy as np
+import pygame
+import debuglog
+import engine
+import harta
+import horde
+import lupta
+import replay
+import world
+from player import Player
+
+log = debuglog.get_logger("netplay.py")
+
+HOST = "127.0.0.1"
+PORT = 47800
+MODES = {"harta": harta.RULES, "lupta": lupta.RULES}
+MAX_PLAYERS = 8
+SNAPSHOT_INTERVAL = 3  # Ticks between snapshots: 20 per second at 60 ticks
+HISTORY = 64  # Snapshots kept as delta bases, about 3 s
+INTERPOLATION_TICKS = 2 * SNAPSHOT_INTERVAL  # Clients draw this far behind, so one lost snapshot never stalls them
+INPUT_REDUNDANCY = 16  # Unacknowledged inputs resent with each new one, at most
+INPUT_BUFFER = 6  # Queued input ticks the server lets build up before skipping to the newest
+CLIENT_TIMEOUT = 5.0  # Seconds of silence before the server frees a slot
+HELLO_INTERVAL = 0.25
+REPORT_SECONDS = 5.0
+POSITION_SCALE = 2  # Quantisation: positions are sent in half pixels, health in whole points
+
+# Packets; every one starts with its type byte
+HELLO, WELCOME, INPUT, SNAPSHOT, BYE = range(5)
+WELCOME_PACKET = struct.Struct("<BBB")  # type, slot (FULL when there is none), mode
+INPUT_HEADER = struct.Struct("<BIIB")  # type, newest snapshot tick received, newest input seq, inputs in packet
+SNAPSHOT_HEADER = struct.Struct("<BIII")  # type, tick, base tick (0: none), newest input seq applied
+FULL = 255
+DODGE_BIT = 0x80  # Input byte: replay.pack_state() bits, plus Space pressed on that tick
+
+# Snapshot rows: x, y, health, flags
+FIELDS = 4
+PRESENT, ALIVE, ATTACKING, BLOCKING, DODGING, FACING_LEFT = (1 << bit for bit in range(6))
+PLAYER_COLORS = ((255, 200, 0), (0, 200, 255), (255, 80, 200), (120, 255, 120),
+                 (255, 140, 60), (180, 120, 255), (255, 255, 255), (160, 160, 160))
+
+
+def encode_delta(state, base):
+    """Bytes that turn base into state: the rows that changed and, per row, its changed fields.
+
+    Each changed row costs its distance from the previous one, a field mask and a
+    zigzag varint per changed field; unchanged rows cost nothing. Rows beyond the
+    end of base are encoded against zeros.
+    """
+    rows = len(state)
+    previous = np.zeros_like(state)
+    shared = min(rows, len(base))
+    previous[:shared] = base[:shared]
+    diff = state - previous
+    changed = np.flatnonzero(diff.any(axis=1))
+    masks = ((diff[changed] != 0) << np.arange(FIELDS)).sum(axis=1)
+    out = bytearray()
+    replay.write_varint(out, rows)
+    replay.write_varint(out, len(changed))
+    last = -1
+    for row, mask, values in zip(changed.tolist(), masks.tolist(), diff[changed].tolist()):
+        replay.write_varint(out, row - last - 1)
+        out.append(mask)
+        for field in range(FIELDS):
+            if mask & (1 << field):
+                value = values[field]
+                replay.write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+        last = row
+    return bytes(out)
+
+
+def decode_delta(data, pos, base):
+    """The state encode_delta() encoded against base."""
+    rows, pos = replay.read_varint(data, pos)
+    state = np.zeros((rows, FIELDS), dtype=np.int32)
+    shared = min(rows, len(base))
+    state[:shared] = base[:shared]
+    changed, pos = replay.read_varint(data, pos)
+    row = -1
+    for _ in range(changed):
+        gap, pos = replay.read_varint(data, pos)
+        row += gap + 1
+        mask = data[pos]
+        pos += 1
+        for field in range(FIELDS):
+            if mask & (1 << field):
+                value, pos = replay.read_varint(data, pos)
+                state[row, field] += value >> 1 if not value & 1 else -((value + 1) >> 1)
+    return state
+
+
+def pack_input(tick_input):
+    state = replay.pack_state(tick_input.keys, tick_input.mouse_buttons)
+    return state | DODGE_BIT if pygame.K_SPACE in tick_input.key_downs else state
+
+
+def unpack_input(state):
+    keys, mouse_buttons = replay.unpack_state(state & ~DODGE_BIT)
+    return engine.TickInput(keys, mouse_buttons, [pygame.K_SPACE] if state & DODGE_BIT else [])
+
+
+class NetworkConditions:
+    """Simulated one-way latency, jitter and packet loss for every datagram an endpoint sends."""
+
+    def __init__(self, latency=0.0, jitter=0.0, loss=0.0, seed=0):
+        self.latency = latency  # Seconds
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.sent = 0
+        self.dropped = 0
+
+    def send(self, transport, data, addr=None):
+        self.sent += 1
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        delay = self.latency + self.rng.uniform(-self.jitter, self.jitter) if self.jitter else self.latency
+        if delay <= 0:
+            transport.sendto(data, addr)
+        else:
+            asyncio.get_running_loop().call_later(delay, self._deliver, transport, data, addr)
+
+    @staticmethod
+    def _deliver(transport, data, addr):
+        if not transport.is_closing():
+            transport.sendto(data, addr)
+
+
+class NearestFlow:
+    """Flow-field stand-in for EnemyStore.move_towards(): each enemy follows the field of its nearest player."""
+
+    def __init__(self, flows, centers, nearest):
+        self.flows = flows
+        self.centers = centers
+        self.nearest = nearest
+
+    def targets(self, cell_x, cell_y, px, py):
+        target_x = np.array(px, dtype=float)
+        target_y = np.array(py, dtype=float)
+        for k, flow in enumerate(self.flows):
+            mine = np.flatnonzero(self.nearest == k)
+            if len(mine):
+                target_x[mine], target_y[mine] = flow.targets(cell_x[mine], cell_y[mine], *self.centers[k])
+        return target_x, target_y
+
+
+class CoopSimulation:
+    """One shared horde and a player per connected client.
+
+    Every player is an engine.Simulation over the same EnemyStore, so movement,
+    dodging and combat follow the single-player rules; each enemy chases and
+    attacks the nearest living player instead of the only one.
+    """
+
+    def __init__(self, rules, player_class, enemy_count=0, seed=0, game_world=None):
+        self.rules = rules
+        self.player_class = player_class
+        self.world = game_world or world.get_world()
+        self.enemies = horde.EnemyStore(game_world=self.world)
+        for x, y in rules.enemy_spawns:
+            self.enemies.spawn(*self.world.open_position(x, y, self.enemies.size))
+        extra = enemy_count - self.enemies.count
+        if extra > 0:
+            x, y = self.world.scatter_points(extra, self.enemies.size, np.random.default_rng(seed))
+            self.enemies.spawn_many(x, y)
+        self.players = [None] * MAX_PLAYERS  # engine.Simulation per occupied slot
+        self.tick = 0
+        # Attacks since the last snapshot, so the flags show ones that started and ended in between
+        self._attacked = np.zeros(MAX_PLAYERS, dtype=bool)
+        self._enemy_attacked = np.zeros(self.enemies.count, dtype=bool)
+
+    def join(self, slot):
+        player = self.player_class()
+        player.rect.x += (slot - MAX_PLAYERS // 2) * self.rules.player_size  # Side by side
+        self.players[slot] = engine.Simulation(self.rules, player, self.world, self.enemies)
+        self.players[slot].tick = self.tick
+
+    def leave(self, slot):
+        self.players[slot] = None
+
+    def living(self):
+        return [(slot, sim) for slot, sim in enumerate(self.players) if sim is not None and sim.player.health > 0]
+
+    def step(self, tick_inputs):
+        """Advance one tick with a TickInput per slot; returns "defeated", "cleared" or None."""
+        self.tick += 1
+        living = self.living()
+        for slot, sim in living:
+            sim.tick = self.tick
+            sim.step_player(tick_inputs[slot])
+        enemies = self.enemies
+        n = enemies.count
+        if living and n:
+            centers = np.array([sim.player.rect.center for _, sim in living], dtype=float)
+            half = enemies.size / 2
+            dx = enemies.x[:n, None] + half - centers[:, 0]
+            dy = enemies.y[:n, None] + half - centers[:, 1]
+            nearest = np.argmin(dx * dx + dy * dy, axis=1)
+            target_x = centers[nearest, 0]
+            target_y = centers[nearest, 1]
+            if self.world.obstacles:
+                for (_, sim), (x, y) in zip(living, centers):
+                    sim.flow.update(x, y)
+                enemies.move_towards(target_x, target_y,
+                                     flow=NearestFlow([sim.flow for _, sim in living], centers, nearest))
+            else:
+                enemies.move_towards(target_x, target_y)
+            enemies.is_attacking[:n] = False
+            for k, (slot, sim) in enumerate(living):
+                sim.take_hits(enemies.attack(centers[k, 0], centers[k, 1], sim.can_be_hurt(), among=nearest == k))
+            self._enemy_attacked |= enemies.is_attacking[:n]
+        enemies.update()
+        for slot, sim in living:
+            sim.step_combat(tick_inputs[slot])
+            self._attacked[slot] |= sim.attack_active
+
+        if any(sim is not None for sim in self.players) and not self.living():
+            return "defeated"
+        if self.rules.enemy_defeated_result is not None and enemies.alive_count() == 0:
+            return "cleared"
+        return None
+
+    def snapshot_state(self):
+        """Quantised state: an int32 row of (x, y, health, flags) per player slot, then per enemy."""
+        enemies = self.enemies
+        n = enemies.count
+        state = np.zeros((MAX_PLAYERS + n, FIELDS), dtype=np.int32)
+        for slot, sim in enumerate(self.players):
+            if sim is None:
+                continue
+            player = sim.player
+            flags = PRESENT
+            flags |= ALIVE if player.health > 0 else 0
+            flags |= ATTACKING if self._attacked[slot] else 0
+            flags |= BLOCKING if player.is_blocking else 0
+            flags |= DODGING if sim.is_dodging else 0
+            flags |= FACING_LEFT if player.direction == "left" else 0
+            state[slot] = (player.rect.x * POSITION_SCALE, player.rect.y * POSITION_SCALE, max(0, round(player.health)), flags)
+        rows = state[MAX_PLAYERS:]
+        rows[:, 0] = np.round(enemies.x[:n] * POSITION_SCALE)
+        rows[:, 1] = np.round(enemies.y[:n] * POSITION_SCALE)
+        rows[:, 2] = np.round(np.maximum(enemies.health[:n], 0))
+        rows[:, 3] = PRESENT | enemies.alive[:n] * ALIVE | self._enemy_attacked * ATTACKING
+        self._attacked[:] = False
+        self._enemy_attacked[:] = False
+        return state
+
+
+class Peer:
+    """Server-side state of one client."""
+
+    def __init__(self, slot, addr, now):
+        self.slot = slot
+        self.addr = addr
+        self.last_seen = now
+        self.inputs = {}  # Input seq -> packed input, received but not applied yet
+        self.next_seq = 1
+        self.held = 0  # Last applied input without its Space press, repeated while none arrive
+        self.acked = 0  # Newest snapshot tick the client has
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.full_snapshots = 0
+        self.delta_snapshots = 0
+        self.starved = 0  # Ticks run without the client's input
+        self.skipped = 0  # Inputs dropped because they arrived too late to catch up
+
+
+class Server(asyncio.DatagramProtocol):
+    """Authoritative co-op server: one CoopSimulation, stepped at a fixed rate."""
+
+    def __init__(self, mode, player_class, enemy_count=0, seed=0, conditions=None, tick_rate=engine.TICK_RATE):
+        self.mode = mode
+        self.player_class = player_class
+        self.enemy_count = enemy_count
+        self.seed = seed
+        self.conditions = conditions or NetworkConditions()
+        self.tick_rate = tick_rate
+        self.transport = None
+        self.peers = {}  # addr -> Peer
+        self.tick = 0  # Keeps counting across rounds, so snapshot ticks stay unique
+        self.history = collections.OrderedDict()  # Snapshot tick -> state, the possible delta bases
+        self.busy = []  # Seconds of work per tick: simulation, snapshots and packet handling
+        self.late_ticks = 0
+        self.rounds = 0
+        self.new_round()
+
+    def new_round(self):
+        self.rounds += 1
+        self.sim = CoopSimulation(MODES[self.mode], self.player_class, self.enemy_count, self.seed + self.rounds)
+        for peer in self.peers.values():
+            self.sim.join(peer.slot)
+        self.history.clear()  # Entity rows change meaning, so every client gets a full snapshot next
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if not data:
+            return
+        now = time.perf_counter()
+        peer = self.peers.get(addr)
+        kind = data[0]
+        if kind == HELLO:
+            if peer is None:
+                free = set(range(MAX_PLAYERS)) - {p.slot for p in self.peers.values()}
+                if not free:
+                    self.send(WELCOME_PACKET.pack(WELCOME, FULL, 0), addr)
+                    return
+                peer = self.peers[addr] = Peer(min(free), addr, now)
+                self.sim.join(peer.slot)
+                log.info("Client %s:%d joined in slot %d", *addr[:2], peer.slot)
+            self.send(WELCOME_PACKET.pack(WELCOME, peer.slot, list(MODES).index(self.mode)), addr)
+        elif peer is None:
+            return
+        elif kind == INPUT and len(data) >= INPUT_HEADER.size:
+            _, ack, seq, count = INPUT_HEADER.unpack_from(data)
+            peer.last_seen = now
+            peer.bytes_in += len(data)
+            peer.acked = max(peer.acked, ack)
+            inputs = data[INPUT_HEADER.size:INPUT_HEADER.size + count]
+            for offset, state in enumerate(inputs):
+                input_seq = seq - len(inputs) + 1 + offset
+                if input_seq >= peer.next_seq:
+                    peer.inputs[input_seq] = state
+        elif kind == BYE:
+            self.drop(peer, "left")
+
+    def send(self, data, addr, peer=None):
+        if peer is not None:
+            peer.bytes_out += len(data)
+        self.conditions.send(self.transport, data, addr)
+
+    def drop(self, peer, reason):
+        log.info("Client in slot %d %s", peer.slot, reason)
+        del self.peers[peer.addr]
+        self.sim.leave(peer.slot)
+
+    def next_inputs(self):
+        """Each slot's input for this tick: the next one in sequence, or the held one while it is missing."""
+        tick_inputs = [None] * MAX_PLAYERS
+        for peer in self.peers.values():
+            if peer.inputs:
+                newest = max(peer.inputs)
+                if newest - peer.next_seq >= INPUT_BUFFER:
+                    # Fell behind (a burst arrived at once): skip to just before the newest
+                    skip_to = newest - INPUT_BUFFER // 2
+                    peer.skipped += sum(1 for seq in peer.inputs if seq < skip_to)
+                    peer.inputs = {seq: state for seq, state in peer.inputs.items() if seq >= skip_to}
+                    peer.next_seq = skip_to
+            state = peer.inputs.pop(peer.next_seq, None)
+            if state is None:
+                peer.starved += 1
+                state = peer.held
+            else:
+                peer.next_seq += 1
+                peer.held = state & ~DODGE_BIT
+            tick_inputs[peer.slot] = unpack_input(state)
+        return tick_inputs
+
+    def send_snapshots(self):
+        state = self.sim.snapshot_state()
+        self.history[self.tick] = state
+        while len(self.history) > HISTORY:
+            self.history.popitem(last=False)
+        encoded = {}  # Base tick -> payload; clients acking the same snapshot share one encoding
+        for peer in self.peers.values():
+            base_tick = peer.acked if peer.acked in self.history else 0
+            payload = encoded.get(base_tick)
+            if payload is None:
+                base = self.history[base_tick] if base_tick else np.zeros((0, FIELDS), dtype=np.int32)
+                payload = encoded[base_tick] = encode_delta(state, base)
+            if base_tick:
+                peer.delta_snapshots += 1
+            else:
+                peer.full_snapshots += 1
+            header = SNAPSHOT_HEADER.pack(SNAPSHOT, self.tick, base_tick, peer.next_seq - 1)
+            self.send(header + payload, peer.addr, peer)
+
+    def step(self):
+        self.tick += 1
+        result = self.sim.step(self.next_inputs())
+        if result is not None:
+            log.info("Round %d %s after %d ticks", self.rounds, result, self.sim.tick)
+            self.new_round()
+        if self.tick % SNAPSHOT_INTERVAL == 0:
+            self.send_snapshots()
+
+    async def run(self, seconds=None):
+        """Step at the tick rate, for a number of seconds or until cancelled."""
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        next_tick = loop.time()
+        end = None if seconds is None else next_tick + seconds
+        last_report = next_tick
+        while end is None or next_tick < end:
+            start = time.perf_counter()
+            self.step()
+            for peer in list(self.peers.values()):
+                if start - peer.last_seen > CLIENT_TIMEOUT:
+                    self.drop(peer, "timed out")
+            self.busy.append(time.perf_counter() - start)
+            next_tick += interval
+            delay = next_tick - loop.time()
+            if delay < 0:
+                self.late_ticks += 1
+                if delay < -engine.MAX_STEPS_PER_FRAME * interval:
+                    next_tick = loop.time()  # Too far behind to catch up; drop the time instead
+            if seconds is None and next_tick - last_report >= REPORT_SECONDS:
+                self.report(next_tick - last_report)
+                last_report = next_tick
+            await asyncio.sleep(max(0.0, delay))
+
+    def headroom(self):
+        """(mean, p99) seconds of work per tick, and how many times over it fits the tick interval."""
+        if not self.busy:
+            return 0.0, 0.0, float("inf")
+        values = sorted(self.busy)
+        mean = sum(values) / len(values)
+        return mean, values[min(len(values) - 1, int(0.99 * len(values)))], 1 / self.tick_rate / mean
+
+    def report(self, seconds):
+        mean, p99, headroom = self.headroom()
+        print(f"netplay.py: server {self.tick} ticks in {self.rounds} rounds, {len(self.peers)} clients, {self.late_ticks} late ticks; "
+              f"work per tick mean {mean * 1e3:.3f} ms, p99 {p99 * 1e3:.3f} ms of {1e3 / self.tick_rate:.1f} ms: "
+              f"{headroom:.0f}x headroom (about {1 / max(p99, 1e-9):.0f} ticks/s sustainable)")
+        for peer in sorted(self.peers.values(), key=lambda p: p.slot):
+            snapshots = peer.full_snapshots + peer.delta_snapshots
+            print(f"netplay.py:   slot {peer.slot}: down {peer.bytes_out / seconds / 1024:.2f} KiB/s, "
+                  f"up {peer.bytes_in / seconds / 1024:.2f} KiB/s, {snapshots} snapshots "
+                  f"({peer.full_snapshots} full) averaging {peer.bytes_out / max(snapshots, 1):.0f} B, "
+                  f"{peer.starved} ticks without input, {peer.skipped} inputs skipped")
+            peer.bytes_in = peer.bytes_out = peer.full_snapshots = peer.delta_snapshots = 0
+
+
+class Client(asyncio.DatagramProtocol):
+    """Sends input every tick and keeps the snapshots it receives for interpolation."""
+
+    def __init__(self, conditions=None):
+        self.conditions = conditions or NetworkConditions()
+        self.transport = None
+        self.slot = None
+        self.mode = None
+        self.welcomed = asyncio.Event()
+        self.seq = 0
+        self.unacked = collections.deque()  # (seq, packed input) the server has not applied yet
+        self.states = collections.OrderedDict()  # Snapshot tick -> state, for interpolation and as delta bases
+        self.newest = 0
+        self.offset = None  # Server tick time minus local time, from the least delayed snapshot
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.snapshots = 0
+        self.undecodable = 0  # Snapshots whose base the client no longer had
+        self.frames = 0
+        self.held_frames = 0  # Frames past the newest snapshot, when interpolation had to stop
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if not data:
+            return
+        self.bytes_in += len(data)
+        if data[0] == WELCOME and len(data) >= WELCOME_PACKET.size:
+            _, slot, mode = WELCOME_PACKET.unpack_from(data)
+            if slot == FULL:
+                log.warning("Server is full")
+                return
+            self.slot = slot
+            self.mode = list(MODES)[mode]
+            self.welcomed.set()
+        elif data[0] == SNAPSHOT and len(data) >= SNAPSHOT_HEADER.size:
+            _, tick, base_tick, last_input = SNAPSHOT_HEADER.unpack_from(data)
+            if tick <= self.newest:
+                return  # Reordered or duplicate
+            if base_tick:
+                base = self.states.get(base_tick)
+                if base is None:
+                    self.undecodable += 1
+                    return
+            else:
+                base = np.zeros((0, FIELDS), dtype=np.int32)
+            self.states[tick] = decode_delta(data, SNAPSHOT_HEADER.size, base)
+            while len(self.states) > HISTORY:
+                self.states.popitem(last=False)
+            self.newest = tick
+            self.snapshots += 1
+            offset = tick / engine.TICK_RATE - time.perf_counter()
+            self.offset = offset if self.offset is None else max(self.offset, offset)
+            while self.unacked and self.unacked[0][0] <= last_input:
+                self.unacked.popleft()
+
+    def send(self, data):
+        self.bytes_out += len(data)
+        self.conditions.send(self.transport, data)
+
+    async def connect(self, timeout=5.0):
+        """Say hello until the server answers; returns False if it never does."""
+        deadline = time.perf_counter() + timeout
+        while not self.welcomed.is_set() and time.perf_counter() < deadline:
+            self.send(bytes((HELLO,)))
+            try:
+                await asyncio.wait_for(self.welcomed.wait(), HELLO_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        return self.welcomed.is_set()
+
+    def send_input(self, tick_input):
+        """Queue this tick's input and send it with every earlier one the server has not applied."""
+        self.seq += 1
+        self.unacked.append((self.seq, pack_input(tick_input)))
+        while len(self.unacked) > INPUT_REDUNDANCY:
+            self.unacked.popleft()
+        inputs = bytes(state for _, state in self.unacked)
+        self.send(INPUT_HEADER.pack(INPUT, self.newest, self.seq, len(inputs)) + inputs)
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.sendto(bytes((BYE,)))  # Straight out, not delayed past the close
+            self.transport.close()
+
+    def interpolated(self, now=None):
+        """State INTERPOLATION_TICKS behind the server as a float array, positions in pixels; None before any snapshot.
+
+        Positions are interpolated between the two snapshots around that time;
+        health and flags come from the earlier one.
+        """
+        if not self.states:
+            return None
+        now = time.perf_counter() if now is None else now
+        self.frames += 1
+        render_tick = (now + self.offset) * engine.TICK_RATE - INTERPOLATION_TICKS
+        ticks = list(self.states)
+        if render_tick >= ticks[-1]:
+            self.held_frames += render_tick > ticks[-1]
+            state = self.states[ticks[-1]].astype(float)
+        elif render_tick <= ticks[0]:
+            state = self.states[ticks[0]].astype(float)
+        else:
+            index = int(np.searchsorted(ticks, render_tick, side="right"))
+            before, after = ticks[index - 1], ticks[index]
+            state = self.states[before].astype(float)
+            later = self.states[after]
+            rows = min(len(state), len(later))
+            t = (render_tick - before) / (after - before)
+            state[:rows, :2] += (later[:rows, :2] - state[:rows, :2]) * t
+        state[:, :2] /= POSITION_SCALE
+        return state
+
+
+async def run_bot(client, seconds, seed):
+    """Drive a client with batch.py's random policy for a number of seconds, interpolating every tick."""
+    import batch  # Sets SDL's dummy drivers, so only imported for headless runs
+    policy = batch.random_policy(None, np.random.default_rng(seed))
+    interval = 1 / engine.TICK_RATE
+    loop = asyncio.get_running_loop()
+    next_tick = loop.time()
+    end = next_tick + seconds
+    while next_tick < end:
+        client.send_input(next(policy))
+        client.interpolated()
+        next_tick += interval
+        await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+
+async def run_local(args, conditions):
+    """Server and bot clients in one process on 127.0.0.1; prints bandwidth, headroom and a consistency check."""
+    loop = asyncio.get_running_loop()
+    server = Server(args.mode, Player, args.enemies, args.seed, conditions(0))
+    transport, _ = await loop.create_datagram_endpoint(lambda: server, local_addr=(HOST, args.port))
+    clients = []
+    for k in range(args.clients):
+        client = Client(conditions(k + 1))
+        await loop.create_datagram_endpoint(lambda: client, remote_addr=(HOST, args.port))
+        clients.append(client)
+    server_task = asyncio.ensure_future(server.run(args.seconds))
+    connected = await asyncio.gather(*(client.connect() for client in clients))
+    if not all(connected):
+        print("netplay.py: a client could not connect")
+    await asyncio.gather(*(run_bot(client, args.seconds, args.seed + k) for k, client in enumerate(clients)))
+    await server_task
+    server.report(args.seconds)
+
+    mismatches = 0
+    for client in clients:
+        for tick, state in client.states.items():
+            if tick in server.history and not np.array_equal(state, server.history[tick]):
+                mismatches += 1
+        print(f"netplay.py:   client {client.slot}: {client.snapshots} snapshots decoded, {client.undecodable} without "
+              f"their base, {client.held_frames}/{client.frames} frames past the newest snapshot, "
+              f"{client.conditions.dropped}/{client.conditions.sent} packets dropped on the way up")
+        client.close()
+    print(f"netplay.py: {server.conditions.dropped}/{server.conditions.sent} packets dropped on the way down, "
+          f"snapshot mismatches {mismatches}")
+    await asyncio.sleep(0.1)  # Let the byes go out
+    transport.close()
+    return mismatches
+
+
+async def run_server(args, conditions):
+    loop = asyncio.get_running_loop()
+    server = Server(args.mode, Player, args.enemies, args.seed, conditions(0))
+    transport, _ = await loop.create_datagram_endpoint(lambda: server, local_addr=(args.host, args.port))
+    print(f"netplay.py: serving {args.mode} on {args.host}:{args.port}")
+    try:
+        await server.run()
+    finally:
+        transport.close()
+
+
+def draw_state(screen, font, game_world, rules, state, slot, client):
+    """World, players and enemies of an interpolated state, the camera on this client's player."""
+    rows = state.tolist()
+    half = rules.player_size // 2
+    camera_x, camera_y = game_world.camera(round(rows[slot][0]) + half, round(rows[slot][1]) + half,
+                                           engine.WIDTH, engine.HEIGHT)
+    game_world.draw(screen, camera_x, camera_y)
+    for x, y, health, flags in rows[MAX_PLAYERS:]:
+        x, y = x - camera_x, y - camera_y
+        if int(flags) & ALIVE and -rules.enemy_size < x < engine.WIDTH and -rules.enemy_size < y < engine.HEIGHT:
+            color = (255, 0, 0) if int(flags) & ATTACKING else engine.ENEMY_COLOR
+            pygame.draw.rect(screen, color, (x, y, rules.enemy_size, rules.enemy_size))
+            engine.draw_health_bar(screen, font, health, horde.ENEMY_HEALTH, x, y, rules.health_bar_offset)
+    for row, (x, y, health, flags) in enumerate(rows[:MAX_PLAYERS]):
+        flags = int(flags)
+        if flags & PRESENT:
+            x, y = x - camera_x, y - camera_y
+            pygame.draw.rect(screen, PLAYER_COLORS[row] if flags & ALIVE else (80, 80, 80),
+                             (x, y, rules.player_size, rules.player_size), 0 if row == slot else 4)
+            if flags & BLOCKING:
+                pygame.draw.rect(screen, (255, 255, 255), (x - 4, y - 4, rules.player_size + 8, rules.player_size + 8), 2)
+            engine.draw_health_bar(screen, font, health, 100, x, y, rules.health_bar_offset)
+    text = (f"Slot {slot} | {client.snapshots} snapshots, {client.held_frames} held frames | "
+            f"down {client.bytes_in / 1024:.0f} KiB, up {client.bytes_out / 1024:.0f} KiB")
+    screen.blit(font.render(text, True, (255, 255, 255)), (10, engine.HEIGHT - 30))
+
+
+async def play(args, conditions):
+    """Join a server and play in a window until it is closed or ESC is pressed."""
+    import scenes
+    pygame.init()
+    screen = scenes.open_window((engine.WIDTH, engine.HEIGHT), "capped")
+    pygame.display.set_caption("Co-op")
+    font = engine.hud_fonts()[1]
+    loop = asyncio.get_running_loop()
+    client = Client(conditions(1))
+    await loop.create_datagram_endpoint(lambda: client, remote_addr=(args.host, args.port))
+    if not await client.connect():
+        print(f"netplay.py: no answer from {args.host}:{args.port}")
+        return 1
+    rules = MODES[client.mode]
+    game_world = world.get_world()
+    interval = 1 / engine.TICK_RATE
+    next_tick = loop.time()
+    running = True
+    while running:
+        key_downs = []
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                key_downs.append(event.key)
+        client.send_input(engine.TickInput(pygame.key.get_pressed(), pygame.mouse.get_pressed(), key_downs))
+        state = client.interpolated()
+        screen.fill((0, 0, 0))
+        if state is not None:
+            draw_state(screen, font, game_world, rules, state, client.slot, client)
+        pygame.display.flip()
+        next_tick += interval
+        await asyncio.sleep(max(0.0, next_tick - loop.time()))
+    client.close()
+    pygame.quit()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", action="store_true", help="run only the server")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="join a server and play in a window")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--mode", choices=list(MODES), default="lupta")
+    parser.add_argument("--enemies", type=int, default=20, help="total enemies; at least the mode's own spawns")
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="one-way delay in ms, each direction")
+    parser.add_argument("--jitter", type=float, default=0.0, help="ms either side of the latency")
+    parser.add_argument("--loss", type=float, default=0.0, help="fraction of packets dropped, each direction")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.connect:
+        args.host, _, port = args.connect.rpartition(":")
+        args.port = int(port)
+
+    def conditions(seed):
+        return NetworkConditions(args.latency / 1e3, args.jitter / 1e3, args.loss, args.seed * 1000 + seed)
+
+    if args.connect:
+        return asyncio.run(play(args, conditions))
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    debuglog.configure("*=warning")
+    pygame.init()
+    if args.server:
+        try:
+            asyncio.run(run_server(args, conditions))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    return 1 if asyncio.run(run_local(args, conditions)) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
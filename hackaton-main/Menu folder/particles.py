@@ -0,0 +1,135 @@
+import numpy as np
+import pygame
+import debuglog
+
+log = debuglog.get_logger("particles.py")
+
+CAPACITY = 32768  # Live particles at most; emits beyond it are dropped
+FADE_STEPS = 8  # Pre-rendered sprites per color, from fresh to nearly gone
+SPRITE_SIZE = 8  # Every sprite is this square, dot centred, so one offset fits all
+DRAG = 0.92  # Velocity kept per tick
+
+# Kind -> (colors, sprite radius, speed range in px/tick, life range in ticks, gravity in px/tick^2)
+KINDS = {
+    "hit": (((255, 220, 80), (255, 120, 40), (220, 40, 30)), 3, (2.0, 6.0), (12, 24), 0.15),
+    "block": (((255, 255, 255), (150, 220, 255)), 2, (1.5, 4.5), (8, 16), 0.0),
+    "dodge": (((170, 170, 170), (120, 120, 120)), 4, (0.1, 0.8), (18, 30), -0.03),
+}
+
+
+class ParticlePool:
+    """Fixed-capacity particles in NumPy arrays, for hit, block and dodge effects.
+
+    Live particles are packed at the front of the arrays: emit() appends a batch,
+    update() advances all of them and compacts away the dead ones in a few
+    vectorised operations, and draw() hands every visible particle to a single
+    Surface.blits call using sprites rendered once up front. No Python object is
+    created per particle. Particles are cosmetic and never touch the simulation state.
+    """
+
+    def __init__(self, capacity=CAPACITY, seed=0):
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)  # Ticks left
+        self.max_life = np.ones(capacity, dtype=np.float32)
+        self.sprite = np.zeros(capacity, dtype=np.int32)  # First sprite of the particle's kind and color
+        self.gravity = np.zeros(capacity, dtype=np.float32)
+        self.rng = np.random.default_rng(seed)  # Separate from gameplay so replays are unaffected
+        self.kinds = {}  # Kind -> (index of its first sprite, number of colors, speed, life, gravity)
+        self.sprites = []
+        for name, (colors, radius, speed, life, gravity) in KINDS.items():
+            self.kinds[name] = (len(self.sprites), len(colors), speed, life, gravity)
+            for color in colors:
+                self.sprites.extend(_fade_sprites(color, radius))
+        self._converted = False
+
+    @property
+    def capacity(self):
+        return len(self.x)
+
+    def emit(self, kind, x, y, count, spread=0.0, direction=None):
+        """Add up to count particles of a kind around (x, y), in world pixels.
+
+        spread scatters the start points over a square of that half-size. With a
+        direction (dx, dy) they fly roughly along it instead of in every direction.
+        """
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return 0
+        first_sprite, colors, (speed_min, speed_max), (life_min, life_max), gravity = self.kinds[kind]
+        rng = self.rng
+        s = slice(self.count, self.count + count)
+        if direction is None:
+            angle = rng.uniform(0, 2 * np.pi, count)
+        else:
+            angle = np.arctan2(direction[1], direction[0]) + rng.normal(0, 0.5, count)
+        speed = rng.uniform(speed_min, speed_max, count)
+        self.x[s] = x + rng.uniform(-spread, spread, count)
+        self.y[s] = y + rng.uniform(-spread, spread, count)
+        self.vx[s] = np.cos(angle) * speed
+        self.vy[s] = np.sin(angle) * speed
+        self.life[s] = self.max_life[s] = rng.uniform(life_min, life_max, count)
+        self.sprite[s] = first_sprite + rng.integers(0, colors, count) * FADE_STEPS
+        self.gravity[s] = gravity
+        self.count += count
+        return count
+
+    def update(self, ticks=1):
+        """Advance every particle by a number of simulation ticks and drop the expired ones."""
+        n = self.count
+        if n == 0 or ticks <= 0:
+            return
+        vx, vy = self.vx[:n], self.vy[:n]
+        vy += self.gravity[:n] * ticks
+        self.x[:n] += vx * ticks
+        self.y[:n] += vy * ticks
+        damping = DRAG ** ticks
+        vx *= damping
+        vy *= damping
+        self.life[:n] -= ticks
+        alive = self.life[:n] > 0
+        kept = int(np.count_nonzero(alive))
+        if kept < n:
+            for values in (self.x, self.y, self.vx, self.vy, self.life, self.max_life, self.sprite, self.gravity):
+                values[:kept] = values[:n][alive]
+            self.count = kept
+
+    def clear(self):
+        self.count = 0
+
+    def draw(self, surface, camera_x, camera_y, scale=1.0):
+        """Blit the particles inside the view with one Surface.blits call."""
+        n = self.count
+        if n == 0:
+            return
+        if not self._converted and pygame.display.get_surface() is not None:
+            self.sprites = [sprite.convert_alpha() for sprite in self.sprites]
+            self._converted = True
+        half = SPRITE_SIZE // 2
+        screen_x = (self.x[:n] - camera_x) * scale - half
+        screen_y = (self.y[:n] - camera_y) * scale - half
+        width, height = surface.get_size()
+        visible = (screen_x > -SPRITE_SIZE) & (screen_x < width) & (screen_y > -SPRITE_SIZE) & (screen_y < height)
+        # Older particles use the fainter, smaller sprites of their color
+        fade = ((1 - self.life[:n][visible] / self.max_life[:n][visible]) * FADE_STEPS).astype(np.int32)
+        index = self.sprite[:n][visible] + np.minimum(fade, FADE_STEPS - 1)
+        # Each axis converted to a flat list and zipped into tuples: cheaper than a stacked
+        # (n, 2) array turned into n small lists
+        positions = zip(screen_x[visible].astype(np.int32).tolist(), screen_y[visible].astype(np.int32).tolist())
+        sprites = self.sprites
+        surface.blits(zip(map(sprites.__getitem__, index.tolist()), positions), False)
+
+
+def _fade_sprites(color, radius):
+    """FADE_STEPS soft dots of one color, each smaller and more transparent than the last."""
+    sprites = []
+    for step in range(FADE_STEPS):
+        remaining = 1 - step / FADE_STEPS
+        sprite = pygame.Surface((SPRITE_SIZE, SPRITE_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, (*color, round(255 * remaining)), (SPRITE_SIZE // 2, SPRITE_SIZE // 2),
+                           max(1, round(radius * remaining)))
+        sprites.append(sprite)
+    return sprites
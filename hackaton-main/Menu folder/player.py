@@ -0,0 +1,117 @@
+import pygame
+import atlas
+import audio
+import debuglog
+import world
+
+log = debuglog.get_logger("player.py")
+
+PLAYER_SIZE = 150
+
+# Unified Player class
+class Player:
+    def __init__(self):
+        self.world = world.get_world()  # Replaced by the simulation's world when a mode starts
+        self.rect = pygame.Rect(*self.world.center(), PLAYER_SIZE, PLAYER_SIZE)
+        self.speed = 5
+        self.health = 100
+        self.max_health = 100
+        self.attack_cooldown = 0
+        self.is_blocking = False
+        self.is_attacking = False  # Added to support harta.py rendering
+        # Animation state
+        self.direction = "right"  # Default facing direction
+        self.is_moving = False
+        self.frame = 0
+        self.frame_count = 1  # Single frame since we have one image
+        self.animation_speed = 0.2  # Not used with single frame
+        self._frames = None  # Loaded on first use, so creating a Player costs nothing at startup
+
+    @property
+    def frames(self):
+        if self._frames is None:
+            self.load_sprites()
+        return self._frames
+
+    def load_sprites(self):
+        """Slice the pre-scaled, pre-flipped player frames out of the sprite atlas"""
+        try:
+            # The atlas is built by build_assets.py and loaded once per process
+            self._frames = [atlas.frames("diagonalstanga")]
+        except Exception as e:
+            log.warning("Error loading player sprite: %s", e)
+            # Fallback: Create a red square as a placeholder
+            dummy_surface = pygame.Surface((PLAYER_SIZE, PLAYER_SIZE))
+            dummy_surface.fill((255, 0, 0))  # Red square as fallback
+            self._frames = [(dummy_surface, dummy_surface)]
+
+    def update_animation(self):
+        """No animation since we have a single frame"""
+        self.frame = 0  # Always use the first (and only) frame
+
+    def handle_movement(self, keys_pressed):
+        moved = False
+        key_status = []
+        dx, dy = 0, 0  # Movement vector
+        # Apply speed penalty when blocking
+        current_speed = 2 if self.is_blocking else self.speed
+
+        if keys_pressed[pygame.K_w]:
+            dy -= current_speed
+            key_status.append("W")
+        if keys_pressed[pygame.K_s]:
+            dy += current_speed
+            key_status.append("S")
+        if keys_pressed[pygame.K_a]:
+            dx -= current_speed
+            key_status.append("A")
+            self.direction = "left"
+        if keys_pressed[pygame.K_d]:
+            dx += current_speed
+            key_status.append("D")
+            self.direction = "right"
+
+        if key_status:
+            log.every("movement", 30, "Moving: %s", key_status)
+
+        # Normalize movement vector to ensure consistent speed
+        if dx != 0 or dy != 0:
+            import math
+            length = math.sqrt(dx**2 + dy**2)
+            if length > 0:
+                dx = dx * current_speed / length
+                dy = dy * current_speed / length
+                self.rect.x += dx
+                self.rect.y += dy
+                moved = True
+                self.is_moving = True
+        else:
+            self.is_moving = False
+
+        # Keep player within map boundaries
+        self.world.clamp_rect(self.rect, PLAYER_SIZE)
+
+        return moved, key_status
+
+    def attack(self, enemy, mouse_buttons):
+        self.is_attacking = False  # Reset attack state
+        if mouse_buttons[0] and self.attack_cooldown <= 0:  # Left click
+            # enemy is a lupta.Enemy or a whole horde.EnemyStore; everything in range is hit
+            if enemy.damage_in_radius(self.rect.centerx, self.rect.centery, 100, 10):  # Range 100, 10 damage
+                log.debug("Player attacks!")
+                audio.play_sfx("hit")
+                self.attack_cooldown = 60  # 1-second cooldown at 60 FPS
+                self.is_attacking = True  # Set attacking state
+                return True
+        return False
+
+    def block(self, mouse_buttons):
+        self.is_blocking = mouse_buttons[2]  # Right click
+        if self.is_blocking:
+            log.throttle("block", 1.0, "Player blocking!")
+        return self.is_blocking
+
+    def update(self):
+        if self.attack_cooldown > 0:
+            self.attack_cooldown -= 1
+        self.update_animation()
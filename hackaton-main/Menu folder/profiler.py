@@ -0,0 +1,131 @@
+import json
+import time
+from collections import deque
+import pygame
+import debuglog
+import fonts
+import textcache
+
+log = debuglog.get_logger("profiler.py")
+
+# Runtime toggle (F3 in game). While off, begin() and end() return immediately.
+enabled = False
+
+GRAPH_FRAMES = 240  # Frames shown in the rolling frame-time graph
+TRACE_FRAMES = 600  # Frames kept for Chrome trace export (about 10 seconds)
+PANEL_RECT = pygame.Rect(560, 90, 230, 190)
+BUDGET_MS = 1000 / 60
+GRAPH_SCALE_MS = 2 * BUDGET_MS  # Frame time at the top of the graph
+PANEL_COLOR = (20, 20, 20)
+TEXT_COLOR = (230, 230, 230)
+GRAPH_COLOR = (80, 220, 80)
+BUDGET_COLOR = (220, 80, 80)
+TEXT_REFRESH_FRAMES = 15  # Phase text is re-rendered this often to keep the text cache small
+
+frame_times = deque(maxlen=GRAPH_FRAMES)  # Milliseconds per frame
+averages = {}  # Phase name -> moving average in milliseconds
+_trace = deque(maxlen=TRACE_FRAMES)  # (frame start, frame end, [(name, start, end), ...])
+_events = []
+_frame_start = 0.0
+_frame_count = 0
+_text_lines = []
+_font = None
+
+
+def toggle():
+    global enabled, _frame_start
+    enabled = not enabled
+    _frame_start = 0.0
+    frame_times.clear()
+    averages.clear()
+    _trace.clear()
+    _events.clear()
+    log.info("Profiler %s", "on" if enabled else "off")
+    return enabled
+
+
+def begin():
+    """Timestamp for the start of a phase (0.0 when profiling is off)."""
+    return time.perf_counter() if enabled else 0.0
+
+
+def end(name, start):
+    """Record a phase that began at start."""
+    if enabled and start:
+        _events.append((name, start, time.perf_counter()))
+
+
+def frame_begin():
+    global _frame_start
+    if enabled:
+        _frame_start = time.perf_counter()
+        _events.clear()
+
+
+def frame_end():
+    """Close the frame: update the graph, the phase averages and the trace buffer."""
+    global _frame_count
+    if not enabled or not _frame_start:
+        return
+    now = time.perf_counter()
+    frame_times.append((now - _frame_start) * 1e3)
+    totals = {}
+    for name, start, stop in _events:
+        totals[name] = totals.get(name, 0.0) + (stop - start) * 1e3
+    for name, total in totals.items():
+        averages[name] = averages.get(name, total) * 0.9 + total * 0.1
+    _trace.append((_frame_start, now, list(_events)))
+    _frame_count += 1
+
+
+def export_trace(path=None):
+    """Write the buffered frames as Chrome trace / Perfetto JSON; returns the path."""
+    if path is None:
+        path = time.strftime("trace_%Y%m%d_%H%M%S.json")
+    if not _trace:
+        log.warning("No profiled frames to export (press F3 first)")
+        return None
+    origin = _trace[0][0]
+    events = []
+    for index, (frame_start, frame_stop, phases) in enumerate(_trace):
+        events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1, "args": {"frame": index},
+                       "ts": (frame_start - origin) * 1e6, "dur": (frame_stop - frame_start) * 1e6})
+        for name, start, stop in phases:
+            events.append({"name": name, "ph": "X", "pid": 1, "tid": 1,
+                           "ts": (start - origin) * 1e6, "dur": (stop - start) * 1e6})
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    log.info("Wrote %d frames to %s", len(_trace), path)
+    return path
+
+
+def draw_overlay(surface):
+    """Draw the rolling frame-time graph and phase averages; returns the rect drawn."""
+    global _font, _text_lines
+    if _font is None:
+        _font = fonts.get("arial", 14)
+    panel = PANEL_RECT
+    pygame.draw.rect(surface, PANEL_COLOR, panel)
+
+    # Frame-time graph, newest frame on the right
+    graph = pygame.Rect(panel.x + 5, panel.y + 5, panel.width - 10, 60)
+    budget_y = graph.bottom - int(graph.height * BUDGET_MS / GRAPH_SCALE_MS)
+    pygame.draw.line(surface, BUDGET_COLOR, (graph.x, budget_y), (graph.right, budget_y))
+    if len(frame_times) > 1:
+        step = graph.width / (GRAPH_FRAMES - 1)
+        offset = GRAPH_FRAMES - len(frame_times)
+        points = [(graph.x + (offset + i) * step,
+                   graph.bottom - min(graph.height, graph.height * ms / GRAPH_SCALE_MS))
+                  for i, ms in enumerate(frame_times)]
+        pygame.draw.lines(surface, GRAPH_COLOR, False, points)
+
+    if _frame_count % TEXT_REFRESH_FRAMES == 0 or not _text_lines:
+        last = frame_times[-1] if frame_times else 0.0
+        _text_lines = [f"frame {last:5.2f} ms  (F4: save trace)"]
+        for name, ms in sorted(averages.items(), key=lambda item: -item[1])[:7]:
+            _text_lines.append(f"{name:<12} {ms:6.2f} ms")
+    y = graph.bottom + 4
+    for line in _text_lines:
+        surface.blit(textcache.render(_font, line, True, TEXT_COLOR), (panel.x + 5, y))
+        y += 15
+    return panel
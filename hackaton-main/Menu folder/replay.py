@@ -0,0 +1,227 @@
+"""Record the input of a play session and replay it headless at full speed.
+
+Usage:
+    GAME_RECORD=recordings python PythonApplication1.py   # record every play session
+    python replay.py FILE [--render] [--repeat N]
+
+A recording holds the starting state (in the save file format) and the input of
+every simulation tick, delta encoded: a record is only written on ticks where the
+held keys or mouse buttons changed or a key was pressed. State hashes are stored
+every CHECKPOINT_TICKS and at the end, so a replay reports the first tick at
+which a build diverges from the one that recorded it.
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+import pygame
+import debuglog
+import engine
+import scenes
+import savegame
+from player import Player
+
+log = debuglog.get_logger("replay.py")
+
+MAGIC = b"HKRP"
+VERSION = 1
+HEADER = struct.Struct("<4sHII")  # magic, version, ticks, checkpoints
+CHECKPOINT = struct.Struct("<I20s")  # tick, SHA-1 of the state after it
+CHECKPOINT_TICKS = 600
+# Held keys the simulation reads, one bit each; mouse buttons use the next three bits
+HELD_KEYS = (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d)
+MOUSE_SHIFT = len(HELD_KEYS)
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def pack_state(keys, mouse_buttons):
+    state = 0
+    for bit, key in enumerate(HELD_KEYS):
+        if keys[key]:
+            state |= 1 << bit
+    for bit, pressed in enumerate(mouse_buttons[:3]):
+        if pressed:
+            state |= 1 << (MOUSE_SHIFT + bit)
+    return state
+
+
+def unpack_state(state):
+    keys = engine.KeyState(key for bit, key in enumerate(HELD_KEYS) if state & (1 << bit))
+    mouse_buttons = tuple(bool(state & (1 << (MOUSE_SHIFT + bit))) for bit in range(3))
+    return keys, mouse_buttons
+
+
+class Recorder:
+    """Collects the input of every tick a Session runs; attach with session.recorder."""
+
+    def __init__(self, mode, sim):
+        self.start = savegame.encode(savegame.capture(mode, sim, {}))
+        self.stream = bytearray()
+        self.checkpoints = []
+        self.ticks = 0
+        self._state = 0
+        self._last_record = 0
+
+    def record(self, tick_input, sim):
+        """Called after each tick with the input it consumed."""
+        state = pack_state(tick_input.keys, tick_input.mouse_buttons)
+        if state != self._state or tick_input.key_downs:
+            write_varint(self.stream, self.ticks - self._last_record)
+            self.stream.append(state)
+            write_varint(self.stream, len(tick_input.key_downs))
+            for key in tick_input.key_downs:
+                write_varint(self.stream, key)
+            self._state = state
+            self._last_record = self.ticks
+        self.ticks += 1
+        if self.ticks % CHECKPOINT_TICKS == 0:
+            self.checkpoints.append((self.ticks, bytes.fromhex(sim.state_hash())))
+
+    def save(self, path, sim):
+        """Write the recording, ending with a hash of the final state."""
+        checkpoints = self.checkpoints
+        if not checkpoints or checkpoints[-1][0] != self.ticks:
+            checkpoints = checkpoints + [(self.ticks, bytes.fromhex(sim.state_hash()))]
+        stream = zlib.compress(bytes(self.stream), 9)
+        with open(path + ".tmp", "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.ticks, len(checkpoints)))
+            f.write(self.start)
+            for tick, digest in checkpoints:
+                f.write(CHECKPOINT.pack(tick, digest))
+            f.write(stream)
+        os.replace(path + ".tmp", path)
+        log.info("Recorded %d ticks to %s (%d bytes of input)", self.ticks, path, len(stream))
+
+
+def start_recording(directory, mode, session):
+    """Attach a Recorder to a session; returns the path it should be saved to."""
+    os.makedirs(directory, exist_ok=True)
+    session.recorder = Recorder(mode, session.sim)
+    return os.path.join(directory, time.strftime(f"{mode}_%Y%m%d_%H%M%S.rec"))
+
+
+class Recording:
+    """A recording file loaded for replay."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, self.ticks, checkpoint_count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} recording")
+            self.start = savegame.read(f, path)
+            if self.start is None:
+                raise ValueError(f"{path} has a corrupt starting state")
+            self.checkpoints = dict(CHECKPOINT.unpack(f.read(CHECKPOINT.size)) for _ in range(checkpoint_count))
+            self.stream = zlib.decompress(f.read())
+
+    def inputs(self):
+        """TickInput for every recorded tick, in order."""
+        data = self.stream
+        pos = 0
+        next_record = None
+        if data:
+            next_record, pos = read_varint(data, pos)
+        keys, mouse_buttons = unpack_state(0)
+        for tick in range(self.ticks):
+            key_downs = ()
+            if tick == next_record:
+                state = data[pos]
+                count, pos = read_varint(data, pos + 1)
+                key_downs = []
+                for _ in range(count):
+                    key, pos = read_varint(data, pos)
+                    key_downs.append(key)
+                keys, mouse_buttons = unpack_state(state)
+                if pos < len(data):
+                    gap, pos = read_varint(data, pos)
+                    next_record += gap
+            yield engine.TickInput(keys, mouse_buttons, key_downs)
+
+
+def replay(recording, player, modes, screen=None):
+    """Run a recording against a fresh simulation as fast as possible.
+
+    Returns (result, ticks run, first tick whose state hash differs or None, final hash).
+    With a screen, every tick is also drawn, to include rendering in the timing.
+    """
+    start = recording.start
+    start.apply_player(player)
+    sim = engine.Simulation(modes[start.mode].RULES, player)
+    start.apply_enemies(sim.enemies)
+    sim.tick = start.meta["tick"]
+    font, debug_font = engine.hud_fonts() if screen is not None else (None, None)
+
+    result = None
+    ticks = 0
+    mismatch = None
+    for tick_input in recording.inputs():
+        result = sim.step(tick_input)
+        ticks += 1
+        expected = recording.checkpoints.get(ticks)
+        if expected is not None and mismatch is None and bytes.fromhex(sim.state_hash()) != expected:
+            mismatch = ticks
+        if screen is not None:
+            engine.draw(screen, sim, font, debug_font)
+        if result is not None:
+            break
+    return result, ticks, mismatch, sim.state_hash()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording")
+    parser.add_argument("--render", action="store_true", help="draw every tick to an offscreen window")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    debuglog.configure("*=warning")
+    pygame.init()
+    screen = scenes.open_window((engine.WIDTH, engine.HEIGHT), "uncapped")  # The same SCALED window as the game
+    import harta
+    import lupta
+    modes = {"exploring": harta, "fighting": lupta}
+
+    recording = Recording(args.recording)
+    ok = True
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result, ticks, mismatch, digest = replay(recording, Player(), modes,
+                                                 screen if args.render else None)
+        seconds = time.perf_counter() - start
+        print(f"replay.py: {ticks}/{recording.ticks} ticks ({ticks / engine.TICK_RATE:.0f} s of play) "
+              f"in {seconds:.2f} s, {ticks / seconds:.0f} ticks/s, result {result!r}")
+        if mismatch is not None:
+            print(f"replay.py: DIVERGED at tick {mismatch}, final hash {digest}")
+            ok = False
+        elif ticks != recording.ticks:
+            print(f"replay.py: DIVERGED, recording has {recording.ticks} ticks")
+            ok = False
+        else:
+            print(f"replay.py: Final state hash {digest} matches")
+    debuglog.flush()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""Save files for CONTINUE: player, enemies, current mode and settings.
+
+Usage: python savegame.py [SAVE_FILE] [--json OUT]
+
+Prints the header of a save file, or with --json exports the whole save as
+readable JSON for debugging.
+
+File layout (little endian):
+    header   magic b"HKSV", format version, metadata length, enemy block length, CRC32
+    metadata UTF-8 JSON (mode, player, settings, enemy count); small, read by peek()
+    enemies  zlib-compressed packed arrays, one column per ENEMY_FIELDS entry
+"""
+import asyncio
+import json
+import os
+import platform
+import struct
+import sys
+import threading
+import time
+import zlib
+import numpy as np
+import debuglog
+
+log = debuglog.get_logger("savegame.py")
+
+SAVE_PATH = "save_game.sav"
+EXPORT_PATH = "save_game.json"
+MAGIC = b"HKSV"
+VERSION = 1
+HEADER = struct.Struct("<4sHIII")
+# Enemy columns and their on-disk types (positions and health fit in float32)
+ENEMY_FIELDS = (("x", "<f4"), ("y", "<f4"), ("health", "<f4"), ("max_health", "<f4"),
+                ("cooldown", "<i2"), ("alive", "|b1"))
+# Player state a simulation tick reads; the flags carry over between modes (blocking slows movement)
+PLAYER_FIELDS = ("health", "max_health", "attack_cooldown", "direction", "is_blocking", "is_attacking", "is_moving")
+
+_threads_available = platform.system() != "Emscripten"
+_write_lock = None
+
+
+class Snapshot:
+    """A copy of the game state, detached from the live objects so it can be written later."""
+
+    def __init__(self, meta, enemies):
+        self.meta = meta  # Plain JSON-compatible dict
+        self.enemies = enemies  # Field name -> NumPy array, or None until loaded
+
+    @property
+    def mode(self):
+        return self.meta["mode"]
+
+    @property
+    def settings(self):
+        return self.meta["settings"]
+
+    def apply_player(self, player):
+        state = self.meta["player"]
+        player.rect.x = state["x"]
+        player.rect.y = state["y"]
+        for name in PLAYER_FIELDS:
+            if name in state:  # Older saves have no player flags; a fresh player's are right for them
+                setattr(player, name, state[name])
+
+    def apply_enemies(self, store):
+        store.restore(self.enemies)
+
+    def to_json(self):
+        data = dict(self.meta)
+        data["enemies"] = {name: values.tolist() for name, values in self.enemies.items()}
+        return data
+
+
+def capture(mode, sim, settings):
+    """Snapshot a running simulation; cheap enough to call from inside a frame."""
+    player = sim.player
+    state = {"x": player.rect.x, "y": player.rect.y}
+    for name in PLAYER_FIELDS:
+        state[name] = getattr(player, name)
+    meta = {
+        "saved_at": time.time(),
+        "mode": mode,
+        "tick": sim.tick,
+        "player": state,
+        "settings": dict(settings),
+        "enemy_count": sim.enemies.count,
+    }
+    return Snapshot(meta, sim.enemies.snapshot([name for name, _ in ENEMY_FIELDS]))
+
+
+def encode(snapshot):
+    meta = json.dumps(snapshot.meta, separators=(",", ":")).encode("utf-8")
+    columns = [np.ascontiguousarray(snapshot.enemies[name], dtype=dtype).tobytes()
+               for name, dtype in ENEMY_FIELDS]
+    block = zlib.compress(b"".join(columns), 6)
+    crc = zlib.crc32(block, zlib.crc32(meta))
+    return HEADER.pack(MAGIC, VERSION, len(meta), len(block), crc) + meta + block
+
+
+def _read_header(f, path):
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    magic, version, meta_size, block_size, crc = HEADER.unpack(header)
+    if magic != MAGIC:
+        log.warning("%s is not a save file", path)
+        return None
+    if version != VERSION:
+        log.warning("%s has unsupported save version %d", path, version)
+        return None
+    return meta_size, block_size, crc
+
+
+def peek(path=SAVE_PATH):
+    """Metadata of a save without reading the enemy block; None if there is no valid save."""
+    try:
+        with open(path, "rb") as f:
+            header = _read_header(f, path)
+            if header is None:
+                return None
+            meta = f.read(header[0])
+    except OSError:
+        return None
+    try:
+        return Snapshot(json.loads(meta), None)
+    except ValueError:
+        log.warning("%s has a corrupt header", path)
+        return None
+
+
+def load(path=SAVE_PATH):
+    """Read and check a whole save file; returns a Snapshot or None."""
+    try:
+        with open(path, "rb") as f:
+            return read(f, path)
+    except OSError as e:
+        log.warning("Failed to read %s: %s", path, e)
+        return None
+
+
+def read(f, source=SAVE_PATH):
+    """Read one save from an open binary file, leaving it positioned just after the save."""
+    header = _read_header(f, source)
+    if header is None:
+        return None
+    meta_size, block_size, crc = header
+    meta = f.read(meta_size)
+    block = f.read(block_size)
+    if len(meta) != meta_size or len(block) != block_size or zlib.crc32(block, zlib.crc32(meta)) != crc:
+        log.warning("%s is truncated or corrupt", source)
+        return None
+    meta = json.loads(meta)
+    raw = zlib.decompress(block)
+    count = meta["enemy_count"]
+    enemies = {}
+    offset = 0
+    for name, dtype in ENEMY_FIELDS:
+        dtype = np.dtype(dtype)
+        enemies[name] = np.frombuffer(raw, dtype=dtype, count=count, offset=offset).astype(dtype.newbyteorder("="))
+        offset += count * dtype.itemsize
+    return Snapshot(meta, enemies)
+
+
+def write(snapshot, path=SAVE_PATH):
+    """Encode and write a snapshot; the old save is replaced only once the new one is on disk."""
+    start = time.perf_counter()
+    data = encode(snapshot)
+    temp = f"{path}.{threading.get_ident()}.tmp"  # An autosave thread may still be writing at exit
+    with open(temp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+    log.info("Saved %s to %s (%d bytes, %.1f ms)", snapshot.mode, path, len(data),
+             (time.perf_counter() - start) * 1e3)
+
+
+async def save_async(snapshot, path=SAVE_PATH):
+    """Write a snapshot off the frame loop: in a worker thread, or inline on the web."""
+    global _write_lock
+    if _write_lock is None:
+        _write_lock = asyncio.Lock()
+    async with _write_lock:  # Saves land in the order they were taken
+        if _threads_available:
+            await asyncio.get_running_loop().run_in_executor(None, write, snapshot, path)
+        else:
+            write(snapshot, path)
+
+
+def export_json(path=SAVE_PATH, out=EXPORT_PATH):
+    """Write a save file as indented JSON; returns False if it could not be loaded."""
+    snapshot = load(path)
+    if snapshot is None:
+        return False
+    with open(out, "w") as f:
+        json.dump(snapshot.to_json(), f, indent=1)
+    log.info("Exported %s to %s", path, out)
+    return True
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    out = None
+    if "--json" in args:
+        i = args.index("--json")
+        out = args[i + 1] if i + 1 < len(args) else EXPORT_PATH
+        del args[i:i + 2]
+    path = args[0] if args else SAVE_PATH
+    if out is not None:
+        ok = export_json(path, out)
+    else:
+        saved = peek(path)
+        ok = saved is not None
+        if ok:
+            print(json.dumps(saved.meta, indent=1))
+    debuglog.flush()
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,268 @@
+import asyncio
+import os
+import platform
+import time
+import warnings
+import pygame
+import debuglog
+import inputs
+import profiler
+import startup
+
+log = debuglog.get_logger("scenes.py")
+
+FPS = 60
+IS_WEB = platform.system() == "Emscripten"
+# Frame pacing, from GAME_PACING:
+#   idle      like capped, but menus with nothing animating sleep until the next event
+#   capped    sleep away the rest of every frame to hold FPS
+#   vsync     let a vsync'd flip pace frames (see open_window)
+#   uncapped  no waiting at all, for benchmarks
+PACING_MODES = ("idle", "capped", "vsync", "uncapped")
+PACING = os.environ.get("GAME_PACING", "idle")
+IDLE_TIMEOUT_MS = 500  # Longest idle wait, so nothing on screen is ever more stale than this
+
+_vsync = False  # Whether open_window got a vsync'd window
+
+
+class DirtyTracker:
+    """Collects the screen regions whose widgets changed since the last frame."""
+
+    def __init__(self):
+        self.full = True
+        self.rects = []
+        self.states = {}
+
+    def invalidate(self):
+        """Force a full redraw on the next frame (scene entry, resize, brightness change)."""
+        self.full = True
+
+    def mark(self, rect):
+        self.rects.append(pygame.Rect(rect))
+
+    def track(self, key, rect, state):
+        """Report a widget's state; its old and new regions become dirty when it changes."""
+        previous = self.states.get(key)
+        rect = pygame.Rect(rect)
+        if previous is None or previous[0] != state:
+            self.states[key] = (state, rect)
+            if previous is not None:
+                self.rects.append(previous[1])
+            self.rects.append(rect)
+
+    def take(self):
+        """Return the dirty rects for this frame, or None when everything must be redrawn."""
+        rects = None if self.full else self.rects
+        self.full = False
+        self.rects = []
+        return rects
+
+
+def draw_dirty(screen, rects, draw):
+    """Call draw(screen) for the whole screen, or clipped to each dirty rect; returns rects."""
+    if rects is None:
+        draw(screen)
+        return None
+    for rect in rects:
+        screen.set_clip(rect)
+        draw(screen)
+    screen.set_clip(None)
+    return rects
+
+
+def open_window(size, pacing=PACING):
+    """Open a SCALED window of the game's logical size.
+
+    SDL's renderer stretches each finished frame to the window or fullscreen size,
+    so drawing always costs the same number of pixels whatever the display resolution.
+    vsync pacing also asks for vsync, which the driver may refuse.
+    """
+    global _vsync
+    screen = pygame.display.get_surface()
+    if screen is not None and screen.get_size() == size:
+        return screen  # Already opened (tools open it before importing the game)
+    vsync = pacing == "vsync"
+    try:
+        # Without a hardware renderer pygame scales in software, cannot vsync, and only warns
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            screen = pygame.display.set_mode(size, pygame.SCALED, vsync=int(vsync))
+    except pygame.error as e:
+        log.warning("Scaled window unavailable (%s), opening a plain one", e)
+        _vsync = False
+        return pygame.display.set_mode(size)
+    if caught:
+        log.info("No hardware renderer (%s), scaling in software", caught[0].message)
+    _vsync = vsync and not caught
+    if vsync and not _vsync:
+        log.warning("Vsync unavailable, falling back to a capped frame rate")
+    return screen
+
+
+class Scene:
+    """One screen of the game. The manager calls frame() exactly once per display frame."""
+
+    # Set by frame() to a list of changed rects to push only those regions
+    # with display.update(); None means the whole frame was redrawn.
+    dirty_rects = None
+    # False when the scene only changes in response to input, so in idle pacing
+    # the manager can block until the next event instead of running frames.
+    animating = True
+
+    def enter(self, manager):
+        """Called when the scene becomes current."""
+        self.manager = manager
+
+    def exit(self):
+        """Called when the manager switches away from the scene."""
+
+    def invalidate(self):
+        """Called when something the manager drew over the scene goes away; the next
+        frame must redraw everything. Scenes that always redraw everything ignore it."""
+
+    def frame(self, screen, events):
+        """Update and draw one frame; return the name of the next scene or None to stay."""
+        return None
+
+
+class SceneManager:
+    """Owns the single frame loop and cooperatively yields to asyncio once per frame.
+
+    Background work (asset loading, autosave, networking) is started with spawn()
+    and runs in the time left over after each frame instead of blocking it.
+    """
+
+    def __init__(self, screen, clock, fps=FPS, pacing=PACING):
+        self.screen = screen
+        self.clock = clock
+        self.fps = fps
+        if pacing not in PACING_MODES:
+            log.warning("Unknown pacing mode %r, using idle", pacing)
+            pacing = "idle"
+        if pacing == "vsync" and not _vsync:
+            pacing = "capped"  # open_window could not get vsync; see its warning
+        self.pacing = pacing
+        log.info("Frame pacing: %s", pacing)
+        self._waited = []  # Event that ended an idle wait, handled in the next frame
+        self.scenes = {}
+        self.current = None
+        self.current_name = None
+        self.running = True
+        self.overlays = []  # Callables run on the finished frame before it is shown
+        self.tasks = set()
+
+    def add(self, name, scene):
+        self.scenes[name] = scene
+
+    def switch(self, name):
+        if name not in self.scenes:
+            log.error("Unknown scene: %s", name)
+            return
+        if self.current is not None:
+            self.current.exit()
+        log.info("Switching scene: %s -> %s", self.current_name, name)
+        self.current_name = name
+        self.current = self.scenes[name]
+        self.current.enter(self)
+
+    def stop(self):
+        self.running = False
+
+    def spawn(self, coro, name=None):
+        """Run a coroutine alongside the frame loop; failures are logged, not raised."""
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+
+        def done(finished):
+            self.tasks.discard(finished)
+            if not finished.cancelled() and finished.exception() is not None:
+                log.error("Background task %s failed: %s", name or finished, finished.exception())
+
+        task.add_done_callback(done)
+        return task
+
+    async def pace(self, frame_start, frame_time, may_idle):
+        """Wait until the next frame is due, according to the pacing mode."""
+        if IS_WEB or self.pacing in ("vsync", "uncapped"):
+            # The browser or the vsync'd flip already paced the frame; just let background tasks run
+            await asyncio.sleep(0)
+        elif self.pacing == "idle" and may_idle and not self.tasks and not profiler.enabled:
+            # Nothing to draw until something happens: block without spinning the CPU.
+            # Only when no background task is waiting for the asyncio loop.
+            event = pygame.event.wait(IDLE_TIMEOUT_MS)
+            if event.type != pygame.NOEVENT:
+                self._waited.append(event)
+        else:
+            # Single throttle: sleep away the rest of the frame inside asyncio so that
+            # background tasks get that time
+            await asyncio.sleep(max(0.0, frame_time - (time.perf_counter() - frame_start)))
+
+    async def run(self, first_scene):
+        self.switch(first_scene)
+        frame_time = 1.0 / self.fps
+        first_frame = True
+        while self.running:
+            frame_start = time.perf_counter()
+            profiler.frame_begin()
+            start = profiler.begin()
+            events = self._waited + pygame.event.get()
+            self._waited = []
+            profiler.end("event_pump", start)
+            for event in events:
+                if event.type == pygame.QUIT:
+                    self.running = False
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_F3:
+                        profiler.toggle()
+                        self.current.invalidate()  # Uncover or cover the panel's region
+                    elif event.key == pygame.K_F4:
+                        profiler.export_trace()
+
+            start = profiler.begin()
+            next_scene = self.current.frame(self.screen, events)
+            profiler.end("scene", start)
+            rects = self.current.dirty_rects
+            may_idle = not self.current.animating
+            if not self.running:
+                break
+            if next_scene is not None and next_scene != self.current_name:
+                self.switch(next_scene)
+                rects = None
+                may_idle = False  # The new scene has not been drawn yet
+
+            start = profiler.begin()
+            if rects is None:
+                for overlay in self.overlays:
+                    overlay(self.screen)
+            else:
+                for rect in rects:
+                    self.screen.set_clip(rect)
+                    for overlay in self.overlays:
+                        overlay(self.screen)
+                self.screen.set_clip(None)
+            profiler.end("brightness", start)
+            if profiler.enabled:
+                panel = profiler.draw_overlay(self.screen)
+                if rects is not None:
+                    rects = rects + [panel]
+
+            start = profiler.begin()
+            if rects is None:
+                pygame.display.flip()
+            elif rects:
+                pygame.display.update(rects)
+            profiler.end("flip", start)
+            inputs.probe.flipped()
+            profiler.frame_end()
+            if first_frame:
+                first_frame = False
+                startup.mark("first frame")
+                startup.report("until the first menu frame")
+            self.clock.tick()
+            await self.pace(frame_start, frame_time, may_idle)
+
+        if self.current is not None:
+            self.current.exit()
+        for task in list(self.tasks):
+            task.cancel()
+        inputs.probe.report()
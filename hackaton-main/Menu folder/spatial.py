@@ -0,0 +1,84 @@
+import itertools
+import numpy as np
+
+GRID_SPACING = 100  # Same cell size as the world grid
+
+
+class SpatialHash:
+    """Uniform-grid broad phase: maps grid cells to the ids of the entities inside them.
+
+    Entities are bucketed by their centre point. move() only touches the table when an
+    entity crosses into another cell, so keeping the hash current is cheap. Queries
+    return candidate ids from the covered cells; callers do the exact distance test.
+    """
+
+    def __init__(self, cell_size=GRID_SPACING):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.where = {}  # id -> cell
+
+    def __len__(self):
+        return len(self.where)
+
+    def cell_of(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def insert(self, entity_id, x, y):
+        cell = self.cell_of(x, y)
+        self.where[entity_id] = cell
+        bucket = self.cells.get(cell)
+        if bucket is None:
+            self.cells[cell] = {entity_id}
+        else:
+            bucket.add(entity_id)
+
+    def remove(self, entity_id):
+        cell = self.where.pop(entity_id, None)
+        if cell is None:
+            return
+        bucket = self.cells[cell]
+        bucket.discard(entity_id)
+        if not bucket:
+            del self.cells[cell]
+
+    def move(self, entity_id, x, y):
+        """Update an entity's position; a no-op unless it changed cell."""
+        cell = self.cell_of(x, y)
+        old = self.where.get(entity_id)
+        if old == cell:
+            return
+        if old is not None:
+            self.remove(entity_id)
+        self.insert(entity_id, x, y)
+
+    def move_cell(self, entity_id, cell):
+        """Same as move() for a precomputed cell (used by vectorised callers)."""
+        old = self.where.get(entity_id)
+        if old == cell:
+            return
+        if old is not None:
+            bucket = self.cells[old]
+            bucket.discard(entity_id)
+            if not bucket:
+                del self.cells[old]
+        self.where[entity_id] = cell
+        bucket = self.cells.get(cell)
+        if bucket is None:
+            self.cells[cell] = {entity_id}
+        else:
+            bucket.add(entity_id)
+
+    def query_rect(self, left, top, width, height):
+        """Ids of entities whose centre may lie in the rectangle, as an int array."""
+        first_x, first_y = self.cell_of(left, top)
+        last_x, last_y = self.cell_of(left + width, top + height)
+        cells = self.cells
+        buckets = [cells[(cx, cy)]
+                   for cx in range(first_x, last_x + 1)
+                   for cy in range(first_y, last_y + 1)
+                   if (cx, cy) in cells]
+        return np.fromiter(itertools.chain.from_iterable(buckets), dtype=np.intp)
+
+    def query_radius(self, cx, cy, radius):
+        """Ids of entities whose centre may lie within radius of (cx, cy)."""
+        return self.query_rect(cx - radius, cy - radius, 2 * radius, 2 * radius)
@@ -0,0 +1,29 @@
+"""Startup timing breakdown, printed when the game is run with --profile-startup."""
+import sys
+import time
+
+PROFILE = "--profile-startup" in sys.argv
+
+_start = time.perf_counter()
+_last = _start
+_marks = []
+
+
+def mark(label):
+    """Record the time since the previous mark under label."""
+    global _last
+    now = time.perf_counter()
+    _marks.append((label, now - _last))
+    _last = now
+
+
+def report(title):
+    """Print and clear the marks collected so far (only with --profile-startup)."""
+    marks = list(_marks)
+    _marks.clear()
+    if not PROFILE:
+        return
+    print(f"startup.py: {title}")
+    for label, seconds in marks:
+        print(f"  {label:<32}{seconds * 1e3:8.1f} ms")
+    print(f"  {'total since launch':<32}{(time.perf_counter() - _start) * 1e3:8.1f} ms")
@@ -0,0 +1,8 @@
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# The game's modules live flat in the folder above, next to their assets
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
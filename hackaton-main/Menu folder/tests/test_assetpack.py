@@ -0,0 +1,31 @@
+import build_assets
+from assetpack import AssetPack
+
+
+def entries(count, size):
+    return [(f"asset{i}", "bin", bytes([i % 256]) * size) for i in range(count)]
+
+
+def test_layout_settles_when_index_grows_between_passes():
+    # Offsets crossing a digit boundary lengthen the index, which moves the data again
+    sources = {"screens": {}, "sounds": {}}
+    for padding in range(0, 300, 7):
+        sources["padding"] = "x" * padding
+        pack = entries(40, 997)
+        index_bytes, offsets = build_assets.layout_pack(pack, sources)
+        first = min(entry["offset"] for entry in offsets.values())
+        assert build_assets.PACK_HEADER.size + len(index_bytes) <= first
+        assert first % build_assets.PACK_ALIGN == 0
+
+
+def test_written_pack_reads_back(tmp_path):
+    sources = {"screens": {}, "sounds": {}, "padding": "y" * 123}
+    pack = entries(60, 1001)
+    path = str(tmp_path / "assets.pak")
+    build_assets.write_pack(path, pack, sources)
+    reader = AssetPack(path)
+    try:
+        for name, fmt, data in pack:
+            assert bytes(reader.view(name)) == data
+    finally:
+        reader.close()
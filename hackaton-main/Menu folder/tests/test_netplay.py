@@ -0,0 +1,64 @@
+import numpy as np
+import netplay
+
+HEADER = b"\x03header"  # decode_delta() starts after the snapshot header
+
+
+def round_trip(state, base):
+    data = netplay.encode_delta(state, base)
+    return data, netplay.decode_delta(HEADER + data, len(HEADER), base)
+
+
+def rows(*values):
+    return np.array(values, dtype=np.int32).reshape(-1, netplay.FIELDS)
+
+
+BASE = rows((100, 200, 100, netplay.PRESENT | netplay.ALIVE),
+            (0, 0, 0, 0),
+            (3000, 2400, 75, netplay.PRESENT | netplay.ALIVE | netplay.ATTACKING),
+            (50, 60, 100, netplay.PRESENT | netplay.ALIVE))
+
+
+def test_full_snapshot_against_no_base():
+    data, state = round_trip(BASE, np.zeros((0, netplay.FIELDS), dtype=np.int32))
+    assert np.array_equal(state, BASE)
+    assert state.dtype == np.int32
+
+
+def test_delta_against_acked_base_with_negative_changes():
+    state = BASE.copy()
+    state[0] += (-7, 4, -10, 0)  # Moved left and lost health
+    state[2] += (-100000, 0, -75, -netplay.ALIVE - netplay.ATTACKING)
+    data, decoded = round_trip(state, BASE)
+    assert np.array_equal(decoded, state)
+    # Only the two changed rows are sent, so the delta is smaller than a full snapshot
+    assert len(data) < len(netplay.encode_delta(state, np.zeros((0, netplay.FIELDS), dtype=np.int32)))
+
+
+def test_unchanged_state_is_two_bytes():
+    data, decoded = round_trip(BASE, BASE)
+    assert data == b"\x04\x00"
+    assert np.array_equal(decoded, BASE)
+
+
+def test_added_rows_are_encoded_against_zeros():
+    state = np.vstack((BASE, rows((-40, 10, 100, netplay.PRESENT | netplay.ALIVE), (0, 0, 0, 0))))
+    data, decoded = round_trip(state, BASE)
+    assert np.array_equal(decoded, state)
+
+
+def test_removed_rows_are_dropped():
+    state = BASE[:2].copy()
+    state[1, 3] = netplay.PRESENT
+    data, decoded = round_trip(state, BASE)
+    assert np.array_equal(decoded, state)
+
+
+def test_random_states_round_trip():
+    rng = np.random.default_rng(4)
+    base = rng.integers(-2 ** 20, 2 ** 20, (40, netplay.FIELDS), dtype=np.int32)
+    for count in (0, 25, 40, 60):
+        state = rng.integers(-2 ** 20, 2 ** 20, (count, netplay.FIELDS), dtype=np.int32)
+        keep = rng.random(min(count, 40)) < 0.5
+        state[:min(count, 40)][keep] = base[:min(count, 40)][keep]
+        assert np.array_equal(round_trip(state, base)[1], state)
@@ -0,0 +1,37 @@
+import pygame
+import engine
+import harta
+import lupta
+import replay
+from player import Player
+
+MODES = {"exploring": harta, "fighting": lupta}
+
+
+def record(path, player, ticks):
+    """Record a session that starts from player's current state and holds right (D) and block."""
+    sim = engine.Simulation(harta.RULES, player)
+    recorder = replay.Recorder("exploring", sim)
+    tick_input = engine.TickInput(engine.KeyState({pygame.K_d}), (False, False, True))
+    for _ in range(ticks):
+        sim.step(tick_input)
+        recorder.record(tick_input, sim)
+    recorder.save(path, sim)
+    return sim.state_hash()
+
+
+def test_replay_starts_from_a_non_default_player(tmp_path):
+    # As after switching modes with block held: the first tick moves at blocking speed
+    player = Player()
+    player.is_blocking = True
+    player.is_attacking = True
+    player.health = 70
+    player.attack_cooldown = 12
+    player.direction = "left"
+    player.rect.x += 40
+    path = str(tmp_path / "blocking.rec")
+    digest = record(path, player, replay.CHECKPOINT_TICKS + 30)
+
+    recording = replay.Recording(path)
+    result, ticks, mismatch, final = replay.replay(recording, Player(), MODES)
+    assert (ticks, mismatch, final) == (recording.ticks, None, digest)
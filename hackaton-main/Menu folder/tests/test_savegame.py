@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+import engine
+import harta
+import horde
+import savegame
+from player import Player
+
+SETTINGS = {"brightness": 0.8, "volume": 0.5}
+
+
+def running_sim():
+    sim = engine.Simulation(harta.RULES, Player())
+    sim.spawn_horde(50, seed=5)
+    sim.enemies.damage_in_radius(800, 600, 300, 150)  # Kill a few and wound others
+    sim.enemies.cooldown[:10] = 7
+    sim.player.health = 64
+    sim.player.is_blocking = True
+    sim.tick = 321
+    return sim
+
+
+def saved(tmp_path):
+    sim = running_sim()
+    path = str(tmp_path / "save_game.sav")
+    savegame.write(savegame.capture("exploring", sim, SETTINGS), path)
+    return sim, path
+
+
+def test_save_round_trip(tmp_path):
+    sim, path = saved(tmp_path)
+    snapshot = savegame.load(path)
+    assert snapshot.mode == "exploring"
+    assert snapshot.settings == SETTINGS
+    assert snapshot.meta["tick"] == 321
+
+    player = Player()
+    snapshot.apply_player(player)
+    assert (player.rect.topleft, player.health, player.is_blocking) == (sim.player.rect.topleft, 64, True)
+    store = horde.EnemyStore()
+    snapshot.apply_enemies(store)
+    assert store.count == sim.enemies.count
+    for name, dtype in savegame.ENEMY_FIELDS:
+        expected = getattr(sim.enemies, name)[:sim.enemies.count].astype(dtype)
+        assert np.array_equal(getattr(store, name)[:store.count], expected), name
+    assert store.alive_count() == sim.enemies.alive_count() < 51
+
+    assert savegame.peek(path).meta == snapshot.meta
+
+
+@pytest.mark.parametrize("damage", ["crc", "truncate", "magic"])
+def test_damaged_save_is_rejected(tmp_path, damage):
+    _, path = saved(tmp_path)
+    with open(path, "rb") as f:
+        data = bytearray(f.read())
+    if damage == "crc":
+        data[-5] ^= 0xFF  # Inside the compressed enemy block
+    elif damage == "truncate":
+        data = data[:-1]  # Last byte of the enemy block missing
+    else:
+        data[:4] = b"NOPE"
+    with open(path, "wb") as f:
+        f.write(data)
+    assert savegame.load(path) is None
@@ -0,0 +1,46 @@
+import numpy as np
+import engine
+import harta
+import world
+from player import Player
+
+
+def blocked_world():
+    game_world = world.World()
+    game_world.scatter_obstacles(0.4, keep_clear=[game_world.center()])
+    game_world.obstacles.add((3, 3))  # Under harta's enemy spawn at (300, 300)
+    return game_world
+
+
+def centre_cells(enemies):
+    n = enemies.count
+    half = enemies.size / 2
+    return zip(((enemies.x[:n] + half) // world.GRID_SPACING).astype(int).tolist(),
+               ((enemies.y[:n] + half) // world.GRID_SPACING).astype(int).tolist())
+
+
+def test_enemies_never_spawn_on_obstacles():
+    game_world = blocked_world()
+    sim = engine.Simulation(harta.RULES, Player(), game_world)
+    sim.spawn_horde(500, seed=3)
+    assert sim.enemies.count == 501
+    assert not any(game_world.is_blocked(cx, cy) for cx, cy in centre_cells(sim.enemies))
+
+
+def test_open_spawn_moves_to_the_nearest_open_cell():
+    game_world = world.World(obstacles=[(3, 3)])
+    size = harta.RULES.enemy_size
+    assert game_world.open_position(300, 300, size) != (300, 300)
+    x, y = game_world.open_position(300, 300, size)
+    cell = (int((x + size / 2) // world.GRID_SPACING), int((y + size / 2) // world.GRID_SPACING))
+    assert max(abs(cell[0] - 3), abs(cell[1] - 3)) == 1
+    assert game_world.open_position(500, 500, size) == (500, 500)
+
+
+def test_spawns_are_unchanged_without_obstacles():
+    game_world = world.World()
+    size = harta.RULES.enemy_size
+    x, y = game_world.scatter_points(100, size, np.random.default_rng(7))
+    rng = np.random.default_rng(7)
+    assert np.array_equal(x, rng.uniform(0, world.MAP_WIDTH - size, 100))
+    assert np.array_equal(y, rng.uniform(0, world.MAP_HEIGHT - size, 100))
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+import debuglog
+
+log = debuglog.get_logger("textcache.py")
+
+MAX_BYTES = 8 * 1024 * 1024  # Memory cap for cached text surfaces
+MAX_ENTRIES = 512
+
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by (font, text, color, antialias).
+
+    Unchanged strings are rasterised once; least recently used surfaces are
+    evicted when either the entry count or the memory cap is exceeded.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES, max_entries=MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, antialias, color):
+        """Drop-in for font.render(text, antialias, color) that reuses earlier results."""
+        key = (font, text, tuple(color), antialias)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        size = surface.get_width() * surface.get_height() * surface.get_bytesize()
+        self.entries[key] = surface
+        self.bytes += size
+        while self.entries and (self.bytes > self.max_bytes or len(self.entries) > self.max_entries):
+            _, old = self.entries.popitem(last=False)
+            self.bytes -= old.get_width() * old.get_height() * old.get_bytesize()
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+        }
+
+
+# Shared cache used by the menu, exploration and fighting modules
+cache = TextCache()
+
+
+def render(font, text, antialias, color):
+    return cache.render(font, text, antialias, color)
+
+
+def stats():
+    return cache.stats()
@@ -0,0 +1,301 @@
+import os
+from collections import OrderedDict
+import numpy as np
+import pygame
+import debuglog
+
+log = debuglog.get_logger("world.py")
+
+MAP_WIDTH, MAP_HEIGHT = 1600, 1200  # Default map size for exploration/fighting
+MAP_COLOR = (255, 255, 255)
+GRID_COLOR = (0, 0, 0)
+OBSTACLE_COLOR = (90, 90, 90)
+GRID_SPACING = 100
+GRID_LINE_WIDTH = 2
+CHUNK_SIZE = 400  # Multiple of GRID_SPACING so every chunk has the same grid layout
+CHUNK_CACHE_BYTES = 32 * 1024 * 1024  # Rendered chunks kept before the least recently used are dropped
+PREFETCH_PER_FRAME = 1  # Chunks built ahead of the camera per frame, to spread the cost out
+MAX_SPAWN_SEARCH = 100  # Rings of cells (or redraws) tried to move a spawn off an obstacle
+
+
+def draw_grid(surface, left, top):
+    """Default chunk generator: the white map with black grid lines."""
+    chunk_w, chunk_h = surface.get_size()
+    surface.fill(MAP_COLOR)
+    # Lines just outside the chunk are included so their width bleeds in correctly
+    first_x = (left - GRID_LINE_WIDTH) // GRID_SPACING * GRID_SPACING
+    for x in range(first_x, left + chunk_w, GRID_SPACING):
+        pygame.draw.line(surface, GRID_COLOR, (x - left, 0), (x - left, chunk_h), GRID_LINE_WIDTH)
+    first_y = (top - GRID_LINE_WIDTH) // GRID_SPACING * GRID_SPACING
+    for y in range(first_y, top + chunk_h, GRID_SPACING):
+        pygame.draw.line(surface, GRID_COLOR, (0, y - top), (chunk_w, y - top), GRID_LINE_WIDTH)
+
+
+class World:
+    """The map: its bounds, and its background streamed in as chunks around the camera.
+
+    A width/height of None makes that axis unbounded. obstacles is a set of blocked
+    (column, row) grid cells that enemies path around (see navigation.py). Chunks are generated (or loaded,
+    by a custom generator(surface, left, top)) the first time they are needed and kept
+    in an LRU cache capped at max_bytes. Each frame a few chunks just beyond the view
+    are built ahead of time in the direction the camera is moving, so crossing into
+    new ground does not stall a frame. Chunks are cached at the render scale they are
+    drawn at, so a reduced render scale costs nothing per frame.
+    """
+
+    def __init__(self, width=MAP_WIDTH, height=MAP_HEIGHT, chunk_size=CHUNK_SIZE,
+                 max_bytes=CHUNK_CACHE_BYTES, generator=draw_grid, obstacles=()):
+        self.width = width
+        self.height = height
+        self.obstacles = set(obstacles)
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.generator = generator
+        self.chunks = OrderedDict()  # (cx, cy) -> surface, least recently used first
+        self.bytes = 0
+        self.built = 0
+        self.evicted = 0
+        self._frame = 0
+        self._used = {}  # (cx, cy) -> last frame it was drawn
+        self._last_camera = None
+        self.scale = 1.0  # Render scale of the cached chunks
+
+    def __repr__(self):
+        return f"World({self.width or 'unbounded'}x{self.height or 'unbounded'})"
+
+    # Bounds
+
+    def clamp_rect(self, rect, size):
+        """Keep a rect (treated as size x size) inside the map, in place."""
+        if self.width is not None:
+            rect.x = max(0, min(rect.x, self.width - size))
+        if self.height is not None:
+            rect.y = max(0, min(rect.y, self.height - size))
+
+    def clamp_arrays(self, x, y, size, where=True):
+        """Vectorised clamp_rect for arrays of top-left corners, in place."""
+        if self.width is not None:
+            np.clip(x, 0, self.width - size, out=x, where=where)
+        if self.height is not None:
+            np.clip(y, 0, self.height - size, out=y, where=where)
+
+    def camera(self, focus_x, focus_y, view_w, view_h):
+        """Top-left of a view centred on a point, kept inside the map on bounded axes."""
+        camera_x = focus_x - view_w // 2
+        camera_y = focus_y - view_h // 2
+        if self.width is not None:
+            camera_x = max(0, min(camera_x, self.width - view_w))
+        if self.height is not None:
+            camera_y = max(0, min(camera_y, self.height - view_h))
+        return camera_x, camera_y
+
+    def is_blocked(self, cell_x, cell_y):
+        """True for obstacle cells and cells outside the map."""
+        if (cell_x, cell_y) in self.obstacles:
+            return True
+        if self.width is not None and not 0 <= cell_x * GRID_SPACING < self.width:
+            return True
+        return self.height is not None and not 0 <= cell_y * GRID_SPACING < self.height
+
+    def scatter_obstacles(self, fraction, seed=0, keep_clear=()):
+        """Block a random fraction of the spawn area's cells, except the points in keep_clear."""
+        rng = np.random.default_rng(seed)
+        left, top, width, height = self.spawn_area()
+        clear = {(int(x // GRID_SPACING), int(y // GRID_SPACING)) for x, y in keep_clear}
+        for cy in range(top // GRID_SPACING, (top + height) // GRID_SPACING):
+            for cx in range(left // GRID_SPACING, (left + width) // GRID_SPACING):
+                if (cx, cy) not in clear and rng.random() < fraction:
+                    self.obstacles.add((cx, cy))
+        self.chunks.clear()
+        self.bytes = 0
+
+    def blocked_points(self, x, y):
+        """Vectorised is_blocked for the cells under arrays of points."""
+        if not self.obstacles:
+            return np.zeros(len(x), dtype=bool)
+        cells = zip((x // GRID_SPACING).astype(np.int64).tolist(), (y // GRID_SPACING).astype(np.int64).tolist())
+        return np.fromiter((self.is_blocked(cx, cy) for cx, cy in cells), dtype=bool, count=len(x))
+
+    def open_position(self, x, y, size):
+        """Top-left of a size x size thing at (x, y), moved to the nearest open cell if its centre is blocked."""
+        half = size / 2
+        cell_x, cell_y = int((x + half) // GRID_SPACING), int((y + half) // GRID_SPACING)
+        if not self.is_blocked(cell_x, cell_y):
+            return x, y
+        for radius in range(1, MAX_SPAWN_SEARCH + 1):
+            ring = [(cell_x + dx, cell_y + dy) for dy in range(-radius, radius + 1) for dx in range(-radius, radius + 1)
+                    if max(abs(dx), abs(dy)) == radius]
+            ring.sort(key=lambda cell: (cell[0] - cell_x) ** 2 + (cell[1] - cell_y) ** 2)
+            for cx, cy in ring:
+                if not self.is_blocked(cx, cy):
+                    return (cx + 0.5) * GRID_SPACING - half, (cy + 0.5) * GRID_SPACING - half
+        return x, y
+
+    def scatter_points(self, count, size, rng):
+        """Top-lefts of count size x size things spread over the spawn area, centres on open cells only."""
+        left, top, width, height = self.spawn_area()
+        x = rng.uniform(left, left + width - size, count)
+        y = rng.uniform(top, top + height - size, count)
+        for _ in range(MAX_SPAWN_SEARCH):
+            redo = np.flatnonzero(self.blocked_points(x + size / 2, y + size / 2))
+            if not len(redo):
+                break
+            x[redo] = rng.uniform(left, left + width - size, len(redo))
+            y[redo] = rng.uniform(top, top + height - size, len(redo))
+        return x, y
+
+    def center(self):
+        """Middle of the map (the origin on unbounded axes)."""
+        return (self.width // 2 if self.width is not None else 0,
+                self.height // 2 if self.height is not None else 0)
+
+    def spawn_area(self):
+        """(left, top, width, height) to scatter spawns in; a default-sized area around the origin when unbounded."""
+        left, width = (0, self.width) if self.width is not None else (-MAP_WIDTH // 2, MAP_WIDTH)
+        top, height = (0, self.height) if self.height is not None else (-MAP_HEIGHT // 2, MAP_HEIGHT)
+        return left, top, width, height
+
+    # Background chunks
+
+    def _chunk_range(self, start, length, limit):
+        first = int(start) // self.chunk_size
+        last = (int(start) + length - 1) // self.chunk_size
+        if limit is not None:
+            first = max(0, first)
+            last = min((limit - 1) // self.chunk_size, last)
+        return range(first, last + 1)
+
+    def _build_chunk(self, cx, cy):
+        size = self.chunk_size
+        left = cx * size
+        top = cy * size
+        chunk_w = size if self.width is None else min(size, self.width - left)
+        chunk_h = size if self.height is None else min(size, self.height - top)
+        surface = pygame.Surface((chunk_w, chunk_h))
+        self.generator(surface, left, top)
+        for cell_x, cell_y in self.obstacles:
+            x = cell_x * GRID_SPACING - left
+            y = cell_y * GRID_SPACING - top
+            if -GRID_SPACING < x < chunk_w and -GRID_SPACING < y < chunk_h:
+                surface.fill(OBSTACLE_COLOR, (x, y, GRID_SPACING, GRID_SPACING))
+        if self.scale != 1.0:
+            surface = pygame.transform.smoothscale(surface, (round(chunk_w * self.scale), round(chunk_h * self.scale)))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()  # Match the display format so blits skip conversion
+        return surface
+
+    def chunk(self, cx, cy):
+        key = (cx, cy)
+        surface = self.chunks.get(key)
+        if surface is not None:
+            self.chunks.move_to_end(key)
+            return surface
+        surface = self._build_chunk(cx, cy)
+        self.chunks[key] = surface
+        self.bytes += surface.get_width() * surface.get_height() * surface.get_bytesize()
+        self.built += 1
+        self._evict()
+        return surface
+
+    def _evict(self):
+        """Drop least recently used chunks over the memory cap, never ones drawn this frame."""
+        while self.bytes > self.max_bytes and len(self.chunks) > 1:
+            key, surface = next(iter(self.chunks.items()))
+            if self._used.get(key) == self._frame:
+                break
+            del self.chunks[key]
+            self._used.pop(key, None)
+            self.bytes -= surface.get_width() * surface.get_height() * surface.get_bytesize()
+            self.evicted += 1
+
+    def set_scale(self, scale):
+        """Change the render scale; cached chunks are dropped and rebuilt at the new scale."""
+        if scale != self.scale:
+            self.scale = scale
+            self.chunks.clear()
+            self.bytes = 0
+
+    def draw(self, screen, camera_x, camera_y, scale=1.0):
+        """Blit the chunks visible from the camera's top-left corner, then prefetch ahead of it.
+
+        With a scale below 1, screen is a reduced canvas showing the same view as a
+        full-size one: world pixel (x, y) lands at ((x - camera_x) * scale, (y - camera_y) * scale).
+        chunk_size * scale should be a whole number so that chunks meet without gaps.
+        """
+        self.set_scale(scale)
+        self._frame += 1
+        size = self.chunk_size
+        view_w = round(screen.get_width() / scale)
+        view_h = round(screen.get_height() / scale)
+        blits = []
+        for cy in self._chunk_range(camera_y, view_h, self.height):
+            for cx in self._chunk_range(camera_x, view_w, self.width):
+                self._used[(cx, cy)] = self._frame
+                blits.append((self.chunk(cx, cy), (round((cx * size - camera_x) * scale),
+                                                   round((cy * size - camera_y) * scale))))
+        screen.blits(blits, False)
+        self.prefetch(camera_x, camera_y, view_w, view_h)
+
+    def prefetch(self, camera_x, camera_y, view_w, view_h):
+        """Build up to PREFETCH_PER_FRAME missing chunks one chunk beyond the view, toward the motion."""
+        last = self._last_camera
+        self._last_camera = (camera_x, camera_y)
+        if last is None:
+            return
+        dx = (camera_x > last[0]) - (camera_x < last[0])
+        dy = (camera_y > last[1]) - (camera_y < last[1])
+        if not dx and not dy:
+            return
+        size = self.chunk_size
+        # Grow the view by one chunk in the direction of travel and build what is missing there
+        left = camera_x - size if dx < 0 else camera_x
+        top = camera_y - size if dy < 0 else camera_y
+        budget = PREFETCH_PER_FRAME
+        for cy in self._chunk_range(top, view_h + abs(dy) * size, self.height):
+            for cx in self._chunk_range(left, view_w + abs(dx) * size, self.width):
+                if (cx, cy) not in self.chunks:
+                    self.chunk(cx, cy)
+                    budget -= 1
+                    if budget == 0:
+                        return
+
+    def prebuild(self):
+        """Render every chunk up front (small bounded maps only)."""
+        for cy in self._chunk_range(0, self.height, self.height):
+            for cx in self._chunk_range(0, self.width, self.width):
+                self.chunk(cx, cy)
+
+    def stats(self):
+        return {"chunks": len(self.chunks), "bytes": self.bytes, "built": self.built, "evicted": self.evicted}
+
+
+def parse_size(spec):
+    """"WxH" -> (W, H); "unbounded" (or "inf") -> (None, None)."""
+    if spec.strip().lower() in ("unbounded", "inf", "infinite"):
+        return None, None
+    width, height = spec.lower().split("x")
+    return int(width), int(height)
+
+
+_world = None
+
+
+def get_world():
+    """The shared world used by every mode.
+
+    GAME_WORLD sets its size, e.g. "16000x12000" or "unbounded", and GAME_OBSTACLES
+    blocks that fraction of grid cells at random (e.g. "0.2").
+    """
+    global _world
+    if _world is None:
+        spec = os.environ.get("GAME_WORLD")
+        width, height = parse_size(spec) if spec else (MAP_WIDTH, MAP_HEIGHT)
+        _world = World(width, height)
+        fraction = float(os.environ.get("GAME_OBSTACLES", 0))
+        if fraction:
+            # Keep the player's start and the area around it open
+            cx, cy = _world.center()
+            _world.scatter_obstacles(fraction, keep_clear=[(cx + dx, cy + dy) for dx in (-100, 0, 100, 200)
+                                                           for dy in (-100, 0, 100, 200)])
+        log.debug("Created %r", _world)
+    return _world